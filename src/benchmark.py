@@ -0,0 +1,596 @@
+"""
+Engine and optimizer benchmarks that need no database.
+
+Builds a synthetic pool of real Card objects in memory, then times game simulation
+throughput, AI turn latency, reset GameStates against new ones, lookahead primitives,
+calculate_fitness end to end, GA generations, the batch engine against the object engine
+and worker memory with and without the shared card pool, all at fixed seeds. Results are written as JSON so runs can be compared:
+
+    python -m src.benchmark --output bench.json
+    python -m src.benchmark --compare bench.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from .game_engine import batch as batch_engine
+from .game_engine.card import Card, CardPool, compile_abilities, precompute_keywords
+from .game_engine.deck import Deck
+from .game_engine.game_state import GameState
+from .game_engine import solver
+from .optimizer import fitness as fitness_calculator
+from .optimizer.deck_generator import generate_random_deck, INK_COLORS
+from .optimizer.runner import run_ga
+
+KEYWORDS = ['evasive', 'rush', 'bodyguard', 'ward', 'reckless', 'resist +1', 'singer 5', 'challenger +2']
+
+# (section, metric, higher_is_better) pairs checked by --compare
+TRACKED_METRICS = [
+    ("game_throughput", "games_per_second", True),
+    ("ai_play_turn", "mean_us", False),
+    ("game_memory", "peak_kib_per_game", False),
+    ("game_reuse", "peak_kib_saved_per_game", True),
+    ("lookahead", "snapshot_restore_us", False),
+    ("lookahead", "clone_us", False),
+    ("calculate_fitness", "mean_seconds", False),
+    ("ga_generation", "mean_seconds", False),
+    ("batch_engine", "batch_games_per_second", True),
+    ("worker_memory", "rss_saved_kib_per_worker", True),
+]
+
+
+def _card_row(api_id, name, color, card_type, cost, strength=None, willpower=None, lore=None, move_cost=None, inkable=True):
+    """Returns a dict shaped like a row of the Cards table."""
+    return {
+        'id': api_id, 'name': name, 'color': color, 'cost': cost, 'inkable': inkable, 'type': card_type,
+        'strength': strength, 'willpower': willpower, 'lore': lore, 'move_cost': move_cost, 'text': '',
+        'set_name': 'Benchmark', 'set_id': 'BEN', 'rarity': 'Common', 'artist': '', 'image_url': '',
+        'api_id': api_id, 'ThreatScore': None,
+    }
+
+
+def _ability(effect, value, trigger='OnPlay'):
+    return {'ability_type': 'triggered', 'ability_text': '', 'trigger': trigger, 'effect': effect, 'value': str(value)}
+
+
+def build_card_pool(seed=0, cards_per_ink=30, vanilla=False):
+    """
+    Builds a synthetic CardPool keyed by api_id, like Card.load_all_cards.
+
+    Every ink gets characters (some with keywords and OnPlay abilities), actions, songs and
+    a location, so the benchmark exercises the same engine paths as real card data. With
+    `vanilla`, cards get no abilities other than keywords and there are no locations, so
+    every card is one the batch engine supports.
+    """
+    rng = random.Random(seed)
+    all_cards = {}
+    for color in INK_COLORS:
+        for i in range(cards_per_ink):
+            api_id = f"bench_{color.lower()}_{i}"
+            name = f"{color} Card {i}"
+            roll = rng.random()
+            if roll < 0.75:
+                cost = rng.randint(1, 8)
+                row = _card_row(api_id, name, color, 'Character', cost,
+                                strength=max(0, cost + rng.randint(-2, 1)), willpower=max(1, cost + rng.randint(-1, 2)),
+                                lore=rng.choice([1, 1, 2, 2, 3]), inkable=rng.random() < 0.8)
+            elif roll < 0.85:
+                row = _card_row(api_id, name, color, 'Action', rng.randint(1, 5))
+            elif roll < 0.93 or vanilla:
+                row = _card_row(api_id, name, color, 'Action - Song', rng.randint(2, 6))
+            else:
+                row = _card_row(api_id, name, color, 'Location', rng.randint(1, 4), willpower=rng.randint(5, 9),
+                                lore=rng.randint(1, 2), move_cost=rng.randint(1, 2))
+            card = Card(row)
+
+            if card.type == 'Character':
+                for keyword in rng.sample(KEYWORDS, rng.choice([0, 0, 1, 2])):
+                    card.keywords.add(keyword)
+                    card.parsed_abilities.append({'ability_type': 'keyword', 'ability_text': keyword,
+                                                  'trigger': None, 'effect': None, 'value': None})
+                if rng.random() < 0.15 and not vanilla:
+                    card.parsed_abilities.append(_ability('DrawCard', 1))
+            elif card.type in ('Action', 'Action - Song') and not vanilla:
+                if rng.random() < 0.5:
+                    card.parsed_abilities.append(_ability('DealDamage', rng.randint(1, 3)))
+                else:
+                    card.parsed_abilities.append(_ability('DrawCard', rng.randint(1, 2)))
+            compile_abilities(card)
+            precompute_keywords(card)
+            all_cards[api_id] = card
+    return CardPool(all_cards)
+
+
+def build_decks(all_cards, count, seed=0, name="Bench Deck"):
+    """Builds `count` legal random decks from the pool at a fixed seed."""
+    rng = random.Random(seed)
+    return [Deck(name=f"{name} {i}", cards=generate_random_deck(all_cards, rng)) for i in range(count)]
+
+
+def bench_game_throughput(all_cards, decks, games, seed):
+    """Times full GameState.run_simulation games over rotating deck pairs."""
+    turns = []
+    start = time.perf_counter()
+    for game_idx in range(games):
+        deck1, deck2 = decks[game_idx % len(decks)], decks[(game_idx + 1) % len(decks)]
+        game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=seed + game_idx,
+                         first_player_index=game_idx % 2)
+        game.run_simulation()
+        turns.append(game.current_turn)
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed > 0 else None,
+        "mean_turns": statistics.mean(turns),
+    }
+
+
+def bench_ai_play_turn(all_cards, decks, games, seed):
+    """Times every Player.ai_play_turn call over a set of games, driving the turn loop directly."""
+    latencies = []
+    score_evaluations = 0
+    for game_idx in range(games):
+        deck1, deck2 = decks[game_idx % len(decks)], decks[(game_idx + 1) % len(decks)]
+        game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=seed + game_idx)
+        game.start_game()
+        while not game.game_over and game.current_turn <= 20:
+            player = game.active_player
+            start = time.perf_counter()
+            player.ai_play_turn(game.opponent)
+            latencies.append(time.perf_counter() - start)
+            score_evaluations += player.score_evaluations
+            game.check_and_banish_characters()
+            game.next_turn()
+
+    latencies_us = sorted(latency * 1e6 for latency in latencies)
+    return {
+        "turns": len(latencies_us),
+        "mean_us": statistics.mean(latencies_us),
+        "p50_us": latencies_us[len(latencies_us) // 2],
+        "p95_us": latencies_us[int(len(latencies_us) * 0.95)],
+        "max_us": latencies_us[-1],
+        "score_evaluations_per_turn": score_evaluations / len(latencies_us),
+    }
+
+
+def bench_game_memory(all_cards, decks, games, seed):
+    """
+    Measures memory per game: the blocks and bytes still held by a finished GameState and
+    the traced peak while a game runs. Garbage is collected around each game, so leftovers
+    from the previous game (players and the game state reference each other) don't count.
+    """
+    def play(game_idx):
+        deck1, deck2 = decks[game_idx % len(decks)], decks[(game_idx + 1) % len(decks)]
+        game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=seed + game_idx)
+        game.run_simulation()
+        return game
+
+    retained_blocks = []
+    for game_idx in range(games):
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        game = play(game_idx)
+        gc.collect()
+        retained_blocks.append(sys.getallocatedblocks() - blocks_before)
+        del game
+
+    peaks = []
+    retained_bytes = []
+    tracemalloc.start()
+    try:
+        for game_idx in range(games):
+            gc.collect()
+            tracemalloc.reset_peak()
+            current_before = tracemalloc.get_traced_memory()[0]
+            game = play(game_idx)
+            peak = tracemalloc.get_traced_memory()[1]
+            gc.collect()
+            current_after = tracemalloc.get_traced_memory()[0]
+            retained_bytes.append(current_after - current_before)
+            peaks.append(peak - current_before)
+            del game
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "games": games,
+        "retained_blocks_per_game": statistics.mean(retained_blocks),
+        "retained_kib_per_game": statistics.mean(retained_bytes) / 1024,
+        "peak_kib_per_game": statistics.mean(peaks) / 1024,
+    }
+
+
+def bench_game_reuse(all_cards, decks, games, seed, rounds=3):
+    """
+    Plays the same games with a new GameState each ("fresh") and with one GameState reset
+    for each game ("reset", see GameState.reset), and measures per game the traced peak of
+    new allocations, the garbage collections the games trigger and the time they take, and
+    the wall time (the fastest of `rounds`). Also checks that both ways produce the same
+    winners and turn counts.
+    """
+    def pairs():
+        for game_idx in range(games):
+            deck1, deck2 = decks[game_idx % len(decks)], decks[(game_idx + 1) % len(decks)]
+            yield deck1.cards, deck2.cards, seed + game_idx, game_idx % 2
+
+    def fresh():
+        for deck1, deck2, game_seed, first in pairs():
+            game = GameState(deck1, deck2, all_cards, verbose=False, seed=game_seed, first_player_index=first)
+            game.run_simulation()
+            yield game
+
+    def reset():
+        game = GameState([], [], all_cards, verbose=False)
+        for deck1, deck2, game_seed, first in pairs():
+            game.reset(deck1, deck2, seed=game_seed, first_player_index=first)
+            game.run_simulation()
+            yield game
+
+    gc_seconds = [0.0]
+    gc_started = [0.0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            gc_started[0] = time.perf_counter()
+        else:
+            gc_seconds[0] += time.perf_counter() - gc_started[0]
+
+    modes = (("fresh", fresh), ("reset", reset))
+    results, outcomes = {}, {}
+    for mode, play in modes:
+        outcomes[mode] = [(game.players.index(game.winner) if game.winner else None, game.current_turn)
+                          for game in play()]
+        results[mode] = {"seconds": float("inf"), "gc_collections": 0, "gc_seconds": 0.0}
+
+    # Alternating rounds, keeping each mode's fastest, so the two see the same machine noise
+    for _ in range(rounds):
+        for mode, play in modes:
+            gc.collect()
+            collections_before = sum(stats["collections"] for stats in gc.get_stats())
+            gc_seconds[0] = 0.0
+            gc.callbacks.append(on_gc)
+            try:
+                start = time.perf_counter()
+                for _ in play():
+                    pass
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.callbacks.remove(on_gc)
+            if elapsed < results[mode]["seconds"]:
+                collections = sum(stats["collections"] for stats in gc.get_stats()) - collections_before
+                results[mode] = {"seconds": elapsed, "gc_collections": collections, "gc_seconds": gc_seconds[0]}
+
+    for mode, play in modes:
+        peaks = []
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            for _ in play():
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+        timed = results[mode]
+        results[mode] = {
+            "games_per_second": games / timed["seconds"] if timed["seconds"] > 0 else None,
+            "gc_collections_per_game": timed["gc_collections"] / games,
+            "gc_us_per_game": timed["gc_seconds"] / games * 1e6,
+            "peak_kib_per_game": statistics.mean(peaks) / 1024,
+        }
+
+    return {
+        "games": games,
+        "identical_outcomes": outcomes["fresh"] == outcomes["reset"],
+        **results,
+        "gc_us_saved_per_game": results["fresh"]["gc_us_per_game"] - results["reset"]["gc_us_per_game"],
+        "peak_kib_saved_per_game": results["fresh"]["peak_kib_per_game"] - results["reset"]["peak_kib_per_game"],
+        "speedup": (results["reset"]["games_per_second"] / results["fresh"]["games_per_second"]
+                    if results["fresh"]["games_per_second"] and results["reset"]["games_per_second"] else None),
+    }
+
+
+def bench_lookahead(all_cards, decks, games, seed):
+    """
+    Times the lookahead primitives at the start of every turn of a set of games: a
+    snapshot/restore round trip, a clone, listing the active player's legal moves, and a
+    Zobrist hash of the restored position (the worst case, with every character rehashed).
+    Turns from 10 lore on are also solved for maximum lore, for the solver's node rate.
+    """
+    snapshot_restore, clones, listings, hashes, move_counts = [], [], [], [], []
+    solver_nodes, solver_seconds = 0, 0.0
+    for game_idx in range(games):
+        deck1, deck2 = decks[game_idx % len(decks)], decks[(game_idx + 1) % len(decks)]
+        game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=seed + game_idx)
+        game.start_game()
+        while not game.game_over and game.current_turn <= 20:
+            start = time.perf_counter()
+            game.restore(game.snapshot())
+            snapshot_restore.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            game.zobrist_hash()
+            hashes.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            game.clone()
+            clones.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            legal = list(game.legal_moves())
+            listings.append(time.perf_counter() - start)
+            move_counts.append(len(legal))
+            if game.active_player.lore >= 10:
+                solution = solver.solve_turn(game, max_nodes=5000)
+                solver_nodes += solution.nodes
+                solver_seconds += solution.seconds
+
+            game.active_player.ai_play_turn(game.opponent)
+            game.end_turn()
+
+    return {
+        "positions": len(clones),
+        "snapshot_restore_us": statistics.mean(snapshot_restore) * 1e6,
+        "clone_us": statistics.mean(clones) * 1e6,
+        "legal_moves_us": statistics.mean(listings) * 1e6,
+        "zobrist_hash_us": statistics.mean(hashes) * 1e6,
+        "legal_moves_per_position": statistics.mean(move_counts),
+        "solver_nodes_per_second": solver_nodes / solver_seconds if solver_seconds else 0.0,
+    }
+
+
+def bench_calculate_fitness(all_cards, candidate, meta_decks, pool, repeats, seed):
+    """Times calculate_fitness end to end on a warm pool."""
+    timings = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        fitness_calculator.calculate_fitness(candidate.cards, meta_decks, all_cards, pool=pool, seed=seed + repeat)
+        timings.append(time.perf_counter() - start)
+    return {
+        "calls": repeats,
+        "games_per_matchup": fitness_calculator.GAMES_PER_MATCHUP,
+        "meta_decks": len(meta_decks),
+        "mean_seconds": statistics.mean(timings),
+        "min_seconds": min(timings),
+    }
+
+
+class _GenerationTimer:
+    """Stands in for run_ga's progress queue and timestamps every generation."""
+    def __init__(self):
+        self.timestamps = [time.perf_counter()]
+
+    def put(self, message):
+        if message.get("type") == "progress":
+            self.timestamps.append(time.perf_counter())
+
+
+def bench_ga_generation(all_cards, meta_decks, pool, generations, seed):
+    """Times GA generations (evaluation, selection and variation) at a fixed run seed."""
+    timer = _GenerationTimer()
+    # run_ga reports progress on stdout; keep stdout clean for the JSON output
+    with contextlib.redirect_stdout(sys.stderr):
+        run_ga(all_cards, meta_decks, num_generations=generations, progress_queue=timer, pool=pool, seed=seed)
+    durations = [later - earlier for earlier, later in zip(timer.timestamps, timer.timestamps[1:])]
+    return {
+        "generations": len(durations),
+        "mean_seconds": statistics.mean(durations) if durations else None,
+        "seconds_by_generation": durations,
+    }
+
+
+def bench_batch_engine(games, seed, processes, population=15, games_per_matchup=20):
+    """
+    Compares the batch engine with GameState on a vanilla pool (every card supported):
+    games/second, per-game agreement and outcome distributions, then the speedup of
+    calculate_fitness_batch (a GA generation's evaluation, without racing) on a warm pool.
+    """
+    all_cards = build_card_pool(seed, vanilla=True)
+    decks = build_decks(all_cards, 8, seed)
+    tasks = [(decks[i % len(decks)].cards, decks[(i + 1) % len(decks)].cards, seed + i, i % 2) for i in range(games)]
+
+    start = time.perf_counter()
+    object_results = []
+    for deck1, deck2, game_seed, first_player_index in tasks:
+        game = GameState(deck1, deck2, all_cards, verbose=False, seed=game_seed, first_player_index=first_player_index)
+        game.run_simulation()
+        winner = game.players.index(game.winner) if game.winner is not None else None
+        object_results.append((winner, game.current_turn))
+    object_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    winners, turns = batch_engine.play_games(tasks)
+    batch_seconds = time.perf_counter() - start
+    batch_results = list(zip(winners, turns))
+
+    candidates = [deck.cards for deck in build_decks(all_cards, population, seed + 2, name="Bench Candidate")]
+    meta_decks = build_decks(all_cards, 4, seed + 1, name="Bench Meta")
+    evaluation = {}
+    with fitness_calculator.create_worker_pool(all_cards, processes) as pool:
+        for batched in (False, True):
+            with _patched(fitness_calculator, BATCH_ENGINE=batched, GAMES_PER_MATCHUP=games_per_matchup):
+                start = time.perf_counter()
+                scores = fitness_calculator.calculate_fitness_batch(candidates, meta_decks, all_cards, pool=pool,
+                                                                    seed=seed, racing=False)
+                evaluation[batched] = (time.perf_counter() - start, scores)
+    ga_games = population * len(meta_decks) * games_per_matchup
+
+    def outcomes(results):
+        return {
+            "player1_win_rate": sum(winner == 0 for winner, _ in results) / len(results),
+            "mean_turns": statistics.mean(game_turns for _, game_turns in results),
+        }
+
+    return {
+        "games": games,
+        "object_games_per_second": games / object_seconds if object_seconds > 0 else None,
+        "batch_games_per_second": games / batch_seconds if batch_seconds > 0 else None,
+        "speedup": object_seconds / batch_seconds if batch_seconds > 0 else None,
+        "agreement": sum(a == b for a, b in zip(object_results, batch_results)) / games,
+        "object_outcomes": outcomes(object_results),
+        "batch_outcomes": outcomes(batch_results),
+        "ga_evaluation_games": ga_games,
+        "ga_object_games_per_second": ga_games / evaluation[False][0],
+        "ga_batch_games_per_second": ga_games / evaluation[True][0],
+        "ga_speedup": evaluation[False][0] / evaluation[True][0],
+        "ga_same_fitness": evaluation[False][1] == evaluation[True][1],
+    }
+
+
+@contextlib.contextmanager
+def _patched(module, **values):
+    """Temporarily sets module globals, e.g. fitness settings read from config.ini."""
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def bench_worker_memory(seed, processes, cards_per_ink=300, start_method='spawn', games=40):
+    """
+    Starts worker pools on a large pool of cards with and without the shared card pool and
+    reports how long the pool took to start and each worker's RSS, before and after playing
+    some games. Spawned workers (the default here) each unpickle a copy of the card map.
+    """
+    all_cards = build_card_pool(seed, cards_per_ink=cards_per_ink)
+    decks = build_decks(all_cards, 4, seed)
+    tasks = fitness_calculator._build_tasks([deck.cards for deck in decks[:2]], decks[2:], all_cards.table, seed, plan=[(0, 0, games // 2), (1, 1, games // 2)])
+    processes = processes or os.cpu_count()
+    results = {"cards": len(all_cards), "start_method": start_method, "processes": processes}
+    for shared in (False, True):
+        start = time.perf_counter()
+        with fitness_calculator.create_worker_pool(all_cards, processes, shared_cards=shared,
+                                                   start_method=start_method) as pool:
+            started = _worker_reports(pool, processes)
+            startup_seconds = time.perf_counter() - start
+            pool.map(fitness_calculator.run_single_game, tasks)
+            played = _worker_reports(pool, processes)
+        results["shared" if shared else "copied"] = {
+            "pool_startup_seconds": startup_seconds,
+            "mean_rss_kib_at_start": statistics.mean(r["rss_kib"] for r in started.values()),
+            "mean_rss_kib_after_games": statistics.mean(r["rss_kib"] for r in played.values()),
+            "mean_cards_loaded": statistics.mean(r["cards_loaded"] for r in played.values()),
+        }
+    results["rss_saved_kib_per_worker"] = (results["copied"]["mean_rss_kib_after_games"]
+                                           - results["shared"]["mean_rss_kib_after_games"])
+    return results
+
+
+def _worker_reports(pool, processes):
+    """Collects worker_memory_report from (ideally) every worker, keyed by pid."""
+    reports = {}
+    for _ in range(5):
+        for report in pool.map(fitness_calculator.worker_memory_report, range(processes * 4), chunksize=1):
+            reports[report["pid"]] = report
+        if len(reports) >= processes:
+            break
+    return reports
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(seed=0, games=200, fitness_repeats=3, generations=3, processes=None, quick=False):
+    """Runs every benchmark and returns the results as a JSON-ready dict."""
+    if quick:
+        games, fitness_repeats, generations = 20, 1, 1
+
+    all_cards = build_card_pool(seed)
+    decks = build_decks(all_cards, 8, seed)
+    meta_decks = build_decks(all_cards, 4, seed + 1, name="Bench Meta")
+
+    results = {
+        "game_throughput": bench_game_throughput(all_cards, decks, games, seed),
+        "ai_play_turn": bench_ai_play_turn(all_cards, decks, max(1, games // 4), seed),
+        "game_memory": bench_game_memory(all_cards, decks, max(1, games // 4), seed),
+        "game_reuse": bench_game_reuse(all_cards, decks, games, seed),
+        "lookahead": bench_lookahead(all_cards, decks, max(1, games // 4), seed),
+    }
+    with fitness_calculator.create_worker_pool(all_cards, processes) as pool:
+        results["calculate_fitness"] = bench_calculate_fitness(all_cards, decks[0], meta_decks, pool, fitness_repeats, seed)
+        results["ga_generation"] = bench_ga_generation(all_cards, meta_decks, pool, generations, seed)
+    results["batch_engine"] = bench_batch_engine(games, seed, processes)
+    results["worker_memory"] = bench_worker_memory(seed, processes)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "processes": processes,
+            "seed": seed,
+            "cards": len(all_cards),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Prints each tracked metric against a baseline run. Returns the metrics that regressed."""
+    regressions = []
+    for section, metric, higher_is_better in TRACKED_METRICS:
+        new = current["results"].get(section, {}).get(metric)
+        old = baseline["results"].get(section, {}).get(metric)
+        if not new or not old:
+            continue
+        ratio = new / old
+        regressed = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+        if regressed:
+            regressions.append(f"{section}.{metric}")
+        print(f"  {section}.{metric}: {old:.4g} -> {new:.4g} ({ratio:.2f}x){' REGRESSION' if regressed else ''}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game engine and optimizer without a database.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--games", type=int, default=200, help="games for the throughput benchmark")
+    parser.add_argument("--fitness-repeats", type=int, default=3)
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--quick", action="store_true", help="tiny run, for checking the benchmark itself")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before --compare fails")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.seed, args.games, args.fitness_repeats, args.generations, args.processes, args.quick)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:", file=sys.stderr)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,6 +21,19 @@ def clear_deck_data():
         if conn:
             conn.close()
 
+def create_fitness_cache_table(cursor):
+    """Creates the Fitness_Cache table if it doesn't exist (also used by the optimizer's FitnessCache)."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS Fitness_Cache (
+        deck_key TEXT NOT NULL, -- Order-independent hash of the decklist
+        meta_signature TEXT NOT NULL, -- Hash of the meta and simulation settings the games were played under
+        meta_deck_name TEXT NOT NULL,
+        wins INTEGER NOT NULL,
+        games INTEGER NOT NULL,
+        PRIMARY KEY (deck_key, meta_signature, meta_deck_name)
+    )
+    ''')
+
 def create_database():
     """Creates the SQLite database and the required tables if they don't exist."""
     print(f"Ensuring database exists at: {DB_PATH}")
@@ -101,6 +114,9 @@ def create_database():
     )
     ''')
 
+    # Create Fitness_Cache table (simulated results reused across optimizer runs)
+    create_fitness_cache_table(cursor)
+
     conn.commit()
     conn.close()
     print("Database and tables created successfully.")
@@ -1,51 +1,41 @@
 # This module contains the functions that execute the game logic for parsed card abilities.
+from . import events
+
 
 class AbilityResolver:
     @staticmethod
     def resolve_ability(ability, source_card, owner, target=None):
-        """Central function to resolve any given ability.""""""Central function to resolve any given ability."""
-        effect = ability['effect']
-        value = ability['value']
-
-        if owner.game_state.verbose:
-            print(f"RESOLVING ABILITY: {effect}({value}) for {owner.name} from card {source_card.name}")
+        """Central function to resolve any given compiled Ability, dispatching on its effect."""
+        log = owner.log
+        if log:
+            log.emit(events.AbilityResolved(owner.name, source_card.name, ability.effect, ability.value))
 
-        if effect == 'DrawCard':
-            AbilityResolver.resolve_draw_card(owner, int(value))
-        elif effect == 'DealDamage':
-            if target:
-                AbilityResolver.resolve_deal_damage(target, int(value), owner.game_state.verbose)
-            else:
-                if owner.game_state.verbose:
-                    print(f"Warning: DealDamage effect requires a target, but none was provided.")
-        elif effect == 'GainLore':
-            AbilityResolver.resolve_gain_lore(owner, int(value))
-        # More effects will be added here
-        else:
-            if owner.game_state.verbose:
-                print(f"Warning: Unknown ability effect '{effect}' encountered.")
+        handler = EFFECT_HANDLERS.get(ability.effect)
+        if handler is None:
+            if log:
+                log.emit(events.EffectWarning(f"Unknown ability effect '{ability.effect}' encountered."))
+            return
+        handler(ability, owner, target, log)
 
     @staticmethod
     def resolve_draw_card(player, num_cards):
         """Resolves the DrawCard effect."""
-        if player.game_state.verbose:
-            print(f"  -> {player.name} draws {num_cards} card(s).")
+        if player.log:
+            player.log.emit(events.CardsDrawn(player.name, num_cards))
         player.draw_card(num_cards)
 
     @staticmethod
-    def resolve_deal_damage(target_character, damage_amount, verbose=False):
-        """Resolves the DealDamage effect.""""""Resolves the DealDamage effect."""
-        if verbose:
-            print(f"  -> Dealing {damage_amount} damage to {target_character.card.name}.")
+    def resolve_deal_damage(target_character, damage_amount, log=None):
+        """Resolves the DealDamage effect."""
         target_character.damage += damage_amount
-        if target_character.is_banished and verbose:
-            print(f"    -> {target_character.card.name} was banished!")
+        if log:
+            log.emit(events.DamageDealt(target_character.card.name, damage_amount, target_character.is_banished))
 
     @staticmethod
     def resolve_gain_lore(player, lore_amount):
-        """Resolves the GainLore effect.""""""Resolves the GainLore effect."""
-        if player.game_state.verbose:
-            print(f"  -> {player.name} gains {lore_amount} lore.")
+        """Resolves the GainLore effect."""
+        if player.log:
+            player.log.emit(events.LoreGained(player.name, lore_amount))
         player.lore += lore_amount
 
     @staticmethod
@@ -55,10 +45,31 @@ class AbilityResolver:
             return True  # No target is a valid state
 
         # Ward Check: Opponent's effects cannot target a character with Ward.
-        if hasattr(target, 'card') and 'ward' in target.card.keywords and target.owner != source_card_owner:
-            if source_card_owner.game_state.verbose:
-                print(f"INVALID TARGET: {target.card.name} has Ward and cannot be targeted by {source_card_owner.name}.")
+        if hasattr(target, 'card') and target.card.has_ward and target.owner != source_card_owner:
+            if source_card_owner.log:
+                source_card_owner.log.emit(events.InvalidTarget(target.card.name, source_card_owner.name))
             return False
 
         # Future checks for other targeting restrictions can be added here.
         return True
+
+
+def _draw_card(ability, owner, target, log):
+    AbilityResolver.resolve_draw_card(owner, ability.value)
+
+def _deal_damage(ability, owner, target, log):
+    if target:
+        AbilityResolver.resolve_deal_damage(target, ability.value, log)
+    elif log:
+        log.emit(events.EffectWarning("DealDamage effect requires a target, but none was provided."))
+
+def _gain_lore(ability, owner, target, log):
+    AbilityResolver.resolve_gain_lore(owner, ability.value)
+
+# Effect name -> handler(ability, owner, target, log), where log is the game's event sink or None.
+# New effects only need an entry here.
+EFFECT_HANDLERS = {
+    'DrawCard': _draw_card,
+    'DealDamage': _deal_damage,
+    'GainLore': _gain_lore,
+}
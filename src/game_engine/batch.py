@@ -0,0 +1,430 @@
+"""
+This module plays many games at once in lockstep: the games' hands, inkwells, boards, lore
+and damage are NumPy arrays, and every step plays one turn of every unfinished game with
+vectorized versions of the greedy AI's decisions (Player.ai_play_turn).
+
+Only decks made of supported cards (see is_supported) can be batched: characters whose
+only abilities are keywords, and actions with no effects, which the greedy AI only ever
+inks. Everything else, e.g. locations, Shift, or abilities that draw, deal damage or gain
+lore, needs the object engine; callers check decks with deck_is_supported and play the
+other games with GameState.
+
+For supported decks a batched game is the same game GameState plays from the same seed:
+decks are shuffled by the same random streams, and the AI's choices, ties included, are
+made in the same order, so the winner and length of every game match run_simulation.
+Games aren't adjudicated, which only changes when a decided game stops.
+"""
+import functools
+import random
+
+import numpy as np
+
+from .ability_resolver import EFFECT_HANDLERS
+from .player import Player
+
+# Effects that change play (the resolver's) or the AI's choice of plays (BanishCharacter)
+MODELLED_EFFECTS = frozenset(EFFECT_HANDLERS) | {'BanishCharacter'}
+SUPPORTED_TYPES = ('Character', 'Action', 'Action - Song')
+# A hand or board never holds more than the opening hand plus a draw at every turn start
+ZONE_SIZE = 7 + 21
+# Challenge score for targets that can't be chosen, below any real score
+NO_TARGET = -(1 << 30)
+
+
+def is_supported(card):
+    """Whether the batch engine plays `card` exactly like the object engine does."""
+    if card.type not in SUPPORTED_TYPES:
+        return False
+    if card.type == 'Character' and card.shift_cost is not None:
+        return False
+    return not any(ability.effect in MODELLED_EFFECTS for ability in card.abilities)
+
+
+def deck_is_supported(cards):
+    """Whether every card of a decklist is supported, so its games can be batched."""
+    return all(is_supported(card) for card in cards)
+
+
+# The per-card arrays of a _CardTable
+CARD_COLUMNS = ('cost', 'strength', 'willpower', 'lore', 'inkable', 'character', 'value', 'threat', 'challenger',
+                'resist', 'supported', 'rush', 'evasive', 'ward', 'bodyguard', 'reckless')
+
+
+class _CardTable:
+    """
+    The numbers the rules and the AI read from each distinct card of a batch, by index.
+    `columns` rebuilds a table from card_columns() arrays (e.g. views of shared memory).
+    """
+
+    def __init__(self, cards=(), columns=None):
+        if columns is not None:
+            for name in CARD_COLUMNS:
+                setattr(self, name, columns[name])
+            self.empty = len(self.cost) - 1
+            return
+        # The last index is an empty slot: a card worth nothing that no rule picks
+        count = len(cards) + 1
+        self.cost = np.zeros(count, dtype=np.int64)
+        self.strength = np.zeros(count, dtype=np.int64)
+        self.willpower = np.full(count, np.inf)
+        self.lore = np.zeros(count, dtype=np.int64)
+        self.inkable = np.zeros(count, dtype=bool)
+        self.character = np.zeros(count, dtype=bool)
+        self.value = np.zeros(count, dtype=np.int64)  # The AI's score for the card's stats and keywords
+        self.threat = np.zeros(count, dtype=np.int64)  # Strength + lore, as Board.threat counts it
+        self.challenger = np.zeros(count, dtype=np.int64)
+        self.resist = np.zeros(count, dtype=np.int64)
+        self.supported = np.zeros(count, dtype=bool)
+        for flag in ('rush', 'evasive', 'ward', 'bodyguard', 'reckless'):
+            setattr(self, flag, np.zeros(count, dtype=bool))
+
+        for index, card in enumerate(cards):
+            self.supported[index] = is_supported(card)
+            if not self.supported[index]:
+                continue  # Never played here, and may lack the numbers below
+            strength, willpower, lore = card.strength or 0, card.willpower or 0, card.lore or 0
+            self.cost[index] = card.cost
+            self.strength[index] = strength
+            if card.willpower is not None:
+                self.willpower[index] = card.willpower
+            self.lore[index] = lore
+            self.inkable[index] = bool(card.inkable)
+            self.character[index] = card.type == 'Character'
+            self.value[index] = strength + willpower + lore + 2 * card.has_evasive + 3 * card.has_ward
+            self.threat[index] = strength + lore
+            self.challenger[index] = card.challenger
+            self.resist[index] = card.resist
+            for flag in ('rush', 'evasive', 'ward', 'bodyguard', 'reckless'):
+                getattr(self, flag)[index] = getattr(card, f"has_{flag}")
+        self.empty = count - 1
+
+
+def card_columns(cards):
+    """The batch engine's per-card arrays for a list of cards, by name (see CARD_COLUMNS)."""
+    table = _CardTable(cards)
+    return {name: getattr(table, name) for name in CARD_COLUMNS}
+
+
+@functools.lru_cache(maxsize=4)
+def _pool_arrays(table):
+    """
+    The _CardTable of a whole pool's CardTable, built once per table and process, or
+    read from the table's `batch_columns` if it carries them (see shared_cards).
+    """
+    columns = getattr(table, 'batch_columns', None)
+    return _CardTable(columns=columns) if columns is not None else _CardTable(table.cards)
+
+
+def deck_indices_supported(table, indices):
+    """Whether every card of a decklist, given as indices into `table`, is supported."""
+    return bool(_pool_arrays(table).supported[indices].all())
+
+
+class BatchGames:
+    """
+    N games as arrays, indexed [game, player, slot]. Hands and boards are kept in order
+    (hand order and play order) with empty slots at the end, like the lists they model.
+
+    `games` is a list of (player1_deck, player2_deck, seed, first_player_index), with the
+    same meaning as for GameState. Every card must be supported (see is_supported). With
+    `table` (the pool's CardTable), decks are lists of card indices instead of cards.
+    `lethal_search` is GameState's: the AI takes a winning line when it has one.
+    """
+
+    def __init__(self, games, table=None, lethal_search=False):
+        self.lethal_search = lethal_search
+        if table is None:
+            index = {}
+            for deck1, deck2, _, _ in games:
+                for card in (*deck1, *deck2):
+                    if card not in index:
+                        if not is_supported(card):
+                            raise ValueError(f"The batch engine doesn't support {card.name!r}.")
+                        index[card] = len(index)
+            self.cards = _CardTable(list(index))
+        else:
+            # Decks are already card indices, into the pool's table
+            index = None
+            self.cards = _pool_arrays(table)
+        empty = self.cards.empty
+
+        n = len(games)
+        deck_size = max([len(deck) for deck1, deck2, _, _ in games for deck in (deck1, deck2)] or [0])
+        zone = max(1, min(deck_size, ZONE_SIZE))
+        self.n = n
+        self.games = np.arange(n)
+        self.deck = np.full((n, 2, max(1, deck_size)), empty, dtype=np.int64)
+        self.deck_size = np.zeros((n, 2), dtype=np.int64)
+        self.deck_position = np.zeros((n, 2), dtype=np.int64)
+        self.first_player = np.zeros(n, dtype=np.int64)
+        indexed = {}  # Decklists as card indices, as games usually share decklists
+        for game, (deck1, deck2, seed, first_player_index) in enumerate(games):
+            # The same shuffles as GameState: one stream per player, drawn from the game's RNG.
+            # A shuffle's permutation only depends on the stream and the deck size.
+            rng = random.Random(seed)
+            for player, deck in enumerate((deck1, deck2)):
+                if id(deck) not in indexed:
+                    if index is not None:
+                        indexed[id(deck)] = [index[card] for card in deck]
+                    elif not self.cards.supported[deck].all():
+                        raise ValueError("The batch engine doesn't support every card of a deck.")
+                    else:
+                        indexed[id(deck)] = list(deck)
+                order = indexed[id(deck)][:]
+                random.Random(rng.getrandbits(64)).shuffle(order)
+                self.deck[game, player, :len(order)] = order
+                self.deck_size[game, player] = len(order)
+            self.first_player[game] = first_player_index
+
+        self.hand = np.full((n, 2, zone), empty, dtype=np.int64)
+        self.hand_size = np.zeros((n, 2), dtype=np.int64)
+        self.board = np.full((n, 2, zone), empty, dtype=np.int64)
+        self.board_size = np.zeros((n, 2), dtype=np.int64)
+        self.damage = np.zeros((n, 2, zone), dtype=np.int64)
+        self.exerted = np.zeros((n, 2, zone), dtype=bool)
+        self.newly_played = np.zeros((n, 2, zone), dtype=bool)
+        self.ink_ready = np.zeros((n, 2), dtype=np.int64)
+        self.ink_exerted = np.zeros((n, 2), dtype=np.int64)
+        self.lore = np.zeros((n, 2), dtype=np.int64)
+        self.has_lost = np.zeros((n, 2), dtype=bool)
+        self.active = self.first_player.copy()
+        self.turn = np.zeros(n, dtype=np.int64)
+        self.over = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, -1, dtype=np.int64)
+
+    def run(self):
+        """Plays every game to the end. Returns the winners (0, 1, or -1 for a draw) and final turns."""
+        self._start()
+        while True:
+            live = ~self.over & (self.turn <= 20)
+            if not live.any():
+                break
+            self._play_turn(np.flatnonzero(live))
+            self._end_turn(live)
+        self._end_at_turn_limit()
+        return self.winner, self.turn
+
+    # --- Turn structure (GameState) ---
+
+    def _start(self):
+        for player in (0, 1):
+            self._draw(np.ones(self.n, dtype=bool), np.full(self.n, player), 7, lose=False)
+        self.turn[:] = 1
+        self._turn_phases(np.ones(self.n, dtype=bool))
+
+    def _draw(self, mask, players, count, lose=True):
+        """Draws `count` cards for `players` in the games in `mask`; an empty deck loses the game if `lose`."""
+        games = self.games[mask]
+        players = players[mask]
+        for _ in range(count):
+            position = self.deck_position[games, players]
+            has_card = position < self.deck_size[games, players]
+            if lose:
+                self.has_lost[games[~has_card], players[~has_card]] = True
+            games, players, position = games[has_card], players[has_card], position[has_card]
+            self.hand[games, players, self.hand_size[games, players]] = self.deck[games, players, position]
+            self.hand_size[games, players] += 1
+            self.deck_position[games, players] += 1
+
+    def _turn_phases(self, mask):
+        """Readies the active player's ink and characters, draws their card and checks for a winner."""
+        games, active = self.games[mask], self.active[mask]
+        self.ink_ready[games, active] += self.ink_exerted[games, active]
+        self.ink_exerted[games, active] = 0
+        self.exerted[games, active] = False
+        self.newly_played[games, active] = False
+        self._draw(mask, self.active, 1)
+        self._check_for_winner(mask)
+
+    def _check_for_winner(self, mask):
+        """Ends the games in `mask` where a player reached 20 lore or lost, checking player 1 first."""
+        mask = mask & ~self.over
+        lore, lost = self.lore >= 20, self.has_lost
+        winner = np.select([lore[:, 0], lost[:, 0], lore[:, 1], lost[:, 1]], [0, 1, 1, 0], -1)
+        ended = mask & (winner >= 0)
+        self.winner[ended] = winner[ended]
+        self.over |= ended
+
+    def _end_turn(self, mask):
+        """Banishes defeated characters, then starts the next player's turn."""
+        self._banish(mask)
+        self._check_for_winner(mask)
+        mask = mask & ~self.over
+        self.active[mask] = 1 - self.active[mask]
+        self.turn[mask] += self.active[mask] == self.first_player[mask]
+        self._turn_phases(mask)
+
+    def _end_at_turn_limit(self):
+        """Decides the games still undecided at the turn limit by lore (a tie is a draw)."""
+        undecided = ~self.over
+        lore = self.lore
+        self.winner[undecided] = np.select([lore[undecided, 0] > lore[undecided, 1], lore[undecided, 1] > lore[undecided, 0]],
+                                           [0, 1], -1)
+        self.over[:] = True
+
+    def _banish(self, mask):
+        """Removes characters whose damage reached their willpower from both boards, keeping play order."""
+        cards = self.cards
+        width = max(1, int(self.board_size.max()))
+        board, damage = self.board[:, :, :width], self.damage[:, :, :width]
+        banished = (board != cards.empty) & (cards.willpower[board] - damage <= 0) & mask[:, None, None]
+        rows = np.flatnonzero(banished.any(axis=(1, 2)))
+        if not len(rows):
+            return
+        board, damage, banished = board[rows], damage[rows], banished[rows]
+        keep = (board != cards.empty) & ~banished
+        order = np.argsort(~keep, axis=2, kind='stable')
+        self.board[rows, :, :width] = np.where(np.take_along_axis(keep, order, 2), np.take_along_axis(board, order, 2),
+                                               cards.empty)
+        self.damage[rows, :, :width] = np.take_along_axis(damage * keep, order, 2)
+        self.exerted[rows, :, :width] = np.take_along_axis(self.exerted[rows, :, :width] & keep, order, 2)
+        self.newly_played[rows, :, :width] = np.take_along_axis(self.newly_played[rows, :, :width] & keep, order, 2)
+        self.board_size[rows] = keep.sum(axis=2)
+
+    # --- The greedy AI (Player.ai_play_turn) ---
+
+    def _play_turn(self, rows):
+        """
+        Plays the active player's main phase in the games `rows`. Only those games' rows are
+        gathered, and hands and the opposing boards only up to their longest, since the
+        cost of every step grows with the width of the arrays.
+        """
+        cards, empty = self.cards, self.cards.empty
+        me, them = self.active[rows], 1 - self.active[rows]
+        hand_width = max(1, int(self.hand_size[rows, me].max()))
+        opponent_width = max(1, int(self.board_size[rows, them].max()))
+        # Room for the board to take every card in hand
+        width = min(self.board.shape[2], int(self.board_size[rows, me].max()) + hand_width)
+        hand = self.hand[rows, me, :hand_width]
+        board, board_size = self.board[rows, me, :width], self.board_size[rows, me]
+        damage, exerted = self.damage[rows, me, :width], self.exerted[rows, me, :width]
+        newly_played = self.newly_played[rows, me, :width]
+        opponent_board = self.board[rows, them, :opponent_width]
+        opponent_damage = self.damage[rows, them, :opponent_width]
+        lore, opponent_lore = self.lore[rows, me], self.lore[rows, them]
+        ink_ready, ink_exerted = self.ink_ready[rows, me], self.ink_exerted[rows, me]
+        games = np.arange(len(rows))
+
+        # Lethal first: every character is ready and dry, so only questing can add lore
+        if self.lethal_search:
+            lethal = (lore >= Player.LETHAL_CHECK_LORE) & (lore + cards.lore[board].sum(axis=1) >= 20)
+        else:
+            lethal = np.zeros(len(rows), dtype=bool)
+        self.winner[rows[lethal]] = me[lethal]
+        self.over[rows[lethal]] = True
+        acting = ~lethal
+
+        # Ink the lowest scoring inkable card (ties: the costlier, then the first in hand)
+        opponent_threat = cards.threat[opponent_board].sum(axis=1)
+        values = self._character_values(hand, board_size, board, opponent_threat)
+        ink_scores = np.where(cards.character[hand], np.where(values > 0, values, 0.0), 1.0)
+        inkable = cards.inkable[hand] & (hand != empty)
+        ink_scores = np.where(inkable, ink_scores, np.inf)
+        lowest = ink_scores == ink_scores.min(axis=1, keepdims=True)
+        costs = np.where(lowest & inkable, cards.cost[hand], -1)
+        slot = np.argmax(lowest & inkable & (costs == costs.max(axis=1, keepdims=True)), axis=1)
+        inks = acting & inkable.any(axis=1)
+        ink_ready += inks
+        # Cards leave a gap in the hand, closed once the main phase is over
+        hand[games[inks], slot[inks]] = empty
+
+        # Play the best scoring character while one scores above 1 (actions never do)
+        playing = acting.copy()
+        while True:
+            values = self._character_values(hand, board_size, board, opponent_threat)
+            costs = cards.cost[hand]
+            scores = np.where(values > 0, values / (costs + 1), 0.0)
+            affordable = cards.character[hand] & (costs <= ink_ready[:, None])
+            scores = np.where(affordable, scores, -np.inf)
+            slot = np.argmax(scores, axis=1)
+            playing &= scores[games, slot] > 1.0
+            if not playing.any():
+                break
+            card = hand[games, slot]
+            cost = np.where(playing, cards.cost[card], 0)
+            ink_ready -= cost
+            ink_exerted += cost
+            played = games[playing]
+            position = board_size[playing]
+            board[played, position] = card[playing]
+            damage[played, position] = 0
+            # Bodyguard enters exerted when other characters are in play
+            exerted[played, position] = cards.bodyguard[card[playing]] & (position > 0)
+            newly_played[played, position] = True
+            board_size += playing
+            hand[played, slot[playing]] = empty
+
+        # Each character ready at the start of this phase challenges or quests, in play order
+        desperate = opponent_lore >= 10
+        targets = (opponent_board != empty) & self.exerted[rows, them, :opponent_width]
+        target_strength = cards.strength[opponent_board]
+        target_lore = cards.lore[opponent_board]
+        for position in range(int(board_size[acting].max(initial=0))):
+            card = board[:, position]
+            ready = acting & (position < board_size) & ~exerted[:, position]
+            if not ready.any():
+                continue
+            strength, card_lore = cards.strength[card], cards.lore[card]
+            remaining = cards.willpower[card] - damage[:, position]
+            can_challenge = ready & (~newly_played[:, position] | cards.rush[card])
+
+            can_banish = strength[:, None] >= cards.willpower[opponent_board] - opponent_damage
+            will_be_banished = target_strength >= remaining[:, None]
+            scores = np.where(
+                desperate[:, None],
+                np.where(can_banish & (target_lore > 0), 100 + target_lore, 0),
+                np.where(can_banish & (target_lore >= 2), 20 + target_lore + 5 * ~will_be_banished,
+                         np.where(can_banish & ~will_be_banished, 15 + target_lore,
+                                  np.where(can_banish, 10 + target_lore - card_lore[:, None], 0))))
+            scores = np.where(targets & can_challenge[:, None], scores, NO_TARGET)
+            target = np.argmax(scores, axis=1)
+            best = scores[games, target]
+            best = np.where(best > -1, best, -1)  # Only scores above -1 pick a target
+
+            reckless = ready & cards.reckless[card] & (best > -1)
+            threshold = np.where(desperate, 50, card_lore + 2)
+            challenges = reckless | (ready & (best > threshold))
+            quests = ready & ~challenges & ~newly_played[:, position] & ~(desperate & (best > 0))
+
+            # A challenge of an Evasive character without Evasive fails, and the character does nothing
+            target_card = opponent_board[games, target]
+            challenges &= ~cards.evasive[target_card] | cards.evasive[card]
+            dealt = np.maximum(0, strength + cards.challenger[card] - cards.resist[target_card])
+            opponent_damage[games, target] += np.where(challenges, dealt, 0)
+            damage[:, position] += np.where(challenges, cards.strength[target_card], 0)
+            lore += np.where(quests, card_lore, 0)
+            exerted[:, position] |= challenges | quests
+
+        kept = hand != empty
+        hand = np.take_along_axis(hand, np.argsort(~kept, axis=1, kind='stable'), axis=1)
+        self.hand[rows, me, :hand_width], self.hand_size[rows, me] = hand, kept.sum(axis=1)
+        self.board[rows, me, :width], self.board_size[rows, me] = board, board_size
+        self.damage[rows, me, :width], self.exerted[rows, me, :width] = damage, exerted
+        self.newly_played[rows, me, :width] = newly_played
+        self.damage[rows, them, :opponent_width] = opponent_damage
+        self.lore[rows, me] = lore
+        self.ink_ready[rows, me], self.ink_exerted[rows, me] = ink_ready, ink_exerted
+
+    def _character_values(self, hand, board_size, board, opponent_threat):
+        """
+        Player._evaluate_play's value of every card in hand as a character, before dividing
+        by cost. Every term but Bodyguard's last one is a multiple of 0.5, so their sum is
+        exact in any order, and that term is added last, as there: the floats are identical.
+        """
+        cards = self.cards
+        has_high_lore = (cards.lore[board] >= 2).any(axis=1)[:, None]
+        bodyguard = cards.bodyguard[hand]
+        values = cards.value[hand] + 2 * (board_size == 0)[:, None] + 4 * (bodyguard & has_high_lore)
+        values = values + (1 + cards.rush[hand]) * (opponent_threat * 0.5)[:, None]
+        return values + bodyguard * (opponent_threat * 0.3)[:, None]
+
+
+def play_games(games, table=None, lethal_search=False):
+    """
+    Plays a batch of games (see BatchGames) to the end. Returns each game's winner as a
+    player index (0, 1, or None for a draw) and final turn, in order.
+    """
+    if not games:
+        return [], []
+    winners, turns = BatchGames(games, table, lethal_search).run()
+    return [int(w) if w >= 0 else None for w in winners], turns.tolist()
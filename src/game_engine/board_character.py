@@ -1,22 +1,72 @@
+from .zobrist import character_key
+
+
 class BoardCharacter:
     """Represents a character or location card that is in play on the board."""
+    __slots__ = ('card', 'owner', '_damage', '_exerted', 'is_newly_played', 'temp_strength_boost', '_location', 'board',
+                 'zobrist')
+
     def __init__(self, card, owner):
         if card.type not in ('Character', 'Location'):
             raise ValueError("Only character or location cards can be in play.")
         self.card = card
         self.owner = owner
-        self.damage = 0
-        self.is_exerted = False
+        self._damage = 0
+        self._exerted = False
         # This flag is true for the turn the character is played.
         # It prevents questing/challenging unless the character has Rush.
         self.is_newly_played = True
         self.temp_strength_boost = 0
-        self.location = None # None if not at a location, otherwise reference to location
+        self._location = None # None if not at a location, otherwise reference to location
+        self.board = None  # The Board this character is in, which indexes it while in play
+        self.zobrist = 0  # This character's share of its Board's hash, as last computed
+
+    # Exertion, damage and location are properties so that every change, including direct
+    # assignment, keeps the owning Board's indexes and hash up to date.
+
+    @property
+    def is_exerted(self):
+        return self._exerted
+
+    @is_exerted.setter
+    def is_exerted(self, value):
+        if value != self._exerted:
+            self._exerted = value
+            if self.board is not None:
+                self.board.changed()
+                self.board.stale[self] = None
+
+    @property
+    def damage(self):
+        return self._damage
+
+    @damage.setter
+    def damage(self, value):
+        self._damage = value
+        if self.board is not None:
+            self.board.version += 1
+            self.board.stale[self] = None
+            if self.is_banished:
+                self.board.pending_banish[self] = None
+
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, value):
+        if self.board is not None:
+            if self._location is not None:
+                self._location.occupants -= 1
+            if value is not None:
+                value.occupants += 1
+            self.board.stale[self] = None
+        self._location = value
 
     @property
     def is_ready(self):
         """A character is ready if it is not exerted."""
-        return not self.is_exerted
+        return not self._exerted
 
     def exert(self):
         """Exerts the character."""
@@ -24,15 +74,20 @@ class BoardCharacter:
 
     def ready(self):
         """Readies the character at the start of the turn."""
-        self.is_exerted = False
+        was_exerted = self._exerted
+        self._exerted = False
         self.is_newly_played = False
         self.temp_strength_boost = 0
+        if self.board is not None:
+            if was_exerted:
+                self.board.changed()
+            self.board.stale[self] = None
 
     @property
     def remaining_willpower(self):
         if self.card.willpower is None:
             return float('inf')
-        return self.card.willpower - self.damage
+        return self.card.willpower - self._damage
 
     @property
     def strength(self):
@@ -46,38 +101,132 @@ class BoardCharacter:
 
     @property
     def resist_value(self):
-        """Parses the 'Resist +X' keyword and returns the value of X."""
-        for keyword in self.card.keywords:
-            if keyword.lower().startswith('resist'):
-                try:
-                    # e.g., "resist +2" -> "2"
-                    value = int(keyword.split('+')[1].strip())
-                    return value
-                except (IndexError, ValueError):
-                    continue  # Ignore malformed resist tags
-        return 0
+        """The X of the card's 'Resist +X' keyword, or 0."""
+        return self.card.resist
 
     @property
     def singer_value(self):
-        """Parses the 'Singer X' keyword and returns the value of X."""
-        for keyword in self.card.keywords:
-            if keyword.lower().startswith('singer'):
-                try:
-                    # e.g., "singer 3" -> "3"
-                    value = int(keyword.split(' ')[1])
-                    return value
-                except (IndexError, ValueError):
-                    continue
-        return 0
+        """The X of the card's 'Singer X' keyword, or 0."""
+        return self.card.singer
 
     def can_quest(self):
         """A character can quest if it's ready and its ink isn't drying (not newly played)."""
-        return self.is_ready and not self.is_newly_played and self.location is None
+        return not self._exerted and not self.is_newly_played and self._location is None
 
     def can_challenge(self):
         """A character can challenge if it's ready and not newly played, unless it has Rush."""
-        has_rush = 'rush' in self.card.keywords
-        return self.is_ready and (not self.is_newly_played or has_rush)
+        return not self._exerted and (not self.is_newly_played or self.card.has_rush)
 
     def __repr__(self):
         return f"BoardCharacter(name='{self.card.name}', str={self.strength}, will={self.remaining_willpower}/{self.card.willpower}, exerted={self.is_exerted})"
+
+
+class Board(list):
+    """
+    A player's characters in play, in play order, with indexes the AI reads every turn:
+    cached ready/exerted views, a running threat total, a queue of characters whose
+    damage has reached their willpower, and a running Zobrist hash (see zobrist_hash).
+    Characters must be added and removed with append/remove/clear; their own setters
+    report exerting, damage and moves.
+
+    `version` increases whenever a character joins, leaves or takes damage, so cached
+    evaluations of the board (see Player.score_play) can tell when they are stale.
+    """
+    __slots__ = ('_ready', '_exerted', 'threat', 'pending_banish', 'version', '_hash', 'stale')
+
+    def __init__(self, characters=()):
+        super().__init__()
+        self._ready = None
+        self._exerted = None
+        self.threat = 0  # Sum of printed strength + lore, the AI's measure of a board
+        self.pending_banish = {}  # Used as an insertion-ordered set
+        self.version = 0
+        self._hash = 0  # Sum of the characters' last computed keys
+        self.stale = {}  # Characters whose state changed since, used as an insertion-ordered set
+        for character in characters:
+            self.append(character)
+
+    def changed(self):
+        """Drops the cached ready/exerted views after a character was exerted or readied."""
+        self._ready = None
+        self._exerted = None
+
+    def zobrist_hash(self):
+        """
+        The sum of the characters' Zobrist keys. Keys are only recomputed for characters
+        that joined or changed since the last call, so play that never hashes pays for no
+        more than noting which characters changed.
+        """
+        if self.stale:
+            for character in self.stale:
+                key = character_key(character)
+                self._hash += key - character.zobrist
+                character.zobrist = key
+            self.stale = {}
+        return self._hash
+
+    def append(self, character):
+        super().append(character)
+        character.board = self
+        character.zobrist = 0
+        self.stale[character] = None
+        card = character.card
+        self.threat += (card.strength or 0) + (card.lore or 0)
+        if character._location is not None:
+            character._location.occupants += 1
+        if character.is_banished:
+            self.pending_banish[character] = None
+        self.version += 1
+        self.changed()
+
+    def remove(self, character):
+        super().remove(character)
+        character.board = None
+        self._hash -= character.zobrist
+        self.stale.pop(character, None)
+        card = character.card
+        self.threat -= (card.strength or 0) + (card.lore or 0)
+        if character._location is not None:
+            character._location.occupants -= 1
+        self.pending_banish.pop(character, None)
+        self.version += 1
+        self.changed()
+
+    def clear(self):
+        self.reset(())
+
+    def reset(self, characters):
+        """Replaces the characters in play (e.g. when restoring a snapshot) and rebuilds the indexes."""
+        for character in self:
+            character.board = None
+            if character._location is not None:
+                character._location.occupants -= 1
+        del self[:]
+        self.threat = 0
+        self._hash = 0
+        self.stale = {}
+        self.pending_banish = {}
+        for character in characters:
+            self.append(character)
+        self.version += 1
+        self.changed()
+
+    def ready_characters(self):
+        """Ready characters in play order. The list is shared until the board changes; don't modify it."""
+        if self._ready is None:
+            self._ready = [c for c in self if not c._exerted]
+        return self._ready
+
+    def exerted_characters(self):
+        """Exerted characters in play order. The list is shared until the board changes; don't modify it."""
+        if self._exerted is None:
+            self._exerted = [c for c in self if c._exerted]
+        return self._exerted
+
+    def take_banished(self):
+        """Returns the characters that are banished, in play order, and empties the queue."""
+        if not self.pending_banish:
+            return []
+        pending = self.pending_banish
+        self.pending_banish = {}
+        return [c for c in self if c in pending and c.is_banished]
@@ -4,11 +4,14 @@ This module defines the BoardLocation class, which represents a location card in
 
 class BoardLocation:
     """Represents a single location card on the board."""
+    __slots__ = ('card', 'owner', 'willpower', 'damage', 'occupants')
+
     def __init__(self, card, player):
         self.card = card
         self.owner = player
         self.willpower = card.willpower
         self.damage = 0
+        self.occupants = 0  # Characters in play here, kept up to date by BoardCharacter.location
 
     def __repr__(self):
         return f"BoardLocation(name='{self.card.name}', will='{self.willpower - self.damage}/{self.willpower}')"
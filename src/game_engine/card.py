@@ -1,8 +1,75 @@
 import sqlite3
 import re
+from collections import namedtuple
+from .zobrist import card_key
+
+# Keywords that carry a number ("resist +2", "singer 5", "challenger +3", "shift 4")
+VALUE_KEYWORDS = ('resist', 'singer', 'challenger', 'shift')
+# Keywords that are simply present or absent, stored as has_<keyword> flags
+FLAG_KEYWORDS = ('rush', 'evasive', 'ward', 'bodyguard', 'reckless', 'support')
+
+def precompute_keywords(card):
+    """
+    Parses a card's keywords once into typed attributes, so the engine's hot paths read
+    attributes instead of scanning and splitting keyword strings on every check.
+
+    Sets `resist`, `singer`, `challenger` (0 when absent), `shift_cost` (None when absent)
+    and a `has_<keyword>` flag for each of FLAG_KEYWORDS. Keywords may be a set of strings
+    ("resist +1") or a dict mapping a keyword to its value ({'challenger': 2}).
+    Call it again whenever a card's keywords change.
+    """
+    values = dict.fromkeys(VALUE_KEYWORDS, 0)
+    for keyword in card.keywords:
+        parts = keyword.lower().replace('+', ' ').split()
+        if not parts or parts[0] not in values or values[parts[0]]:
+            continue
+        value = card.keywords[keyword] if isinstance(card.keywords, dict) else None
+        if value is None or isinstance(value, bool):
+            try:
+                value = int(parts[1])
+            except (IndexError, ValueError):
+                continue  # Ignore malformed values, e.g. "resist" with no number
+        values[parts[0]] = value
+
+    card.resist = values['resist']
+    card.singer = values['singer']
+    card.challenger = values['challenger']
+    card.shift_cost = values['shift'] or None
+    for keyword in FLAG_KEYWORDS:
+        setattr(card, f"has_{keyword}", keyword in card.keywords)
+
+# An ability compiled from its Card_Abilities row. Numeric values are converted to int once;
+# anything else (e.g. 'Rush', or None) is kept as it is.
+Ability = namedtuple('Ability', ['trigger', 'effect', 'target', 'value'])
+
+def compile_abilities(card):
+    """
+    Compiles a card's raw `parsed_abilities` rows into immutable Ability objects.
+
+    Sets `abilities` (a tuple in load order) and `abilities_by_trigger` (trigger -> tuple of
+    abilities), so the engine only looks at the abilities relevant to an event. Call it
+    again whenever a card's parsed_abilities change.
+    """
+    abilities = []
+    by_trigger = {}
+    for row in card.parsed_abilities:
+        value = row.get('value')
+        if isinstance(value, str) and value.strip().lstrip('+').isdigit():
+            value = int(value)
+        ability = Ability(row.get('trigger'), row.get('effect'), row.get('target'), value)
+        abilities.append(ability)
+        by_trigger.setdefault(ability.trigger, []).append(ability)
+    card.abilities = tuple(abilities)
+    card.abilities_by_trigger = {trigger: tuple(group) for trigger, group in by_trigger.items()}
 
 class Card:
     """Represents a single Lorcana card with all its attributes from the database."""
+    # Cards are created once per run but referenced from every deck and game, so keep them compact
+    __slots__ = ('id', 'name', 'color', 'cost', 'inkable', 'type', 'strength', 'willpower', 'lore', 'move_cost',
+                 'text', 'set_name', 'set_id', 'rarity', 'artist', 'image_url', 'api_id', 'threat_score',
+                 'parsed_abilities', 'abilities', 'abilities_by_trigger', 'keywords', 'resist', 'singer', 'challenger', 'shift_cost',
+                 'has_rush', 'has_evasive', 'has_ward', 'has_bodyguard', 'has_reckless', 'has_support', 'zobrist')
+
     def __init__(self, db_row):
         # db_row is a sqlite3.Row object (dictionary-like)
         self.id = db_row['id']
@@ -23,9 +90,12 @@ class Card:
         self.image_url = db_row['image_url']
         self.api_id = db_row['api_id']
         self.threat_score = db_row['ThreatScore'] or 3
+        self.zobrist = card_key(self)  # Fixed 64-bit key for position hashing; see zobrist.py
 
         self.parsed_abilities = []  # This will be populated by load_all_cards
         self.keywords = set()  # This will be populated by load_all_cards
+        compile_abilities(self)
+        precompute_keywords(self)
 
         if isinstance(self.type, str):
             self.type = self.type.strip()
@@ -42,7 +112,7 @@ class Card:
 
     @staticmethod
     def load_all_cards(db_path):
-        """Loads all cards and their abilities from the database, keyed by api_id."""
+        """Loads all cards and their abilities from the database, as a CardPool keyed by api_id."""
         cards = {}
         # We need a temporary map from db id to api_id to link abilities
         id_to_api_id_map = {}
@@ -70,7 +140,12 @@ class Card:
                     # If the ability is a keyword, add it to our set for easy lookup
                     if ability_dict.get('ability_type') == 'keyword' and ability_dict.get('ability_text'):
                         cards[api_id].keywords.add(ability_dict['ability_text'].lower())
+
+            for card in cards.values():
+                compile_abilities(card)
+                precompute_keywords(card)
             
+            cards = CardPool(cards)
             print(f"Successfully loaded {len(cards)} cards and their abilities.")
 
         except sqlite3.Error as e:
@@ -80,3 +155,49 @@ class Card:
                 conn.close()
         return cards
 
+
+class CardTable:
+    """
+    Every card of a pool in a fixed order, so a card can be named by a small integer: its
+    index in the table (see indices()). Indices follow the sorted api_ids, so the same pool
+    gets the same indices in every process. GA genomes, the decks in worker tasks and the
+    batch engine use indices instead of api_id dict lookups.
+
+    A table never changes, and the cards don't know their indices: tables built over
+    overlapping sets of cards each keep their own numbering.
+    """
+    __slots__ = ('cards', 'positions')
+
+    def __init__(self, all_cards):
+        self.cards = tuple(all_cards[api_id] for api_id in sorted(all_cards))
+        self.positions = {card.api_id: index for index, card in enumerate(self.cards)}
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __getitem__(self, index):
+        return self.cards[index]
+
+    def lookup(self, indices):
+        """Returns the cards for a list (or array) of indices, e.g. a genome."""
+        cards = self.cards
+        return [cards[index] for index in indices]
+
+    def indices(self, cards):
+        """Returns the indices of a list of cards in this table."""
+        positions = self.positions
+        return [positions[card.api_id] for card in cards]
+
+
+class CardPool(dict):
+    """A map of api_id to Card, as load_all_cards returns it, along with its CardTable."""
+
+    def __init__(self, cards=()):
+        super().__init__(cards)
+        self.table = CardTable(self)
+
+
+def card_table(all_cards):
+    """The CardTable of a card map: a CardPool's own, or a new one for a plain dict."""
+    table = getattr(all_cards, 'table', None)
+    return table if table is not None else CardTable(all_cards)
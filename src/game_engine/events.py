@@ -0,0 +1,205 @@
+"""
+This module defines the typed events the engine reports as a game is played, and the sinks
+that consume them.
+
+The game state and its players hold a `log` attribute that is either a sink or None. Every
+report is guarded by `if log:`, so a silent game (the GA's batch mode) never builds an
+event or formats a string. TextSink prints the familiar verbose
+output; JsonlSink writes one JSON object per event so games can be replayed or analysed.
+"""
+import json
+import sys
+from collections import namedtuple
+
+# Event name -> event type, for reading JSONL logs back
+EVENT_TYPES = {}
+
+
+def _event(name, fields, text):
+    """
+    Declares an event type: a namedtuple with a `text()` method giving its verbose output.
+    `text` is either a format string over the fields or a function of the event.
+    """
+    event_type = namedtuple(name, fields)
+    if callable(text):
+        event_type.text = text
+    else:
+        event_type.text = lambda event: text.format(**event._asdict())
+    EVENT_TYPES[name] = event_type
+    return event_type
+
+
+def _played_text(event):
+    if event.shifted_onto:
+        return f"{event.player} shifted {event.card} onto {event.shifted_onto} for {event.cost} ink."
+    if event.kind == 'Location':
+        return f"{event.player} played new location: {event.card} for {event.cost} ink."
+    if event.kind == 'Action':
+        return f"{event.player} played action: {event.card} for {event.cost} ink."
+    return f"{event.player} played {event.card} for {event.cost} ink."
+
+
+def _board_state_text(event):
+    lines = [f"\n--- Turn {event.turn}: {event.active_player}'s Turn ---"]
+    for name, lore, hand, board, locations, ink_ready, ink_exerted in event.players:
+        lines.append(f"  {name} Lore: {lore}, Hand: {hand}")
+        lines.append(f"  {name} Board: {board}")
+        lines.append(f"  {name} Locations: {locations}")
+        lines.append(f"  {name} Ink: Ready({ink_ready}), Exerted({ink_exerted})")
+    return "\n".join(lines)
+
+
+def _game_over_text(event):
+    if event.winner:
+        return f"\n--- Game Over ---\nWinner: {event.winner} with {event.lore} lore."
+    return "\n--- Game Over ---\nResult: It's a draw!"
+
+
+def _ai_play_text(event):
+    details = f"playing {event.card}"
+    if event.singer:
+        details = f"singing {event.card} with {event.singer}"
+    if event.target:
+        details += f" targeting {event.target}"
+    return f"{event.player}'s AI considers {details} (Score: {event.score:.2f}) - Ink: {event.ink}"
+
+
+def _ai_challenge_text(event):
+    if event.mode == 'RECKLESS':
+        return f"{event.player}'s AI is forced to make a RECKLESS challenge with {event.attacker} against {event.defender}."
+    return (f"{event.player}'s AI is making a {event.mode} challenge with {event.attacker} against {event.defender} "
+            f"(Score: {event.score}) - Ink: {event.ink}")
+
+
+def _damage_text(event):
+    text = f"  -> Dealing {event.amount} damage to {event.card}."
+    if event.banished:
+        text += f"\n    -> {event.card} was banished!"
+    return text
+
+
+# --- Game flow ---
+GameStarted = _event('GameStarted', [], "--- Starting Game ---")
+# `players` holds (name, lore, hand size, board, locations, ink ready, ink exerted) per player
+BoardState = _event('BoardState', ['turn', 'active_player', 'players'], _board_state_text)
+Adjudicated = _event('Adjudicated', ['winner', 'turns_saved'],
+                     "ADJUDICATED: {winner} wins; the result is forced ({turns_saved} turns skipped).")
+GameOver = _event('GameOver', ['winner', 'lore'], _game_over_text)
+
+# --- Player actions ---
+StartingHand = _event('StartingHand', ['player', 'count'], "{player} drew their starting hand of {count} cards.")
+DeckEmpty = _event('DeckEmpty', ['player'], "{player}'s deck is empty! Cannot draw.")
+LocationLore = _event('LocationLore', ['player', 'location', 'lore', 'total_lore'],
+                      "{player} gains {lore} lore from {location}. Total lore: {total_lore}")
+Readied = _event('Readied', ['player', 'ink', 'characters'],
+                 "{player} readied their cards. Ink: {ink}, Characters: {characters}")
+Inked = _event('Inked', ['player', 'card'], "{player} played {card} to their inkwell.")
+# `kind` is 'Character', 'Location' or 'Action'; `shifted_onto` names the character a Shift replaced
+Played = _event('Played', ['player', 'card', 'kind', 'cost', 'shifted_onto'], _played_text)
+Sang = _event('Sang', ['player', 'singer', 'card'], "{player}'s {singer} sings {card}.")
+Quested = _event('Quested', ['player', 'card', 'lore', 'total_lore'],
+                 "{player}'s {card} quests for {lore} lore. Total lore: {total_lore}")
+Challenged = _event('Challenged', ['player', 'attacker', 'defender', 'attacker_strength', 'defender_willpower',
+                                   'defender_strength', 'attacker_willpower'],
+                    "{player}'s {attacker} challenges {defender}!\n"
+                    "  -> {defender} takes {attacker_strength} damage. {defender_willpower} willpower left.\n"
+                    "  -> {attacker} takes {defender_strength} damage. {attacker_willpower} willpower left.")
+Banished = _event('Banished', ['player', 'card'], "{player}'s {card} was banished.")
+Moved = _event('Moved', ['player', 'card', 'location', 'cost'], "{player} moved {card} to {location} for {cost} ink.")
+
+# --- Abilities ---
+Triggered = _event('Triggered', ['card', 'location', 'effect'],
+                   "TRIGGER: {card} banishment at {location} triggers {effect}.")
+AbilityResolved = _event('AbilityResolved', ['player', 'card', 'effect', 'value'],
+                         "RESOLVING ABILITY: {effect}({value}) for {player} from card {card}")
+CardsDrawn = _event('CardsDrawn', ['player', 'count'], "  -> {player} draws {count} card(s).")
+DamageDealt = _event('DamageDealt', ['card', 'amount', 'banished'], _damage_text)
+LoreGained = _event('LoreGained', ['player', 'lore'], "  -> {player} gains {lore} lore.")
+InvalidTarget = _event('InvalidTarget', ['card', 'player'],
+                       "INVALID TARGET: {card} has Ward and cannot be targeted by {player}.")
+EffectWarning = _event('EffectWarning', ['message'], "Warning: {message}")
+
+# --- AI decisions ---
+MainPhase = _event('MainPhase', ['player', 'ended'],
+                   lambda event: f"--- {event.player}: {'End of Main Phase' if event.ended else 'Main Phase'} ---")
+AIInk = _event('AIInk', ['player', 'card'], "{player}'s AI is inking {card}.")
+AIPlay = _event('AIPlay', ['player', 'card', 'singer', 'target', 'score', 'ink'], _ai_play_text)
+AIPlayFailed = _event('AIPlayFailed', ['player', 'card'], "AI play failed for {card}. Stopping further plays.")
+AIMove = _event('AIMove', ['player', 'card', 'location', 'score', 'quest_score', 'ink'],
+                "{player}'s AI is moving {card} to {location} (Score: {score:.2f} vs Questing: {quest_score}) - Ink: {ink}")
+# `mode` is 'RECKLESS', 'DESPERATE' or 'strategic'
+AIChallenge = _event('AIChallenge', ['player', 'attacker', 'defender', 'mode', 'score', 'ink'], _ai_challenge_text)
+AIQuest = _event('AIQuest', ['player', 'card', 'lore'], "{player}'s AI is questing with {card} for {lore} lore.")
+# `line` lists the winning moves, as moves.describe() strings
+AILethal = _event('AILethal', ['player', 'line'],
+                  lambda event: f"{event.player}'s AI found lethal: {'; '.join(event.line)}.")
+# `move` is a moves.describe() string; `win_rate` is the chosen move's share of won rollouts
+MCTSDecision = _event('MCTSDecision', ['player', 'move', 'visits', 'rollouts', 'win_rate'],
+                      "{player}'s MCTS AI chooses to {move} ({visits}/{rollouts} rollouts, {win_rate:.0%} won).")
+
+
+class NullSink:
+    """Discards every event. A game given a NullSink keeps a `log` of None, so nothing is built."""
+    def emit(self, event):
+        pass
+
+    def close(self):
+        pass
+
+
+class TextSink:
+    """Prints each event's human-readable text, reproducing the engine's verbose output."""
+    def __init__(self, stream=None):
+        # Resolved per event when not given, so redirected or captured stdout is honoured
+        self.stream = stream
+
+    def emit(self, event):
+        print(event.text(), file=self.stream or sys.stdout)
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """Writes one compact JSON object per event, e.g. {"event": "Quested", "player": ..., ...}."""
+    def __init__(self, file):
+        # Accepts a path (opened and owned by the sink) or an open text file
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "w", encoding="utf-8") if self.owns_file else file
+
+    def emit(self, event):
+        record = {"event": type(event).__name__}
+        record.update(event._asdict())
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class ListSink:
+    """Keeps events in memory, e.g. for tests or for analysing a single replayed game."""
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+def read_jsonl(lines):
+    """Turns the lines of a JsonlSink log back into event tuples."""
+    events = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        event_type = EVENT_TYPES[record.pop("event")]
+        if event_type is BoardState:
+            record["players"] = tuple(tuple(player) for player in record["players"])
+        events.append(event_type(**record))
+    return events
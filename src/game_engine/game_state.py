@@ -1,25 +1,99 @@
+import random
 from .card import Card
 from .player import Player
 from .board_character import BoardCharacter
 from .board_location import BoardLocation
 from .ability_resolver import AbilityResolver
+from .events import NullSink, TextSink
+from . import events
+from . import moves
+from . import zobrist
 
 class GameState:
     """Manages the overall state of the game, including players, turns, and win conditions."""
-    def __init__(self, player1_deck, player2_deck, all_cards, verbose=True):
+    # Effects that let a player draw extra cards or gain lore outside of questing and locations.
+    # The adjudicator's bounds don't model them, so games with such cards are played out.
+    UNBOUNDED_EFFECTS = ('DrawCard', 'GainLore')
+
+    def __init__(self, player1_deck, player2_deck, all_cards, verbose=True, seed=None, rng=None, first_player_index=0,
+                 adjudicate=False, event_sink=None, controllers=None, lethal_search=False):
+        """
+        Pass `seed` (or a ready-made random.Random as `rng`) to make the game reproducible.
+        Each player gets an independent stream derived from the game's RNG, so one deck's
+        shuffles never depend on the other deck. Without either, the game is unseeded.
+
+        `first_player_index` (0 or 1) picks who is on the play. The shuffles only depend on
+        the seed, so replaying a seed with the other index swaps seats on identical decks.
+
+        With `adjudicate`, run_simulation ends a game early once its result is forced (see
+        adjudicate_game). The winner is always the one the full game would have produced.
+
+        With `lethal_search`, the built-in AI first asks the solver for a line that wins this
+        turn once it has Player.LETHAL_CHECK_LORE lore (see Player.ai_play_lethal). It plays
+        better than the plain greedy AI, so games play out differently with it.
+
+        `event_sink` is a sink from the events module that receives every game event, e.g. a
+        JsonlSink for a replayable log. Without one, `verbose` picks a TextSink (the familiar
+        printed output) or no logging at all.
+
+        `controllers` optionally picks who decides for each seat, as a (player 1, player 2)
+        pair: an object with a play_turn(game) method such as mcts.MCTSController, or None
+        for the built-in greedy AI (Player.ai_play_turn).
+        """
         self.all_cards = all_cards
-        self.player1 = Player("Player 1", player1_deck)
-        self.player2 = Player("Player 2", player2_deck)
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.player1 = Player("Player 1", player1_deck, rng=random.Random(self.rng.getrandbits(64)))
+        self.player2 = Player("Player 2", player2_deck, rng=random.Random(self.rng.getrandbits(64)))
         self.players = [self.player1, self.player2]
-        self.current_turn = 0
-        self.active_player_index = 0
-        self.game_over = False
-        self.winner = None
         self.verbose = verbose
+        if event_sink is None:
+            event_sink = TextSink() if verbose else None
+        # The sink, or None when silent; players copy it so each report is one cheap check
+        self.log = None if isinstance(event_sink, NullSink) else event_sink
+        self.adjudicate = adjudicate
+        self.lethal_search = lethal_search
 
         # Give each player a reference to this game state
         for p in self.players:
             p.set_game_state(self)
+        self._new_game(player1_deck, player2_deck, first_player_index, controllers)
+
+    def _new_game(self, player1_deck, player2_deck, first_player_index, controllers):
+        """Sets the game's own per-game state for a game that hasn't started yet."""
+        self.current_turn = 0
+        self.first_player_index = first_player_index
+        self.active_player_index = first_player_index
+        self.game_over = False
+        self.winner = None
+        self.adjudicated = False
+        self.turns_saved = 0
+        if self.adjudicate:
+            # Per-player bounds from the full decklists, which never gain cards during a game
+            self.max_lore_per_card = [max([card.lore or 0 for card in deck] or [0]) for deck in (player1_deck, player2_deck)]
+            self.has_unbounded_effects = [
+                any(ability.effect in self.UNBOUNDED_EFFECTS for card in deck for ability in card.abilities)
+                for deck in (player1_deck, player2_deck)
+            ]
+        self.player1.controller, self.player2.controller = controllers if controllers is not None else (None, None)
+
+    def reset(self, player1_deck, player2_deck, seed=None, rng=None, first_player_index=0, controllers=None):
+        """
+        Sets this game up for a new game, with the same card map, logging, adjudication and
+        lethal search settings, as if it had just been constructed with these arguments: a
+        given seed plays out exactly as in a new GameState.
+
+        The players, their zone containers and the BoardCharacters they created are reused
+        (see Player.reset), so a worker playing games back to back allocates little per
+        game. Clones of the previous game share its players' RNGs and mustn't be used after.
+        """
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)
+        for player, deck in zip(self.players, (player1_deck, player2_deck)):
+            # Reseeding in place gives the same stream as the random.Random in __init__
+            player.rng.seed(self.rng.getrandbits(64))
+            player.reset(deck)
+        self._new_game(player1_deck, player2_deck, first_player_index, controllers)
 
     @property
     def active_player(self):
@@ -31,8 +105,8 @@ class GameState:
 
     def start_game(self):
         """Starts the game, including initial draws."""
-        if self.verbose:
-            print("--- Starting Game ---")
+        if self.log:
+            self.log.emit(events.GameStarted())
         for player in self.players:
             player.initial_draw()
         self.current_turn = 1
@@ -46,12 +120,32 @@ class GameState:
             return
 
         self.active_player_index = 1 - self.active_player_index
-        if self.active_player_index == 0:
+        if self.active_player_index == self.first_player_index:
             self.current_turn += 1
         
         self.print_board_state()
         self.run_turn_phases()
 
+    def play_turn(self):
+        """Lets the active player's controller, or the built-in AI, make their decisions for the turn."""
+        player = self.active_player
+        if player.controller is None:
+            player.ai_play_turn(self.opponent)
+        else:
+            player.controller.play_turn(self)
+
+    def end_turn(self):
+        """
+        Ends the active player's turn: banishes defeated characters, adjudicates if enabled,
+        then starts the next turn, or ends the game once the turn limit has passed.
+        """
+        self.check_and_banish_characters()
+        if self.adjudicate and self.adjudicate_game():
+            return
+        self.next_turn()
+        if self.current_turn > 20:
+            self.end_at_turn_limit()
+
     def run_turn_phases(self):
         """Runs through the standard phases of a single player's turn."""
         self.active_player.ready_turn()
@@ -63,23 +157,21 @@ class GameState:
     def check_and_banish_characters(self):
         """Checks for and removes any banished characters from both players' boards."""
         for player in self.players:
-            # We iterate over a copy of the list because we're modifying it in the loop
-            for character in player.characters_in_play[:]:
-                if character.is_banished:
-                    # This is the global trigger point for any effects that happen upon banishment.
-                    # Check if the character was at a location, as some locations have abilities that
-                    # trigger when a character is banished there (e.g., 'The Library').
-                    if character.location:
-                        for ability in character.location.card.parsed_abilities:
-                            if ability['trigger'] == 'OnBanishmentAtLocation':
-                                # The owner of the ability is the owner of the location card.
-                                ability_owner = character.location.owner
-                                if self.verbose:
-                                    print(f"TRIGGER: {character.card.name} banishment at {character.location.card.name} triggers {ability['effect']}.")
-                                AbilityResolver.resolve_ability(ability, character.location.card, ability_owner)
-                    
-                    # After checking for triggers, officially banish the character from play.
-                    player.banish_character(character)
+            # Damage queues characters as it banishes them, so only those need checking
+            for character in player.characters_in_play.take_banished():
+                # This is the global trigger point for any effects that happen upon banishment.
+                # Check if the character was at a location, as some locations have abilities that
+                # trigger when a character is banished there (e.g., 'The Library').
+                if character.location:
+                    for ability in character.location.card.abilities_by_trigger.get('OnBanishmentAtLocation', ()):
+                        # The owner of the ability is the owner of the location card.
+                        ability_owner = character.location.owner
+                        if self.log:
+                            self.log.emit(events.Triggered(character.card.name, character.location.card.name, ability.effect))
+                        AbilityResolver.resolve_ability(ability, character.location.card, ability_owner)
+
+                # After checking for triggers, officially banish the character from play.
+                player.banish_character(character)
 
     def check_for_winner(self):
         """Checks if any player has met a win or loss condition."""
@@ -95,44 +187,168 @@ class GameState:
                 self.winner = p.opponent
                 return
 
+    def _future_turn_starts(self):
+        """
+        Lists the (player_index, turn) of every turn start still to come, from the end of
+        the current turn. The last one is the first player's start of turn 21, where lore
+        from locations and the draw still happen before the turn limit ends the game.
+        """
+        starts = []
+        player_index, turn = self.active_player_index, self.current_turn
+        while turn <= 20:
+            player_index = 1 - player_index
+            if player_index == self.first_player_index:
+                turn += 1
+            starts.append((player_index, turn))
+        return starts
+
+    def _is_forced_win(self, leader_index, starts):
+        """
+        Checks cheap sufficient conditions for `leader_index` winning whatever is played.
+
+        The trailing player's lore gain is bounded from above: at their k-th turn start they
+        have at most (board + hand + k - 1) characters, each worth at most their best card's
+        lore, whether by questing or from a location. The leader must have enough cards left
+        for every draw. The trailer is beaten if that bound can't reach 20 and they either
+        deck out first or stay behind the leader's current lore at the turn limit.
+        """
+        leader, trailer = self.players[leader_index], self.players[1 - leader_index]
+        if self.has_unbounded_effects[0] or self.has_unbounded_effects[1]:
+            return False
+
+        max_lore = self.max_lore_per_card[1 - leader_index]
+        characters = len(trailer.characters_in_play) + len(trailer.hand)
+        trailer_starts = 0
+        leader_starts = 0
+        lore_bound = 0
+        for player_index, _ in starts:
+            if player_index == leader_index:
+                leader_starts += 1
+                if leader_starts > len(leader.deck):
+                    return False  # The leader could deck out
+            else:
+                trailer_starts += 1
+                lore_bound += max_lore * (characters + trailer_starts - 1)
+                if trailer.lore + lore_bound >= 20:
+                    return False
+                if trailer_starts > len(trailer.deck):
+                    return True  # The trailer decks out before they can catch up
+        return leader.lore > trailer.lore + lore_bound
+
+    def adjudicate_game(self):
+        """
+        Ends the game at the end of a turn if its result is already forced (lore race,
+        decking out, or an empty board and hand that can't catch up). Records how many
+        player turns were skipped before the turn limit in `turns_saved`. Returns True if
+        the game was adjudicated.
+        """
+        if any(p.lore >= 20 or p.has_lost for p in self.players):
+            return False
+        starts = self._future_turn_starts()
+        for leader_index in (0, 1):
+            if self._is_forced_win(leader_index, starts):
+                self.winner = self.players[leader_index]
+                self.game_over = True
+                self.adjudicated = True
+                self.turns_saved = sum(1 for _, turn in starts if turn <= 20)
+                if self.log:
+                    self.log.emit(events.Adjudicated(self.winner.name, self.turns_saved))
+                return True
+        return False
+
+    def end_at_turn_limit(self):
+        """Ends a game still undecided at the turn limit: the player with more lore wins, or it's a draw."""
+        # Final check for winner if turn limit is reached
+        if not self.winner:
+            self.check_for_winner()
+
+        # If still no winner, decide by lore
+        if not self.winner and not self.game_over:
+            if self.players[0].lore > self.players[1].lore:
+                self.winner = self.players[0]
+            elif self.players[1].lore > self.players[0].lore:
+                self.winner = self.players[1]
+            self.game_over = True # Mark game as over due to turn limit
+
+    # --- Lookahead support ---
+
+    def legal_moves(self):
+        """Yields every move the active player can make now (see the moves module), ending with END_TURN."""
+        return moves.legal_moves(self)
+
+    def apply_move(self, move):
+        """Makes a move for the active player. Returns False, changing nothing, if it isn't legal."""
+        return moves.apply_move(self, move)
+
+    def zobrist_hash(self):
+        """
+        Returns a 64-bit hash of the position, equal for positions that play the same however
+        they were reached (see the zobrist module). Players and boards keep running hashes
+        as cards move, so this costs the same at any point in the game.
+        """
+        return zobrist.position_hash(self)
+
+    def snapshot(self):
+        """
+        Captures everything play can change, for restore(). Much cheaper than copying the
+        game: cards are never modified, and board objects are kept and reset in place.
+        Random number generators aren't included, since play draws nothing from them
+        after the opening shuffles.
+        """
+        return (self.current_turn, self.active_player_index, self.game_over, self.winner, self.adjudicated,
+                self.turns_saved, self.player1.snapshot(), self.player2.snapshot(),
+                self.player1.characters_created, self.player2.characters_created)
+
+    def restore(self, snapshot):
+        """
+        Returns the game to a state captured by snapshot(). Characters played since then are
+        reused by later plays (see Player.new_character), so don't keep references to them.
+        """
+        (self.current_turn, self.active_player_index, self.game_over, self.winner, self.adjudicated,
+         self.turns_saved, player1, player2, self.player1.characters_created, self.player2.characters_created) = snapshot
+        self.player1.restore(player1)
+        self.player2.restore(player2)
+
+    def clone(self):
+        """
+        Returns an independent, silent copy of the game, e.g. to search from without touching
+        the real one. Everything play changes is copied. Cards, the card map and the random
+        number generators are shared, since play draws no randomness (see snapshot); a
+        search that shuffles a clone's deck should use its own RNG.
+        """
+        new = GameState.__new__(GameState)
+        new.__dict__.update(self.__dict__)
+        new.verbose = False
+        new.log = None
+        new.player1 = self.player1.clone(new)
+        new.player2 = self.player2.clone(new)
+        new.players = [new.player1, new.player2]
+        if self.winner is not None:
+            new.winner = new.players[self.players.index(self.winner)]
+        return new
+
     def print_board_state(self):
-        """Prints a summary of the current board state."""
-        if not self.verbose:
+        """Reports a summary of the current board state to the event log."""
+        if not self.log:
             return
-        print(f"\n--- Turn {self.current_turn}: {self.active_player.name}'s Turn ---")
-        for p in self.players:
-            print(f"  {p.name} Lore: {p.lore}, Hand: {len(p.hand)}")
-            print(f"  {p.name} Board: {[str(c) for c in p.characters_in_play]}")
-            print(f"  {p.name} Locations: {[str(l) for l in p.locations_in_play]}")
-            print(f"  {p.name} Ink: Ready({len(p.inkwell_ready)}), Exerted({len(p.inkwell_exerted)})")
+        self.log.emit(events.BoardState(self.current_turn, self.active_player.name, tuple(
+            (p.name, p.lore, len(p.hand), [str(c) for c in p.characters_in_play], [str(l) for l in p.locations_in_play],
+             p.ink_ready, p.ink_exerted)
+            for p in self.players
+        )))
 
     def run_simulation(self):
         """Runs a simulation loop until a winner is found or the turn limit is reached."""
         self.start_game()
 
         while not self.game_over and self.current_turn <= 20:
-            self.active_player.ai_play_turn(self.opponent)
-            self.check_and_banish_characters()
-            self.next_turn()
+            self.play_turn()
+            self.end_turn()
+        self.end_at_turn_limit()
 
-        # Final check for winner if turn limit is reached
-        if not self.winner:
-            self.check_for_winner()
-            
-        # If still no winner, decide by lore
-        if not self.winner and not self.game_over:
-             if self.players[0].lore > self.players[1].lore:
-                 self.winner = self.players[0]
-             elif self.players[1].lore > self.players[0].lore:
-                 self.winner = self.players[1]
-             self.game_over = True # Mark game as over due to turn limit
-
-        if self.verbose:
-            print("\n--- Game Over ---")
-            if self.winner:
-                print(f"Winner: {self.winner.name} with {self.winner.lore} lore.")
-            else:
-                print("Result: It's a draw!")
+        if self.log:
+            winner = self.winner
+            self.log.emit(events.GameOver(winner.name if winner else None, winner.lore if winner else None))
             self.print_board_state()
 
         return self.winner
@@ -0,0 +1,174 @@
+"""
+This module provides a Monte Carlo search AI that can pilot either seat of a GameState in
+place of the built-in greedy AI (see GameState's `controllers`).
+
+Each decision is searched on a clone of the game. Every rollout first determinizes the
+hidden information (the searching player's deck order, and the opponent's hand and deck
+redealt from the cards they could be holding), tries one of the legal moves picked by
+UCB1, and then lets the greedy AI play both seats to the end of the game. The move
+tried in the most rollouts is made. With a worker pool, the rollouts of each decision are
+split across the workers (root parallelism) and their statistics merged.
+"""
+import math
+import os
+import random
+import time
+
+from . import events
+from . import moves
+from .rng import derive_seed
+
+
+def _determinize(game, player_index, rng):
+    """Reshuffles what the player at `player_index` can't see: their deck and the opponent's hand and deck."""
+    player, opponent = game.players[player_index], game.players[1 - player_index]
+    rng.shuffle(player.deck)
+    unseen = list(opponent.hand)
+    unseen.extend(opponent.deck)
+    rng.shuffle(unseen)
+    hand_size = len(opponent.hand)
+    opponent.hand[:] = unseen[:hand_size]
+    opponent.hand_hash = sum(card.zobrist for card in opponent.hand)
+    opponent.deck.clear()
+    opponent.deck.extend(unseen[hand_size:])
+
+
+def _search_copy(game):
+    """A silent clone for searching, with every seat played by the greedy AI."""
+    copy = game.clone()
+    copy.all_cards = None  # Not needed to play, and costly to send to pool workers
+    for player in copy.players:
+        player.controller = None
+    return copy
+
+
+def _rollout(game, move):
+    """Makes `move`, then plays the game out with the greedy AI in both seats. Returns the winner or None."""
+    player = game.active_player
+    game.apply_move(move)
+    if move.kind != 'end_turn' and not game.game_over:
+        # The greedy AI finishes the turn the move was made in
+        player.ai_play_turn(game.opponent)
+        game.end_turn()
+    while not game.game_over and game.current_turn <= 20:
+        game.active_player.ai_play_turn(game.opponent)
+        game.end_turn()
+    game.end_at_turn_limit()
+    return game.winner
+
+
+def search(game, rollouts, time_limit=None, exploration=1.4, seed=None):
+    """
+    Runs up to `rollouts` rollouts (or until `time_limit` seconds pass) from the active
+    player's current decision. Returns the (visits, wins) of each move in legal_moves()
+    order; a won rollout counts 1 and a draw 0.5. The game is not changed, and the search
+    runs on a copy, so the game's own legal_moves() give the moves to play.
+    """
+    seeds = random.Random(seed)
+    # Adjudication carries over to the copy and ends rollouts whose result is already forced
+    game = _search_copy(game)
+    player_index = game.active_player_index
+    player = game.players[player_index]
+    root = game.snapshot()
+    legal = list(game.legal_moves())
+    visits = [0] * len(legal)
+    wins = [0.0] * len(legal)
+    if len(legal) == 1:
+        return visits, wins
+
+    # Common random numbers: every move's n-th rollout is played in the same determinized
+    # world, so moves are compared on identical draws rather than through shuffle noise
+    worlds = []
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    total = 0
+    while (not rollouts or total < rollouts) and (deadline is None or time.perf_counter() < deadline):
+        if total < len(legal):
+            choice = total  # Try every move once before comparing them
+        else:
+            log_total = math.log(total)
+            choice = max(range(len(legal)), key=lambda i: wins[i] / visits[i] + exploration * math.sqrt(log_total / visits[i]))
+        if visits[choice] == len(worlds):
+            worlds.append(seeds.getrandbits(64))
+        game.restore(root)
+        _determinize(game, player_index, random.Random(worlds[visits[choice]]))
+        winner = _rollout(game, legal[choice])
+        visits[choice] += 1
+        if winner is player:
+            wins[choice] += 1
+        elif winner is None:
+            wins[choice] += 0.5
+        total += 1
+    return visits, wins
+
+
+def _search_task(args):
+    """Pool worker for root-parallel search. Returns the visits and wins per legal move index."""
+    return search(*args)
+
+
+class MCTSController:
+    """
+    Plays a seat by searching every decision with determinized rollouts (see `search`).
+
+    The budget per decision is `rollouts` rollouts, `time_limit` seconds, or whichever
+    runs out first when both are given (0 or None disables either). `exploration` is the
+    UCB1 constant. `seed` makes the searches, and so the whole game, reproducible. With a
+    multiprocessing `pool`, each decision's rollouts are split across `workers` tasks
+    (default: one per CPU); pool workers can't use a pool themselves, so simulation
+    workers search on their own.
+    """
+
+    def __init__(self, rollouts=64, time_limit=None, exploration=1.4, seed=None, pool=None, workers=None):
+        if not rollouts and not time_limit:
+            raise ValueError("MCTSController needs a rollout budget, a time limit, or both.")
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.seed = seed
+        self.pool = pool
+        self.workers = workers or (os.cpu_count() if pool is not None else 1)
+        self.decisions = 0
+        self.total_rollouts = 0
+
+    def choose_move(self, game):
+        """Searches the active player's decision and returns (move, visits, rollouts, win rate)."""
+        self.decisions += 1
+        seed = derive_seed(self.seed, "decision", self.decisions) if self.seed is not None else None
+        legal = list(game.legal_moves())
+        if self.pool is None or self.workers < 2:
+            visits, wins = search(game, self.rollouts, self.time_limit, self.exploration, seed)
+        else:
+            # Root parallelism: independent searches whose statistics are summed per move
+            share = -(-self.rollouts // self.workers) if self.rollouts else 0
+            root = _search_copy(game)
+            tasks = [(root, share, self.time_limit, self.exploration,
+                      derive_seed(seed, worker) if seed is not None else None)
+                     for worker in range(self.workers)]
+            visits = [0] * len(legal)
+            wins = [0.0] * len(legal)
+            for worker_visits, worker_wins in self.pool.map(_search_task, tasks):
+                for i in range(len(legal)):
+                    visits[i] += worker_visits[i]
+                    wins[i] += worker_wins[i]
+
+        total = sum(visits)
+        self.total_rollouts += total
+        # Most rollouts wins; ties go to the better win rate, then the first move listed
+        best = max(range(len(legal)), key=lambda i: (visits[i], wins[i] / visits[i] if visits[i] else 0, -i))
+        win_rate = wins[best] / visits[best] if visits[best] else 0.0
+        return legal[best], visits[best], total, win_rate
+
+    def play_turn(self, game):
+        """Makes the active player's decisions for the turn, one searched move at a time, until it ends the turn."""
+        player = game.active_player
+        log = player.log
+        if log:
+            log.emit(events.MainPhase(player.name, False))
+        while not game.game_over:
+            move, visits, total, win_rate = self.choose_move(game)
+            if log and total:
+                log.emit(events.MCTSDecision(player.name, moves.describe(move), visits, total, win_rate))
+            if move.kind == 'end_turn' or not game.apply_move(move):
+                break
+        if log:
+            log.emit(events.MainPhase(player.name, True))
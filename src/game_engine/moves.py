@@ -0,0 +1,144 @@
+"""
+This module lists the moves available to the active player of a GameState and applies
+them, so lookahead AIs can explore a game one decision at a time (see GameState.snapshot,
+restore and clone for going back).
+"""
+from collections import namedtuple
+
+# `kind` is 'ink', 'play', 'sing', 'quest', 'challenge', 'move' or 'end_turn'.
+# `card` is the card from hand being inked, played or sung; `character` is the character
+# in play that acts (quester, challenger, singer or mover) or that a Shift replaces;
+# `target` is the ability or challenge target; `location` is where a character moves.
+Move = namedtuple('Move', ['kind', 'card', 'character', 'target', 'location'], defaults=(None, None, None, None))
+
+END_TURN = Move('end_turn')
+
+# Effects that need a character to target, chosen by whoever plays the card
+TARGETED_EFFECTS = ('DealDamage', 'BanishCharacter')
+
+
+def _ability_targets(abilities, opponent):
+    """Returns the targets worth enumerating for abilities resolved on play ([None] if untargeted)."""
+    if not any(ability.effect in TARGETED_EFFECTS for ability in abilities):
+        return [None]
+    # Ward keeps opposing characters from being chosen
+    return [c for c in opponent.characters_in_play if not c.card.has_ward] or [None]
+
+
+def legal_moves(game):
+    """
+    Yields every move the active player can make now, ending with END_TURN. Copies of a
+    card in hand are only listed once, since playing either copy is the same move.
+    """
+    player, opponent = game.active_player, game.opponent
+    ink = player.ink_ready
+    seen = set()
+    for card in player.hand:
+        if card in seen:
+            continue
+        seen.add(card)
+        if card.inkable and not player.has_inked_this_turn:
+            yield Move('ink', card)
+
+        card_type = card.type
+        if card_type == 'Character':
+            targets = _ability_targets(card.abilities_by_trigger.get('OnPlay', ()), opponent)
+            if card.cost <= ink:
+                for target in targets:
+                    yield Move('play', card, target=target)
+            if card.shift_cost is not None and card.shift_cost <= ink:
+                for base in player.characters_in_play:
+                    if base.card.base_name == card.base_name:
+                        for target in targets:
+                            yield Move('play', card, character=base, target=target)
+        elif card_type == 'Location':
+            if card.cost <= ink:
+                yield Move('play', card)
+        elif card_type in ('Action', 'Action - Song'):
+            targets = _ability_targets(card.abilities, opponent)
+            if card.cost <= ink:
+                for target in targets:
+                    yield Move('play', card, target=target)
+            if "Song" in card_type:
+                for singer in player.get_ready_characters():
+                    if singer.card.singer >= card.cost:
+                        for target in targets:
+                            yield Move('sing', card, character=singer, target=target)
+
+    defenders = opponent.get_exerted_characters()
+    for character in player.characters_in_play:
+        if character.can_quest():
+            yield Move('quest', character=character)
+        if character.can_challenge():
+            for defender in defenders:
+                if not defender.card.has_evasive or character.card.has_evasive:
+                    yield Move('challenge', character=character, target=defender)
+        if character.location is None:
+            for location in player.locations_in_play:
+                move_cost = location.card.move_cost
+                if move_cost is not None and move_cost <= ink:
+                    yield Move('move', character=character, location=location)
+
+    yield END_TURN
+
+
+def describe(move):
+    """Returns a short human-readable description of a move, e.g. for logs."""
+    kind = move.kind
+    if kind == 'end_turn':
+        return "end turn"
+    if kind == 'ink':
+        return f"ink {move.card.name}"
+    if kind == 'play':
+        text = f"play {move.card.name}"
+        if move.character is not None:
+            text += f" shifted onto {move.character.card.name}"
+    elif kind == 'sing':
+        text = f"sing {move.card.name} with {move.character.card.name}"
+    elif kind == 'move':
+        return f"move {move.character.card.name} to {move.location.card.name}"
+    else:
+        text = f"{kind} with {move.character.card.name}"
+    if move.target is not None:
+        text += f" targeting {move.target.card.name}"
+    return text
+
+
+def apply_move(game, move):
+    """
+    Makes a move for the active player through the normal Player actions. Returns True if
+    the move was made, and False (changing nothing) if it wasn't legal. A move that wins
+    the game ends it at once.
+    """
+    player = game.active_player
+    kind = move.kind
+    if kind == 'end_turn':
+        game.end_turn()
+        return True
+
+    if kind == 'ink':
+        done = not player.has_inked_this_turn and player.play_to_inkwell(move.card)
+        if done:
+            player.has_inked_this_turn = True
+    elif kind == 'play':
+        card_type = move.card.type
+        if card_type == 'Character':
+            done = player.play_character(move.card, shift_target=move.character, ability_target=move.target)
+        elif card_type == 'Location':
+            done = player.play_location(move.card)
+        else:
+            done = player.play_action(move.card, ability_target=move.target)
+    elif kind == 'sing':
+        done = player.play_action(move.card, ability_target=move.target, singer=move.character)
+    elif kind == 'quest':
+        done = player.quest(move.character)
+    elif kind == 'challenge':
+        done = player.challenge(move.character, move.target)
+    elif kind == 'move':
+        done = player.move_character_to_location(move.character, move.location)
+    else:
+        raise ValueError(f"Unknown move kind: {kind}")
+
+    if done:
+        game.check_for_winner()
+    return done
@@ -1,33 +1,176 @@
 import random
 from collections import deque
-from .board_character import BoardCharacter
+from .board_character import BoardCharacter, Board
 from .board_location import BoardLocation
 from .ability_resolver import AbilityResolver
+from . import events
 from . import card
+from . import solver
+from .zobrist import TranspositionTable
 
 class Player:
     """Represents a player in the game, managing their deck, hand, and game state."""
-    def __init__(self, name, deck_cards):
+    # From this much lore, an AI whose game has lethal_search first looks for a line that wins
+    # this turn (see solver.find_lethal)
+    LETHAL_CHECK_LORE = 14
+    __slots__ = ('name', 'rng', 'deck', 'hand', 'ink_ready', 'ink_exerted', 'characters_in_play', 'locations_in_play',
+                 'discard_pile', 'lore', 'game_state', 'log', 'has_inked_this_turn', 'has_lost', 'score_cache',
+                 'score_evaluations', 'controller', 'hand_hash', 'discard_hash', 'locations_hash', 'character_pool',
+                 'characters_created', 'lethal_table')
+
+    def __init__(self, name, deck_cards, rng=None):
         self.name = name
+        # Each player shuffles with its own RNG stream so games can be reproduced from a seed.
+        self.rng = rng if rng is not None else random.Random()
         self.deck = deque(deck_cards)
         self.hand = []
-        self.inkwell_ready = []
-        self.inkwell_exerted = []
-        self.characters_in_play = []
+        # Inked cards are interchangeable, so the inkwell is just two counters
+        self.ink_ready = 0
+        self.ink_exerted = 0
+        self.characters_in_play = Board()  # Indexed list; see Board
         self.locations_in_play = []
         self.discard_pile = []
         self.lore = 0
         self.game_state = None  # This will be set by the GameState object
+        self.log = None  # The game's event sink, or None when the game is silent
         self.has_inked_this_turn = False
         self.has_lost = False
+        self.score_cache = {}  # action card -> (inputs, _evaluate_play result); see score_play
+        self.score_evaluations = 0  # Cards score_play evaluated this turn rather than answered from the cache
+        self.controller = None  # Makes this player's decisions (e.g. an MCTSController); None for ai_play_turn
+        # Sums of the Zobrist keys of the cards in these zones, kept up to date as cards move
+        self.hand_hash = 0
+        self.discard_hash = 0
+        self.locations_hash = 0
+        # Every BoardCharacter this player has created, for reuse after reset (see new_character)
+        self.character_pool = []
+        self.characters_created = 0  # How many of the pool this game has used
+        self.lethal_table = None  # The TranspositionTable ai_play_lethal reuses, made on first use
         self.shuffle_deck()
 
     def __repr__(self):
         return f"Player(name='{self.name}', lore={self.lore}, ink={self.get_available_ink()}/{self.total_ink}, hand={len(self.hand)}, board={len(self.characters_in_play)}, locations={len(self.locations_in_play)})"
 
+    def reset(self, deck_cards):
+        """
+        Puts this player back in its starting state with a new deck, shuffled with its RNG,
+        as a new Player would be. The zone containers are emptied and kept, and characters
+        played from now on reuse the BoardCharacters created in earlier games.
+        """
+        self.deck.clear()
+        self.deck.extend(deck_cards)
+        self.hand.clear()
+        self.discard_pile.clear()
+        self.locations_in_play.clear()
+        self.characters_in_play.clear()
+        self.ink_ready = 0
+        self.ink_exerted = 0
+        self.lore = 0
+        self.has_inked_this_turn = False
+        self.has_lost = False
+        self.score_cache.clear()
+        self.score_evaluations = 0
+        self.hand_hash = 0
+        self.discard_hash = 0
+        self.locations_hash = 0
+        self.characters_created = 0
+        self.shuffle_deck()
+
+    def new_character(self, card):
+        """
+        Returns a new BoardCharacter for `card`, owned by this player: one created earlier and
+        set up again if there is one free. Characters become free when the player is reset,
+        and those created after a snapshot when GameState.restore goes back to it, so no
+        reference to them may be kept past that.
+        """
+        pool = self.character_pool
+        if self.characters_created < len(pool):
+            character = pool[self.characters_created]
+            character.__init__(card, self)
+        else:
+            character = BoardCharacter(card, self)
+            pool.append(character)
+        self.characters_created += 1
+        return character
+
     def set_game_state(self, game_state):
         """Sets a reference to the main game state for context."""
         self.game_state = game_state
+        self.log = game_state.log
+
+    def snapshot(self):
+        """Captures this player's state (zones, ink, lore and characters in play) for restore."""
+        return (
+            tuple(self.deck), tuple(self.hand), tuple(self.discard_pile), self.ink_ready, self.ink_exerted, self.lore,
+            self.has_inked_this_turn, self.has_lost, self.hand_hash, self.discard_hash, self.locations_hash,
+            tuple((c, c._damage, c._exerted, c.is_newly_played, c.temp_strength_boost, c._location)
+                  for c in self.characters_in_play),
+            tuple((location, location.damage) for location in self.locations_in_play),
+        )
+
+    def restore(self, snapshot):
+        """Puts this player back in a state from snapshot(), reusing the same zone containers and board objects."""
+        (deck, hand, discard_pile, self.ink_ready, self.ink_exerted, self.lore, self.has_inked_this_turn, self.has_lost,
+         self.hand_hash, self.discard_hash, self.locations_hash, characters, locations) = snapshot
+        self.deck.clear()
+        self.deck.extend(deck)
+        self.hand[:] = hand
+        self.discard_pile[:] = discard_pile
+        self.locations_in_play.clear()
+        for location, damage in locations:
+            location.damage = damage
+            self.locations_in_play.append(location)
+        # Take everything off the board, restore the characters' fields, then put them back
+        self.characters_in_play.clear()
+        for c, damage, exerted, is_newly_played, temp_strength_boost, location in characters:
+            c._damage = damage
+            c._exerted = exerted
+            c.is_newly_played = is_newly_played
+            c.temp_strength_boost = temp_strength_boost
+            c._location = location
+        self.characters_in_play.reset([c for c, *_ in characters])
+
+    def clone(self, game_state):
+        """Returns a copy of this player for a cloned game state (see GameState.clone)."""
+        new = Player.__new__(Player)
+        new.name = self.name
+        new.rng = self.rng
+        new.deck = deque(self.deck)
+        new.hand = list(self.hand)
+        new.discard_pile = list(self.discard_pile)
+        new.ink_ready = self.ink_ready
+        new.ink_exerted = self.ink_exerted
+        new.lore = self.lore
+        new.has_inked_this_turn = self.has_inked_this_turn
+        new.has_lost = self.has_lost
+        new.game_state = game_state
+        new.log = game_state.log
+        new.score_cache = {}
+        new.score_evaluations = 0
+        new.controller = self.controller
+        new.hand_hash = self.hand_hash
+        new.discard_hash = self.discard_hash
+        new.locations_hash = self.locations_hash
+        new.character_pool = []
+        new.characters_created = 0
+        new.lethal_table = self.lethal_table
+
+        locations = {}
+        new.locations_in_play = []
+        for location in self.locations_in_play:
+            copy = locations[location] = BoardLocation(location.card, new)
+            copy.damage = location.damage
+            new.locations_in_play.append(copy)
+        new.characters_in_play = Board()
+        for c in self.characters_in_play:
+            copy = BoardCharacter(c.card, new)
+            copy._damage = c._damage
+            copy._exerted = c._exerted
+            copy.is_newly_played = c.is_newly_played
+            copy.temp_strength_boost = c.temp_strength_boost
+            copy._location = locations.get(c._location)
+            new.characters_in_play.append(copy)
+        return new
 
     @property
     def opponent(self):
@@ -38,79 +181,81 @@ class Player:
 
     @property
     def total_ink(self):
-        return len(self.inkwell_ready) + len(self.inkwell_exerted)
+        return self.ink_ready + self.ink_exerted
         
     def get_available_ink(self):
         """Returns the amount of ink available to use."""
-        return len(self.inkwell_ready)
+        return self.ink_ready
 
     def get_ready_characters(self):
-        """Returns characters that can quest or perform other actions."""
-        return [c for c in self.characters_in_play if c.is_ready]
+        """Returns characters that can quest or perform other actions. Don't modify the list."""
+        return self.characters_in_play.ready_characters()
         
     def get_characters_that_can_challenge(self):
         """Returns characters that can challenge this turn."""
-        return [c for c in self.characters_in_play if c.can_challenge()]
+        return [c for c in self.characters_in_play.ready_characters() if c.can_challenge()]
 
     def get_exerted_characters(self):
-        """Returns exerted characters, which are valid challenge targets."""
-        return [c for c in self.characters_in_play if c.is_exerted]
+        """Returns exerted characters, which are valid challenge targets. Don't modify the list."""
+        return self.characters_in_play.exerted_characters()
 
     def shuffle_deck(self):
-        random.shuffle(self.deck)
+        self.rng.shuffle(self.deck)
 
     def draw_card(self, num_cards=1):
         for _ in range(num_cards):
             if self.deck:
-                self.hand.append(self.deck.popleft())
+                card = self.deck.popleft()
+                self.hand.append(card)
+                self.hand_hash += card.zobrist
             else:
-                if self.game_state and self.game_state.verbose:
-                    print(f"{self.name}'s deck is empty! Cannot draw.")
+                if self.log:
+                    self.log.emit(events.DeckEmpty(self.name))
                 return False
         return True
 
     def initial_draw(self):
         self.draw_card(7)
-        if self.game_state and self.game_state.verbose:
-            print(f"{self.name} drew their starting hand of 7 cards.")
+        if self.log:
+            self.log.emit(events.StartingHand(self.name, 7))
 
     def ready_turn(self):
         """Readies all exerted cards, reset flags, and gain passive lore from locations."""
         # Gain lore from locations
         for location in self.locations_in_play:
             # For each character at the location, gain the location's lore value
-            lore_gain = sum(location.card.lore for character in self.characters_in_play if character.location == location)
+            lore_gain = (location.card.lore or 0) * location.occupants
             if lore_gain > 0:
                 self.lore += lore_gain
-                if self.game_state and self.game_state.verbose:
-                    print(f"{self.name} gains {lore_gain} lore from {location.card.name}. Total lore: {self.lore}")
+                if self.log:
+                    self.log.emit(events.LocationLore(self.name, location.card.name, lore_gain, self.lore))
 
-        self.inkwell_ready.extend(self.inkwell_exerted)
-        self.inkwell_exerted.clear()
+        self.ink_ready += self.ink_exerted
+        self.ink_exerted = 0
         self.has_inked_this_turn = False
         
         for char in self.characters_in_play:
             char.ready()
 
-        if self.game_state and self.game_state.verbose:
-            print(f"{self.name} readied their cards. Ink: {self.get_available_ink()}, Characters: {len(self.characters_in_play)}")
+        if self.log:
+            self.log.emit(events.Readied(self.name, self.ink_ready, len(self.characters_in_play)))
 
     def exert_ink(self, cost):
         """Exerts a number of ink cards. Returns True on success."""
-        if self.get_available_ink() < cost:
+        if self.ink_ready < cost:
             return False
-        for _ in range(cost):
-            card = self.inkwell_ready.pop()
-            self.inkwell_exerted.append(card)
+        self.ink_ready -= cost
+        self.ink_exerted += cost
         return True
 
     def play_to_inkwell(self, card_from_hand):
         if card_from_hand not in self.hand or not card_from_hand.inkable:
             return False
         self.hand.remove(card_from_hand)
-        self.inkwell_ready.append(card_from_hand)
-        if self.game_state and self.game_state.verbose:
-            print(f"{self.name} played {card_from_hand.name} to their inkwell.")
+        self.hand_hash -= card_from_hand.zobrist
+        self.ink_ready += 1
+        if self.log:
+            self.log.emit(events.Inked(self.name, card_from_hand.name))
         return True
 
     def play_character(self, card_from_hand, shift_target=None, ability_target=None):
@@ -121,34 +266,32 @@ class Player:
         play_cost = card_from_hand.cost
         is_shift_play = False
 
-        if 'shift' in card_from_hand.keywords and shift_target:
+        if card_from_hand.shift_cost is not None and shift_target:
             if shift_target.card.base_name == card_from_hand.base_name:
-                play_cost = card_from_hand.keywords.get('shift', card_from_hand.cost)
+                play_cost = card_from_hand.shift_cost
                 is_shift_play = True
 
         if self.exert_ink(play_cost):
             self.hand.remove(card_from_hand)
-            new_character = BoardCharacter(card_from_hand, self)
+            self.hand_hash -= card_from_hand.zobrist
+            new_character = self.new_character(card_from_hand)
 
             if is_shift_play and shift_target:
                 new_character.is_newly_played = shift_target.is_newly_played
                 new_character.damage = shift_target.damage
                 self.characters_in_play.remove(shift_target)
-                if self.game_state and self.game_state.verbose:
-                    print(f"{self.name} shifted {new_character.card.name} onto {shift_target.card.name} for {play_cost} ink.")
-            else:
-                if self.game_state and self.game_state.verbose:
-                    print(f"{self.name} played {new_character.card.name} for {play_cost} ink.")
+            if self.log:
+                self.log.emit(events.Played(self.name, card_from_hand.name, 'Character', play_cost,
+                                            shift_target.card.name if is_shift_play else None))
 
             # Bodyguard enters exerted if you have other characters. This check is done *before* adding the new character.
-            if 'bodyguard' in new_character.card.keywords and self.characters_in_play:
+            if new_character.card.has_bodyguard and self.characters_in_play:
                 new_character.is_exerted = True
             
             self.characters_in_play.append(new_character)
 
-            for ability in card_from_hand.parsed_abilities:
-                if ability['trigger'] == 'OnPlay':
-                    AbilityResolver.resolve_ability(ability, card_from_hand, self, target=ability_target)
+            for ability in card_from_hand.abilities_by_trigger.get('OnPlay', ()):
+                AbilityResolver.resolve_ability(ability, card_from_hand, self, target=ability_target)
             return True
         return False
 
@@ -160,24 +303,22 @@ class Player:
         lore_gained = character_in_play.card.lore or 0
         self.lore += lore_gained
         character_in_play.exert()
-        if self.game_state and self.game_state.verbose:
-            print(f"{self.name}'s {character_in_play.card.name} quests for {lore_gained} lore. Total lore: {self.lore}")
+        if self.log:
+            self.log.emit(events.Quested(self.name, character_in_play.card.name, lore_gained, self.lore))
         return True
 
     def challenge(self, attacker, defender):
-        """An attacking character challenges a defending character."""
+        """An attacking character challenges a defending character. Returns True if the challenge happened."""
         if not attacker.can_challenge() or not defender.is_exerted:
-            return
+            return False
         
-        if 'evasive' in defender.card.keywords and 'evasive' not in attacker.card.keywords:
-            return
+        if defender.card.has_evasive and not attacker.card.has_evasive:
+            return False
 
         attacker.exert()
         
         # Calculate effective strength for the challenge
-        attacker_strength = attacker.strength
-        if 'challenger' in attacker.card.keywords:
-            attacker_strength += attacker.card.keywords.get('challenger', 0)
+        attacker_strength = attacker.strength + attacker.card.challenger
 
         defender_strength = defender.strength
 
@@ -186,18 +327,19 @@ class Player:
         defender.damage += damage_to_defender
         attacker.damage += defender_strength
         
-        if self.game_state and self.game_state.verbose:
-            print(f"{self.name}'s {attacker.card.name} challenges {defender.card.name}!")
-            print(f"  -> {defender.card.name} takes {attacker_strength} damage. {defender.remaining_willpower} willpower left.")
-            print(f"  -> {attacker.card.name} takes {defender_strength} damage. {attacker.remaining_willpower} willpower left.")
+        if self.log:
+            self.log.emit(events.Challenged(self.name, attacker.card.name, defender.card.name, attacker_strength,
+                                            defender.remaining_willpower, defender_strength, attacker.remaining_willpower))
+        return True
 
     def banish_character(self, character):
         """Removes a character from play and moves them to the discard pile."""
         if character in self.characters_in_play:
             self.characters_in_play.remove(character)
             self.discard_pile.append(character.card)
-            if self.game_state and self.game_state.verbose:
-                print(f"{self.name}'s {character.card.name} was banished.")
+            self.discard_hash += character.card.zobrist
+            if self.log:
+                self.log.emit(events.Banished(self.name, character.card.name))
         return True
 
     def play_location(self, card_from_hand):
@@ -207,10 +349,12 @@ class Player:
         
         if self.exert_ink(card_from_hand.cost):
             self.hand.remove(card_from_hand)
+            self.hand_hash -= card_from_hand.zobrist
             new_location = BoardLocation(card_from_hand, self)  # self is the player
             self.locations_in_play.append(new_location)
-            if self.game_state and self.game_state.verbose:
-                print(f"{self.name} played new location: {card_from_hand.name} for {card_from_hand.cost} ink.")
+            self.locations_hash += card_from_hand.zobrist
+            if self.log:
+                self.log.emit(events.Played(self.name, card_from_hand.name, 'Location', card_from_hand.cost, None))
             return True
         return False
 
@@ -227,8 +371,8 @@ class Player:
         if self.exert_ink(move_cost):
             character.location = location
             character.exert()  # Moving to a location exerts the character
-            if self.game_state and self.game_state.verbose:
-                print(f"{self.name} moved {character.card.name} to {location.card.name} for {move_cost} ink.")
+            if self.log:
+                self.log.emit(events.Moved(self.name, character.card.name, location.card.name, move_cost))
             return True
         return False
     # --- AI Action Methods ---
@@ -261,59 +405,99 @@ class Player:
         best_card_to_ink = card_scores[0][0]
 
         if best_card_to_ink:
-            if self.game_state.verbose:
-                print(f"{self.name}'s AI is inking {best_card_to_ink.name}.")
+            if self.log:
+                self.log.emit(events.AIInk(self.name, best_card_to_ink.name))
             self.play_to_inkwell(best_card_to_ink)
             self.has_inked_this_turn = True
 
     def ai_play_turn(self, opponent):
         """Orchestrates the AI's entire main phase logic."""
-        if self.game_state.verbose:
-            print(f"--- {self.name}: Main Phase ---")
+        self.score_evaluations = 0
+        if self.log:
+            self.log.emit(events.MainPhase(self.name, False))
+
+        game = self.game_state
+        if game is not None and game.lethal_search and self.lore >= self.LETHAL_CHECK_LORE and self.ai_play_lethal():
+            if self.log:
+                self.log.emit(events.MainPhase(self.name, True))
+            return
 
         self.ai_ink_card(opponent)
         self.ai_play_cards(opponent)
         self.ai_move_characters_to_locations()
         self.ai_character_actions(opponent)
 
-        if self.game_state.verbose:
-            print(f"--- {self.name}: End of Main Phase ---")
+        if self.log:
+            self.log.emit(events.MainPhase(self.name, True))
+
+    def ai_play_lethal(self):
+        """
+        Plays a line that wins this turn if the solver finds one quickly. Returns True if it did.
+        The solver isn't shown the order of the deck, so cards drawn during a line can't be used.
+        """
+        game = self.game_state
+        if game is None or game.active_player is not self:
+            return False
+        if self.lethal_table is None:
+            self.lethal_table = TranspositionTable(solver.LETHAL_TABLE_SIZE)
+        solution = solver.find_lethal(game, table=self.lethal_table)
+        if solution is None:
+            return False
+        if self.log:
+            self.log.emit(events.AILethal(self.name, solution.line))
+        solver.apply_line(game, solution)
+        return True
+
+    def _best_play(self, opponent, ranked=None):
+        """
+        Finds the best play from hand as (score, card, target, singer), considering each
+        affordable card paid for with ink, then each song sung by each ready character able
+        to sing it. Ties go to the first play considered, and only scores above 1 count.
+        Every play considered is also appended to `ranked` when a list is given.
+        """
+        best_play = (1.0, None, None, None)
+        ink = self.ink_ready
+        for card in self.hand:
+            # A. Playing the card normally (paying ink)
+            if ink >= card.cost:
+                play_option = self.score_play(card, opponent)
+                play = (play_option['score'], card, play_option['target'], None)
+                if play[0] > best_play[0]:
+                    best_play = play
+                if ranked is not None:
+                    ranked.append(play)
+
+            # B. Singing the card (if it's a song)
+            if "Song" in card.type:
+                for singer in self.get_ready_characters():
+                    if singer.card.singer >= card.cost:  # Can this character sing this song?
+                        play_option = self.score_play(card, opponent, cost_override=0)
+                        # The cost of singing is losing the singer's quest/challenge action
+                        play = (play_option['score'] - (singer.card.lore or 0), card, play_option['target'], singer)
+                        if play[0] > best_play[0]:
+                            best_play = play
+                        if ranked is not None:
+                            ranked.append(play)
+        return best_play
+
+    def rank_plays(self, opponent):
+        """Returns every play the AI would consider right now as (score, card, target, singer), best first."""
+        ranked = []
+        self._best_play(opponent, ranked)
+        ranked.sort(key=lambda play: play[0], reverse=True)
+        return ranked
 
     def ai_play_cards(self, opponent):
         """Smarter AI logic for playing cards, including choosing targets and singing songs."""
         while True:
-            best_play = {'card': None, 'score': 1.0, 'target': None, 'singer': None} # Score > 1 to play
-
-            # 1. Evaluate all possible plays from hand
-            for card in self.hand:
-                # A. Evaluate playing the card normally (paying ink)
-                if self.get_available_ink() >= card.cost:
-                    play_option = self.score_play(card, opponent)
-                    if play_option['score'] > best_play['score']:
-                        best_play.update(play_option)
-
-                # B. Evaluate singing the card (if it's a song)
-                if "Song" in card.type:
-                    for singer in self.get_ready_characters():
-                        if singer.singer_value >= card.cost:  # Can this character sing this song?
-                            play_option = self.score_play(card, opponent, cost_override=0)
-                            # The cost of singing is losing the singer's quest/challenge action
-                            play_option['score'] -= (singer.card.lore or 0)
-                            if play_option['score'] > best_play['score']:
-                                best_play.update(play_option)
-                                best_play['singer'] = singer
+            # 1. Find the best possible play from hand (score > 1 to play)
+            score, card_to_play, target, singer = self._best_play(opponent)
 
             # 2. Execute the best play found
-            if best_play['card']:
-                card_to_play = best_play['card']
-                target = best_play.get('target')
-                singer = best_play.get('singer')
-
-                if self.game_state.verbose:
-                    play_details = f"playing {card_to_play.name}"
-                    if singer: play_details = f"singing {card_to_play.name} with {singer.card.name}"
-                    if target: play_details += f" targeting {target.card.name}"
-                    print(f"{self.name}'s AI considers {play_details} (Score: {best_play['score']:.2f}) - Ink: {self.get_available_ink()}")
+            if card_to_play:
+                if self.log:
+                    self.log.emit(events.AIPlay(self.name, card_to_play.name, singer.card.name if singer else None,
+                                                target.card.name if target else None, score, self.ink_ready))
 
                 success = False
                 if card_to_play.type == 'Character':
@@ -324,8 +508,8 @@ class Player:
                     success = self.play_action(card_to_play, ability_target=target, singer=singer)
 
                 if not success:
-                    if self.game_state.verbose:
-                        print(f"AI play failed for {card_to_play.name}. Stopping further plays.")
+                    if self.log:
+                        self.log.emit(events.AIPlayFailed(self.name, card_to_play.name))
                     break  # Stop if a play fails
             else:
                 break  # No more good plays found
@@ -337,7 +521,7 @@ class Player:
 
         # Check for a valid target BEFORE paying any costs.
         if not AbilityResolver.is_valid_target(ability_target, self):
-            # The resolver itself will print the reason if verbose is on
+            # The resolver itself reports the reason to the event log
             return False
 
         play_cost = card_from_hand.cost
@@ -348,8 +532,8 @@ class Player:
 
         if can_sing:
             singer.exert()
-            if self.game_state.verbose:
-                print(f"{self.name}'s {singer.card.name} sings {card_from_hand.name}.")
+            if self.log:
+                self.log.emit(events.Sang(self.name, singer.card.name, card_from_hand.name))
             payment_successful = True
         else:
             payment_successful = self.exert_ink(play_cost)
@@ -357,10 +541,12 @@ class Player:
         if payment_successful:
             self.hand.remove(card_from_hand)
             self.discard_pile.append(card_from_hand)
-            if self.game_state.verbose and not can_sing:
-                print(f"{self.name} played action: {card_from_hand.name} for {play_cost} ink.")
+            self.hand_hash -= card_from_hand.zobrist
+            self.discard_hash += card_from_hand.zobrist
+            if self.log and not can_sing:
+                self.log.emit(events.Played(self.name, card_from_hand.name, 'Action', play_cost, None))
         
-            for ability in card_from_hand.parsed_abilities:
+            for ability in card_from_hand.abilities:
                 AbilityResolver.resolve_ability(ability, card_from_hand, self, target=ability_target)
             return True
         
@@ -398,13 +584,41 @@ class Player:
         return best_target, highest_threat_score
 
     def score_play(self, card, opponent, cost_override=None):
-        """Scores a potential card play based on context, returning a dict with score and target."""
-        play_cost = cost_override if cost_override is not None else card.cost
-        best_option = {'score': 0, 'target': None, 'card': card}
+        """
+        Scores a potential card play based on context, returning a dict with score and target.
 
-        if play_cost > self.get_available_ink() and cost_override is None:
-            return best_option
+        Characters and locations are scored from the boards' running totals directly. Actions
+        search the opposing board for targets, so their value before normalizing by cost is
+        cached until that board, the opponent's lore or our hand size changes. Re-scoring the
+        hand after a play, or a song for every possible singer, then only re-evaluates what
+        the play affected.
+        """
+        play_cost = cost_override if cost_override is not None else card.cost
+        if play_cost > self.ink_ready and cost_override is None:
+            return {'score': 0, 'target': None, 'card': card}
 
+        card_type = card.type
+        if card_type == "Character" or card_type == "Location":
+            self.score_evaluations += 1
+            value, target, is_final = self._evaluate_play(card, opponent)
+        else:
+            inputs = (opponent.characters_in_play.version, opponent.lore, len(self.hand))
+            cached = self.score_cache.get(card)
+            if cached is not None and cached[0] == inputs:
+                value, target, is_final = cached[1]
+            else:
+                self.score_evaluations += 1
+                result = self._evaluate_play(card, opponent)
+                self.score_cache[card] = (inputs, result)
+                value, target, is_final = result
+
+        if not is_final:
+            value = value / (play_cost + 1) if value > 0 else 0  # Normalize by cost
+        return {'score': value, 'target': target, 'card': card}
+
+    def _evaluate_play(self, card, opponent):
+        """Returns (value, target, is_final) for score_play, which normalizes value by cost unless is_final."""
+        target = None
         score = 0
         # --- Character Evaluation ---
         if card.type == "Character":
@@ -417,14 +631,14 @@ class Player:
 
             # Add a bonus based on the opponent's board presence. Playing a character is more valuable
             # when needing to respond to threats.
-            opponent_threat = sum((c.card.strength or 0) + (c.card.lore or 0) for c in opponent.characters_in_play)
+            opponent_threat = opponent.characters_in_play.threat
             score += opponent_threat * 0.5  # Add 50% of opponent's threat to our score
 
             # Strategic keywords are more valuable when there's a board to interact with
-            if 'rush' in card.keywords: score += opponent_threat * 0.5 # Rush is for immediate trades
-            if 'evasive' in card.keywords: score += 2
-            if 'ward' in card.keywords: score += 3
-            if 'bodyguard' in card.keywords:
+            if card.has_rush: score += opponent_threat * 0.5 # Rush is for immediate trades
+            if card.has_evasive: score += 2
+            if card.has_ward: score += 3
+            if card.has_bodyguard:
                 # Bodyguard is valuable to protect high-lore characters or against a big board
                 if any(c.card.lore >= 2 for c in self.characters_in_play):
                     score += 4
@@ -437,30 +651,27 @@ class Player:
         # --- Action/Song Evaluation ---
         elif card.type in ("Action", "Action - Song"):
             score = 1.0  # Base score for any action to ensure it's considered
-            for ability in card.parsed_abilities:
-                effect = ability.get('effect')
+            for ability in card.abilities:
+                effect = ability.effect
                 if effect == 'DrawCard':
                     card_draw_bonus = max(0, 6 - len(self.hand))
-                    score += int(ability.get('value', 1)) * card_draw_bonus
+                    score += (ability.value if ability.value is not None else 1) * card_draw_bonus
                 elif effect == 'BanishCharacter':
                     # Prioritize board wipes against a wide board
-                    if ability.get('target') == 'all' and len(opponent.characters_in_play) >= 3:
-                        return {'score': 100.0, 'target': None, 'card': card}  # This is the best possible play
+                    if ability.target == 'all' and len(opponent.characters_in_play) >= 3:
+                        return 100.0, None, True  # This is the best possible play, whatever it costs
 
                     best_target, highest_threat = self.find_best_threat(opponent)
                     if best_target:
                         score += highest_threat
-                        best_option['target'] = best_target
+                        target = best_target
                 elif effect == 'DealDamage':
-                    best_target, highest_threat = self.find_best_threat(opponent, damage=int(ability.get('value', 1)))
+                    best_target, highest_threat = self.find_best_threat(opponent, damage=ability.value if ability.value is not None else 1)
                     if best_target:
                         score += highest_threat
-                        best_option['target'] = best_target
-        
-        if score > 0:
-            best_option['score'] = score / (play_cost + 1) # Normalize by cost
-        
-        return best_option
+                        target = best_target
+
+        return score, target, False
 
     def ai_move_characters_to_locations(self):
         """Smarter AI logic for moving characters to locations."""
@@ -480,8 +691,8 @@ class Player:
                     continue
 
                 move_score = (loc.card.lore or 0) * 3 - move_cost
-                for ability in loc.card.parsed_abilities:
-                    if ability['trigger'] == 'OnBanishmentAtLocation' and ability['effect'] == 'DrawCard':
+                for ability in loc.card.abilities_by_trigger.get('OnBanishmentAtLocation', ()):
+                    if ability.effect == 'DrawCard':
                         card_draw_bonus = max(0, 4 - len(self.hand))
                         move_score += card_draw_bonus * 2
 
@@ -490,8 +701,9 @@ class Player:
                     best_location = loc
 
             if best_location and best_move_score > questing_score:
-                if self.game_state.verbose:
-                    print(f"{self.name}'s AI is moving {char.card.name} to {best_location.card.name} (Score: {best_move_score:.2f} vs Questing: {questing_score}) - Ink: {self.get_available_ink()}")
+                if self.log:
+                    self.log.emit(events.AIMove(self.name, char.card.name, best_location.card.name, best_move_score,
+                                                questing_score, self.ink_ready))
                 self.move_character_to_location(char, best_location)
 
     def ai_character_actions(self, opponent):
@@ -526,26 +738,28 @@ class Player:
                         best_challenge_option['target'] = target
 
             # Reckless characters MUST challenge if a target is available.
-            is_reckless = 'reckless' in char.card.keywords
+            is_reckless = char.card.has_reckless
             if is_reckless and best_challenge_option['target']:
-                if self.game_state.verbose:
-                    print(f"{self.name}'s AI is forced to make a RECKLESS challenge with {char.card.name} against {best_challenge_option['target'].card.name}.")
+                if self.log:
+                    self.log.emit(events.AIChallenge(self.name, char.card.name, best_challenge_option['target'].card.name,
+                                                     'RECKLESS', best_challenge_option['score'], self.ink_ready))
                 self.challenge(char, best_challenge_option['target'])
                 continue  # Move to the next character
 
             # Normal decision logic
             challenge_threshold = 50 if desperation_mode else (char.card.lore or 0) + 2
             if best_challenge_option['score'] > challenge_threshold:
-                if self.game_state.verbose:
+                if self.log:
                     mode = "DESPERATE" if desperation_mode else "strategic"
-                    print(f"{self.name}'s AI is making a {mode} challenge with {char.card.name} against {best_challenge_option['target'].card.name} (Score: {best_challenge_option['score']}) - Ink: {self.get_available_ink()}")
+                    self.log.emit(events.AIChallenge(self.name, char.card.name, best_challenge_option['target'].card.name,
+                                                     mode, best_challenge_option['score'], self.ink_ready))
                 self.challenge(char, best_challenge_option['target'])
             elif char.can_quest():
                 # In desperation mode, DON'T quest if you could have challenged a threat.
                 if desperation_mode and best_challenge_option['score'] > 0:
                     continue
-                if self.game_state.verbose:
-                    print(f"{self.name}'s AI is questing with {char.card.name} for {char.card.lore} lore.")
+                if self.log:
+                    self.log.emit(events.AIQuest(self.name, char.card.name, char.card.lore))
                 self.quest(char)
 
 
@@ -0,0 +1,22 @@
+"""
+This module contains helpers for reproducible randomness. Every game owns its own
+random.Random instance, and seeds for individual games are derived from a run seed so
+that any single game can be replayed on its own.
+"""
+import hashlib
+import random
+
+
+def derive_seed(*parts):
+    """
+    Derives a 64-bit seed from a run seed and any identifying parts (e.g. generation,
+    candidate, meta deck, game index). The same parts always give the same seed, and
+    different parts give statistically independent streams.
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def new_run_seed():
+    """Returns a fresh 64-bit seed for a run that was started without one."""
+    return random.SystemRandom().getrandbits(64)
@@ -0,0 +1,133 @@
+"""
+This module publishes a card pool once into a block of shared memory, so simulation
+workers attach to it by name instead of each receiving (and, under the spawn start
+method, unpickling) a copy of every card.
+
+The block holds every card of the pool's CardTable pickled on its own, found through an
+offset table, and the batch engine's numeric card columns (see batch.card_columns).
+A worker's SharedCardTable unpickles a card the first time a task names it, so
+attaching only maps the block, and a worker's memory grows with the cards its games use
+rather than with the pool. The numeric columns are read in place by every worker.
+
+The process that publishes the block owns it and must close() it once the workers are
+done with it; workers never write to it.
+"""
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import batch
+from .card import CardTable, card_table
+
+# Array sections are aligned so NumPy can view them in place
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class SharedCardPool:
+    """
+    Publishes a card map's CardTable (or `table`, the one given) into a new shared memory
+    block. `name` is what workers pass to SharedCardTable to attach.
+    """
+
+    def __init__(self, all_cards, table=None):
+        table = table if table is not None else card_table(all_cards)
+        blobs = [pickle.dumps(card, pickle.HIGHEST_PROTOCOL) for card in table.cards]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+        arrays = {"offsets": offsets, **batch.card_columns(table.cards)}
+
+        # Layout: manifest length (8 bytes), pickled manifest, aligned arrays, card blobs
+        sections, position = {}, 0
+        for name, array in arrays.items():
+            sections[name] = (array.dtype.str, len(array), position)
+            position = _aligned(position + array.nbytes)
+        manifest = {"count": len(blobs), "arrays": sections, "arrays_size": position}
+        header = pickle.dumps(manifest, pickle.HIGHEST_PROTOCOL)
+        arrays_start = _aligned(8 + len(header))
+        blobs_start = arrays_start + position
+
+        self.block = shared_memory.SharedMemory(create=True, size=max(1, blobs_start + int(offsets[-1])))
+        self.name = self.block.name
+        buffer = self.block.buf
+        buffer[:8] = len(header).to_bytes(8, 'little')
+        buffer[8:8 + len(header)] = header
+        for name, array in arrays.items():
+            start = arrays_start + sections[name][2]
+            buffer[start:start + array.nbytes] = array.tobytes()
+        buffer[blobs_start:blobs_start + int(offsets[-1])] = b"".join(blobs)
+        del buffer
+        self.cards = len(blobs)
+        self.size = self.block.size
+
+    def close(self):
+        """Frees the block. Workers still attached keep their mapping until they exit."""
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+class SharedCardTable:
+    """
+    A worker's read-only view of a published card pool, used like a CardTable: indexing
+    and lookup() return Card objects, unpickled once each on first use.
+    """
+
+    indices = staticmethod(CardTable.indices)
+
+    def __init__(self, name):
+        self.block = shared_memory.SharedMemory(name=name)
+        buffer = self.block.buf
+        header_size = int.from_bytes(buffer[:8], 'little')
+        manifest = pickle.loads(buffer[8:8 + header_size])
+        arrays_start = _aligned(8 + header_size)
+        arrays = {}
+        for array_name, (dtype, length, offset) in manifest["arrays"].items():
+            array = np.frombuffer(buffer, dtype=dtype, count=length, offset=arrays_start + offset)
+            array.flags.writeable = False
+            arrays[array_name] = array
+        self.offsets = arrays.pop("offsets").tolist()
+        self.batch_columns = arrays
+        self._blobs = buffer[arrays_start + manifest["arrays_size"]:]
+        self._cards = [None] * manifest["count"]
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __getitem__(self, index):
+        card = self._cards[index]
+        if card is None:
+            card = self._cards[index] = pickle.loads(self._blobs[self.offsets[index]:self.offsets[index + 1]])
+        return card
+
+    def lookup(self, indices):
+        """Returns the cards for a list (or array) of indices, unpickling any not seen yet."""
+        cards = self._cards
+        found = [cards[index] for index in indices]
+        if None in found:
+            found = [self[index] for index in indices]
+        return found
+
+    @property
+    def cards(self):
+        """Every card, in index order (unpickles the whole pool)."""
+        return tuple(self[index] for index in range(len(self._cards)))
+
+    def close(self):
+        """Detaches from the block. The cards already unpickled stay usable."""
+        if self.block is not None:
+            self.batch_columns = None
+            batch._pool_arrays.cache_clear()  # It may hold views of the block
+            self._blobs.release()
+            self.block.close()
+            self.block = None
+
+    @property
+    def loaded(self):
+        """How many cards this process has unpickled so far."""
+        return len(self._cards) - self._cards.count(None)
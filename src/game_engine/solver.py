@@ -0,0 +1,354 @@
+"""
+This module solves the active player's turn exactly: it searches every line of play this
+turn (with pruning, and a transposition table so lines that reach the same position by a
+different order are searched once) and reports the best one.
+
+Two objectives are supported:
+    'lore'  - gain as much lore as possible; the position is lethal if the best line
+              reaches 20. Ties go to the line found first.
+    'clear' - leave the opponent as little questing lore as possible for their next turn
+              (e.g. whether challenges can clear every quester), then gain the most lore.
+
+Lines only contain moves that can matter this turn: moving to a location, playing a
+location, and playing a character with no Rush and no abilities (other than by Shift)
+can't gain lore or remove characters this turn, so they are left out. Cards drawn during
+the line come from the position's actual deck order, unless the solve is told the draws are
+unknown (as when the AI looks for lethal, since a player can't see their deck): then cards
+drawn during the line can't be played, inked or sung in it.
+
+Positions can be exported to and imported from plain dicts (e.g. JSON) with
+export_position and import_position, so interesting positions can be saved and solved later.
+"""
+import time
+from collections import namedtuple
+from itertools import islice
+
+from . import moves
+from .board_character import BoardCharacter
+from .board_location import BoardLocation
+from .zobrist import TranspositionTable, mix
+
+OBJECTIVES = ('lore', 'clear')
+
+# `value` is what the objective maximised, `lethal` whether the line wins this turn, `lore`
+# the active player's lore after it and `opponent_lore` the lore the opponent's remaining
+# characters could quest for next turn. `line` describes each move (see moves.describe)
+# and `indices` gives each move's position in legal_moves(), for apply_line. `complete` is
+# False if the node limit stopped the search, in which case the line is the best found.
+# `table` is the TranspositionTable used, whose stats() give its hit rate and memory use.
+Solution = namedtuple('Solution', ['objective', 'value', 'lethal', 'lore', 'opponent_lore', 'line', 'indices',
+                                   'nodes', 'seconds', 'nodes_per_second', 'complete', 'table'])
+
+
+# Search order: moves that gain lore directly come first, so lethal lines are found early
+MOVE_ORDER = {'quest': 0, 'sing': 1, 'play': 2, 'challenge': 3, 'ink': 4}
+# Moves that use a card from hand
+HAND_MOVES = ('ink', 'play', 'sing')
+# Slots in the TranspositionTable of a find_lethal search
+LETHAL_TABLE_SIZE = 1 << 10
+
+
+def _useful_moves(game, playable=None):
+    """
+    Returns (index in legal_moves(), move) for the moves that can matter this turn, in search
+    order. `playable`, if given, counts the copies of each card the line may still use from
+    hand; cards it doesn't count (those drawn during the line) are left out.
+    """
+    useful = []
+    for index, move in enumerate(game.legal_moves()):
+        kind = move.kind
+        if kind == 'end_turn' or kind == 'move':
+            continue
+        if playable is not None and kind in HAND_MOVES and not playable.get(move.card):
+            continue
+        if kind == 'play':
+            card = move.card
+            if card.type == 'Location':
+                continue
+            if card.type == 'Character' and move.character is None and not card.has_rush and not card.abilities:
+                continue
+        elif kind == 'quest':
+            if move.character.is_banished:
+                continue
+        elif kind == 'challenge':
+            if move.character.is_banished or move.target.is_banished:
+                continue
+        if move.target is not None and move.target.is_banished:
+            continue
+        useful.append((index, move))
+    useful.sort(key=lambda entry: MOVE_ORDER[entry[1].kind])
+    return useful
+
+
+def _lore_bound(game, known_draws=True):
+    """
+    An upper bound on the lore the active player can still gain this turn: their characters
+    able to quest, plus what the cards in hand (and, with `known_draws`, any cards those
+    could draw, from the top of the deck) could add by gaining lore or by a Shift readying
+    a quester.
+    """
+    player = game.active_player
+    bound = 0
+    for character in player.characters_in_play:
+        if character.can_quest() and not character.is_banished:
+            bound += character.card.lore or 0
+    cards = list(player.hand)
+    drawn = 0
+    while cards:
+        card = cards.pop()
+        if card.shift_cost is not None:
+            bound += card.lore or 0  # A Shift can put a ready character in place of an exerted one
+        for ability in card.abilities:
+            if ability.effect == 'GainLore':
+                bound += ability.value
+            elif ability.effect == 'DrawCard' and known_draws:
+                count = min(ability.value, len(player.deck) - drawn)
+                cards.extend(player.deck[i] for i in range(drawn, drawn + count))
+                drawn += count
+    return bound
+
+
+def _opponent_lore(game):
+    """The lore the opponent's characters still in play could quest for on their next turn."""
+    return sum(c.card.lore or 0 for c in game.opponent.characters_in_play if not c.is_banished)
+
+
+class _Search:
+    """One solve: the objective, node budget and transposition table, and the counters."""
+
+    def __init__(self, game, objective, max_nodes, table, target, known_draws=True):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective: {objective!r} (expected one of {OBJECTIVES})")
+        self.game = game
+        self.player = game.active_player
+        self.objective = objective
+        self.max_nodes = max_nodes
+        self.table = table
+        self.target = target
+        self.known_draws = known_draws
+        # With unknown draws, the copies of each card in hand the line may still use
+        self.playable = None
+        if not known_draws:
+            self.playable = {}
+            for card in self.player.hand:
+                self.playable[card] = self.playable.get(card, 0) + 1
+        # Values depend on the objective, target and draws, so a shared table keeps them apart
+        self.salt = mix(OBJECTIVES.index(objective) << 32 | (target or 0) << 1 | known_draws)
+        self.nodes = 0
+        self.complete = True
+        self.path = []  # (index, move) from the root to the current position
+        # Nothing beats a win under 'lore', so the first winning line found is the answer
+        self.winning_line = None
+
+    def moves(self):
+        """The useful moves from the current position (see _useful_moves)."""
+        return _useful_moves(self.game, self.playable)
+
+    def apply(self, move):
+        """Makes a move, counting the card it uses from hand."""
+        if self.playable is not None and move.kind in HAND_MOVES:
+            self.playable[move.card] -= 1
+        self.game.apply_move(move)
+
+    def undo(self, move, snapshot):
+        """Takes back a move made with apply() by restoring the snapshot taken before it."""
+        self.game.restore(snapshot)
+        if self.playable is not None and move.kind in HAND_MOVES:
+            self.playable[move.card] += 1
+
+    def evaluate(self):
+        """The value of ending the turn in the current position; higher is better."""
+        game, player = self.game, self.player
+        won = player.lore >= 20 or (game.game_over and game.winner is player)
+        if self.objective == 'lore':
+            return (won, min(player.lore, 20))
+        return (won, -_opponent_lore(game), min(player.lore, 20))
+
+    def value(self):
+        """The best value reachable from the current position this turn."""
+        game = self.game
+        key = game.zobrist_hash() ^ self.salt
+        known = self.table.lookup(key)
+        if known is not None:
+            return known
+
+        best = self.evaluate()
+        if best[0] or game.game_over:
+            if best[0] and self.winning_line is None and self.objective == 'lore':
+                self.winning_line = ([moves.describe(move) for _, move in self.path],
+                                     [index for index, _ in self.path], self.player.lore, _opponent_lore(game))
+            self.table.store(key, best, depth=0)
+            return best
+        if self.objective == 'lore':
+            bound = _lore_bound(game, self.known_draws)
+            # Nothing left can gain lore (or, looking only for lethal, reach the target)
+            if bound == 0 or (self.target is not None and self.player.lore + bound < self.target):
+                self.table.store(key, best, depth=0)
+                return best
+
+        nodes_before = self.nodes
+        for entry in self.moves():
+            if self.nodes >= self.max_nodes:
+                self.complete = False
+                break
+            snapshot = game.snapshot()
+            self.apply(entry[1])
+            self.nodes += 1
+            self.path.append(entry)
+            child = self.value()
+            self.path.pop()
+            self.undo(entry[1], snapshot)
+            if child > best:
+                best = child
+                if best[0]:
+                    break  # Nothing beats winning
+        if self.complete:
+            # A search cut short only found a lower bound, which mustn't be reused
+            self.table.store(key, best, depth=self.nodes - nodes_before)
+        return best
+
+    def best_line(self, value):
+        """
+        Follows the moves that keep `value` from the root, using the table (or re-searching).
+        Returns the line's descriptions and indices, and the lore and opponent's questing
+        lore at its end.
+        """
+        game = self.game
+        line, indices, made = [], [], []
+        root = game.snapshot()
+        while self.evaluate() != value:
+            for index, move in self.moves():
+                snapshot = game.snapshot()
+                self.apply(move)
+                if self.value() == value:
+                    line.append(moves.describe(move))
+                    indices.append(index)
+                    made.append(move)
+                    break
+                self.undo(move, snapshot)
+            else:
+                break  # Only possible when a node limit cut the search short
+        lore, opponent_lore = self.player.lore, _opponent_lore(game)
+        game.restore(root)
+        if self.playable is not None:
+            for move in made:
+                if move.kind in HAND_MOVES:
+                    self.playable[move.card] += 1
+        return line, indices, lore, opponent_lore
+
+
+def solve_turn(position, objective='lore', max_nodes=200000, table=None, all_cards=None, target=None,
+               known_draws=True):
+    """
+    Exhaustively searches the active player's turn and returns a Solution.
+
+    `position` is a GameState, left unchanged (a silent game is searched in place and
+    restored, one with an event log on a silent clone), or a dict from export_position,
+    which needs `all_cards`. `max_nodes` caps the moves explored.
+    `table` is an optional TranspositionTable to reuse between solves; the solution carries
+    the table used, for its stats(). With `target` (objective 'lore' only), lines that can't
+    reach that much lore are cut off, which answers "can this reach `target`?" much faster
+    but leaves the lore of non-lethal lines a lower bound. Without `known_draws`, the
+    deck's order is treated as unknown: cards drawn during a line aren't used in it.
+    """
+    if isinstance(position, dict):
+        game = import_position(position, all_cards)
+    else:
+        game = position.clone() if position.log else position
+    table = table if table is not None else TranspositionTable()
+    table.new_search()
+    search = _Search(game, objective, max_nodes, table, target, known_draws)
+
+    start = time.perf_counter()
+    value = search.value()
+    seconds = time.perf_counter() - start
+    nodes, complete = search.nodes, search.complete
+    if value[0] and search.winning_line is not None:
+        line, indices, lore, opponent_lore = search.winning_line
+    else:
+        if complete:
+            search.max_nodes = float('inf')  # Finding the line may re-search entries the table dropped
+        line, indices, lore, opponent_lore = search.best_line(value)
+
+    return Solution(
+        objective=objective, value=value, lethal=value[0], lore=lore, opponent_lore=opponent_lore, line=line,
+        indices=indices, nodes=nodes, seconds=seconds, nodes_per_second=nodes / seconds if seconds > 0 else 0.0,
+        complete=complete, table=table,
+    )
+
+
+def apply_line(game, solution):
+    """Plays a solution's line on the game it was solved for (the turn isn't ended)."""
+    for index in solution.indices:
+        game.apply_move(next(islice(game.legal_moves(), index, None)))
+
+
+def find_lethal(game, max_nodes=500, table=None, known_draws=False):
+    """
+    Returns a lethal Solution for the active player's turn, or None if there is none (or
+    none was found within `max_nodes`). Positions whose lore bound can't reach 20 return
+    None without searching. Draws are unknown by default, as they are to the player; pass
+    a `table` to reuse one from turn to turn.
+    """
+    if game.active_player.lore + _lore_bound(game, known_draws) < 20:
+        return None
+    table = table if table is not None else TranspositionTable(LETHAL_TABLE_SIZE)
+    solution = solve_turn(game, 'lore', max_nodes=max_nodes, table=table, target=20, known_draws=known_draws)
+    return solution if solution.lethal else None
+
+
+def export_position(game):
+    """Returns the game's position as a JSON-ready dict of plain values, cards given by api_id."""
+    players = []
+    for player in game.players:
+        locations = player.locations_in_play
+        players.append({
+            "name": player.name,
+            "lore": player.lore,
+            "ink_ready": player.ink_ready,
+            "ink_exerted": player.ink_exerted,
+            "has_inked_this_turn": player.has_inked_this_turn,
+            "has_lost": player.has_lost,
+            "deck": [card.api_id for card in player.deck],
+            "hand": [card.api_id for card in player.hand],
+            "discard": [card.api_id for card in player.discard_pile],
+            "locations": [{"card": location.card.api_id, "damage": location.damage} for location in locations],
+            "characters": [
+                {"card": c.card.api_id, "damage": c.damage, "exerted": c.is_exerted, "newly_played": c.is_newly_played,
+                 "strength_boost": c.temp_strength_boost,
+                 "location": locations.index(c.location) if c.location is not None else None}
+                for c in player.characters_in_play
+            ],
+        })
+    return {"turn": game.current_turn, "active_player": game.active_player_index,
+            "first_player": game.first_player_index, "players": players}
+
+
+def import_position(data, all_cards):
+    """Builds a silent GameState from an export_position dict, looking cards up by api_id in `all_cards`."""
+    from .game_state import GameState
+    game = GameState([], [], all_cards, verbose=False, first_player_index=data["first_player"])
+    game.current_turn = data["turn"]
+    game.active_player_index = data["active_player"]
+    for player, state in zip(game.players, data["players"]):
+        player.name = state["name"]
+        hand = [all_cards[api_id] for api_id in state["hand"]]
+        discard = [all_cards[api_id] for api_id in state["discard"]]
+        locations = []
+        for location_state in state["locations"]:
+            location = BoardLocation(all_cards[location_state["card"]], player)
+            locations.append((location, location_state["damage"]))
+        characters = []
+        for character_state in state["characters"]:
+            character = BoardCharacter(all_cards[character_state["card"]], player)
+            location_index = character_state["location"]
+            characters.append((character, character_state["damage"], character_state["exerted"],
+                               character_state["newly_played"], character_state["strength_boost"],
+                               locations[location_index][0] if location_index is not None else None))
+        player.restore((
+            [all_cards[api_id] for api_id in state["deck"]], hand, discard, state["ink_ready"], state["ink_exerted"],
+            state["lore"], state["has_inked_this_turn"], state["has_lost"],
+            sum(card.zobrist for card in hand), sum(card.zobrist for card in discard),
+            sum(location.card.zobrist for location, _ in locations), characters, locations,
+        ))
+    return game
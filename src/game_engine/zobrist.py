@@ -0,0 +1,163 @@
+"""
+This module provides Zobrist-style position hashing and a transposition table for search.
+
+Every card has a fixed 64-bit key (`Card.zobrist`, derived from its identity so it is the
+same in every process). Players keep running sums of the keys of the cards in their hand,
+discard pile and locations, updated by the zone-mutation methods as cards move. Each
+Board keeps the sum of its characters' state keys, but only notes which characters
+changed and recomputes their keys when it is next hashed, so games that are never hashed
+(the GA's) don't pay for hashing. GameState.zobrist_hash() then combines a handful of
+numbers instead of walking the game. Sums rather than XOR make the zones multisets, so two
+copies of a card never cancel out.
+
+Two positions with the same hash are the same position for search: the same turn and
+active player, lore, ink, flags, hands, discard piles, locations and characters (with
+their damage, exertion, freshness, boosts and locations). A deck is hashed by its size,
+since positions compared within one search come from the same shuffled deck.
+"""
+import sys
+
+from .rng import derive_seed
+
+MASK = (1 << 64) - 1
+
+
+def card_key(card):
+    """The card's 64-bit Zobrist key, derived from its API id and name."""
+    return derive_seed("zobrist", card.api_id, card.name)
+
+
+def mix(value):
+    """Scrambles an integer into a well-distributed 64-bit key (the splitmix64 finalizer)."""
+    value &= MASK
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK
+    return value ^ (value >> 31)
+
+
+def character_key(character):
+    """The key a character in play adds to its Board's hash, covering its card and its state."""
+    state = (character._damage | character._exerted << 8 | character.is_newly_played << 9
+             | character.temp_strength_boost << 10)
+    location = character._location
+    if location is not None:
+        state ^= location.card.zobrist
+    return mix(character.card.zobrist + state)
+
+
+def player_key(player):
+    """The running zone hashes and scalar state of a player, as a tuple of ints."""
+    return (player.lore, player.ink_ready, player.ink_exerted, player.has_inked_this_turn, player.has_lost,
+            len(player.deck), player.hand_hash, player.discard_hash, player.locations_hash,
+            player.characters_in_play.zobrist_hash())
+
+
+def position_hash(game):
+    """Combines the game's turn, active player and both players' running hashes into 64 bits."""
+    # Hashing a tuple of ints is deterministic (no per-process salt) and done in C
+    return hash((game.current_turn, game.active_player_index, game.game_over,
+                 player_key(game.player1), player_key(game.player2))) & MASK
+
+
+def full_hash(game):
+    """
+    Recomputes position_hash() from scratch, ignoring the running sums. It must always
+    equal game.zobrist_hash(); use it to check code that mutates zones directly.
+    """
+    keys = []
+    for player in game.players:
+        board_hash = sum(character_key(c) for c in player.characters_in_play)
+        keys.append((player.lore, player.ink_ready, player.ink_exerted, player.has_inked_this_turn, player.has_lost,
+                     len(player.deck), sum(card.zobrist for card in player.hand),
+                     sum(card.zobrist for card in player.discard_pile),
+                     sum(location.card.zobrist for location in player.locations_in_play), board_hash))
+    return hash((game.current_turn, game.active_player_index, game.game_over, keys[0], keys[1])) & MASK
+
+
+class TranspositionTable:
+    """
+    A bounded table of search results keyed by position hash, so a search can reuse what it
+    learned about a position reached by a different order of moves.
+
+    The table has a fixed number of slots, indexed by the hash. A slot keeps one entry, and a
+    new position claims an occupied slot if it was searched at least as deep as the entry
+    there, or if that entry is from an earlier search (see new_search). `depth` is whatever
+    measure of effort the search uses, e.g. the moves left to explore below the position.
+    """
+
+    def __init__(self, max_entries=1 << 16):
+        if max_entries < 1:
+            raise ValueError("A transposition table needs at least one entry.")
+        self.max_entries = max_entries
+        self.keys = [None] * max_entries
+        self.values = [None] * max_entries
+        self.depths = [0] * max_entries
+        self.generations = [0] * max_entries
+        self.generation = 0
+        self.entries = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def new_search(self):
+        """Marks existing entries as stale, so the next search may replace them regardless of depth."""
+        self.generation += 1
+
+    def lookup(self, key):
+        """Returns the value stored for a position hash, or None."""
+        self.probes += 1
+        slot = key % self.max_entries
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        return None
+
+    def store(self, key, value, depth=0):
+        """Stores a value for a position hash, subject to the replacement policy. Returns True if stored."""
+        slot = key % self.max_entries
+        stored_key = self.keys[slot]
+        if stored_key is None:
+            self.entries += 1
+        elif stored_key != key:
+            if depth < self.depths[slot] and self.generations[slot] == self.generation:
+                self.rejections += 1
+                return False
+            self.replacements += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.generations[slot] = self.generation
+        self.stores += 1
+        return True
+
+    def clear(self):
+        """Empties the table and resets its statistics."""
+        self.__init__(self.max_entries)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def memory_bytes(self):
+        """Approximate memory held by the table: its slot lists, keys and (shallowly) its values."""
+        size = sum(sys.getsizeof(column) for column in (self.keys, self.values, self.depths, self.generations))
+        for key, value in zip(self.keys, self.values):
+            if key is not None:
+                size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
+
+    def stats(self):
+        """Returns the table's usage: entries, capacity, probes, hits, hit rate, stores, replacements, rejections, memory."""
+        return {
+            "entries": self.entries,
+            "capacity": self.max_entries,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "stores": self.stores,
+            "replacements": self.replacements,
+            "rejections": self.rejections,
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -11,16 +11,17 @@ from game_engine.card import Card
 INK_COLORS = ["Amber", "Amethyst", "Emerald", "Ruby", "Sapphire", "Steel"]
 
 
-def generate_random_deck(all_cards_map):
+def generate_random_deck(all_cards_map, rng=random):
     """
     Generates a single random, structurally-sound, and legal 60-card deck.
     This new logic prioritizes 4-of playsets to create more consistent decks.
+    Pass a seeded random.Random as `rng` to make the deck reproducible.
     """
     deck = []
     card_counts = Counter()
 
     # 1. Randomly select two ink colors
-    chosen_inks = random.sample(INK_COLORS, 2)
+    chosen_inks = rng.sample(INK_COLORS, 2)
     # print(f"Generating a new {chosen_inks[0]}/{chosen_inks[1]} deck...") # Too verbose for GA
 
     # 2. Filter the card pool to the chosen inks (plus colorless cards)
@@ -29,7 +30,7 @@ def generate_random_deck(all_cards_map):
     # Ensure the list of available cards is unique by name to avoid duplicates in selection
     unique_cards_by_name = {card.name: card for card in available_cards}
     unique_available_cards = list(unique_cards_by_name.values())
-    random.shuffle(unique_available_cards)
+    rng.shuffle(unique_available_cards)
 
     # 3. Build the deck with a focus on playsets (4-ofs)
     # Aim for around 10-12 playsets and fill the rest
@@ -47,7 +48,7 @@ def generate_random_deck(all_cards_map):
     # 4. Fill the remaining slots to reach 60 cards
     # This part can add 1-ofs, 2-ofs, or 3-ofs to complete the deck
     while len(deck) < 60:
-        candidate_card = random.choice(unique_available_cards)
+        candidate_card = rng.choice(unique_available_cards)
         
         # Add card if we haven't reached its 4-copy limit
         if card_counts[candidate_card.name] < 4:
@@ -62,9 +63,9 @@ def generate_random_deck(all_cards_map):
 
     return deck
 
-def generate_population(size, all_cards_map):
+def generate_population(size, all_cards_map, rng=random):
     """Generates a population of random decks."""
-    return [generate_random_deck(all_cards_map) for _ in range(size)]
+    return [generate_random_deck(all_cards_map, rng) for _ in range(size)]
 
 if __name__ == '__main__':
     # Example of how to use the generator
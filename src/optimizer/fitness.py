@@ -1,15 +1,28 @@
 import sys
 import os
-from collections import Counter
+from array import array
+from collections import Counter, namedtuple
+import multiprocessing
 from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
 import configparser
+import math
+import random
+import statistics
+import time
+import weakref
 
 # Add the src directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from game_engine import batch as batch_engine
+from game_engine.card import card_table
 from game_engine.game_state import GameState
+from game_engine.mcts import MCTSController
 from game_engine.player import Player
+from game_engine.shared_cards import SharedCardPool, SharedCardTable
+from game_engine.rng import derive_seed, new_run_seed
+from optimizer.fitness_cache import FitnessCache, mean_win_rate
 
 config = configparser.ConfigParser()
 config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config.ini'))
@@ -17,36 +30,636 @@ config.read(config_path)
 
 sim_config = config['simulation']
 GAMES_PER_MATCHUP = sim_config.getint('games_per_matchup', 20)
+# Common random numbers: every candidate in a batch plays each meta deck under the same game
+# seeds (same shuffles), so differences between candidates aren't swamped by shuffle noise.
+COMMON_RANDOM_NUMBERS = sim_config.getboolean('common_random_numbers', False)
+# Antithetic pairs: games are played in pairs that share a seed (identical shuffles) with the
+# candidate on the play in one and on the draw in the other, cancelling first-player bias.
+# An odd GAMES_PER_MATCHUP is rounded up to whole pairs (see _matchup_games).
+ANTITHETIC_PAIRS = sim_config.getboolean('antithetic_pairs', False)
+# Sequential stopping: calculate_fitness plays each matchup in rounds and stops a matchup once
+# its Wilson interval excludes 50% (after a minimum number of games), so lopsided matchups
+# don't use up the full GAMES_PER_MATCHUP. GAMES_BUDGET caps the games per call (0 = no cap).
+SEQUENTIAL_STOPPING = sim_config.getboolean('sequential_stopping', False)
+SEQUENTIAL_MIN_GAMES = sim_config.getint('sequential_min_games', 8)
+SEQUENTIAL_CONFIDENCE_Z = sim_config.getfloat('sequential_confidence_z', 1.96)
+GAMES_BUDGET = sim_config.getint('games_budget', 0)
+# Racing: calculate_fitness_batch plays RACING_INITIAL_GAMES per matchup for every candidate,
+# then keeps adding games only for candidates whose Beta posterior might still place them
+# among the parents (P(top-K) between RACING_CONFIDENCE and 1 - RACING_CONFIDENCE).
+RACING = sim_config.getboolean('racing', False)
+RACING_INITIAL_GAMES = sim_config.getint('racing_initial_games', 2)
+RACING_CONFIDENCE = sim_config.getfloat('racing_confidence', 0.05)
+RACING_SAMPLES = sim_config.getint('racing_samples', 200)
+# Adjudication: games end as soon as their result is forced (see GameState.adjudicate_game).
+ADJUDICATE = sim_config.getboolean('adjudicate', False)
+# Lethal search: the greedy AI asks the turn solver for a winning line from 14 lore (see
+# Player.ai_play_lethal). It makes a stronger opponent, so fitness isn't comparable across it.
+LETHAL_SEARCH = sim_config.getboolean('lethal_search', False)
+# Shared card pool: create_worker_pool publishes the cards once into shared memory that the
+# workers attach to (see game_engine.shared_cards), instead of sending each worker a copy.
+SHARED_CARD_POOL = sim_config.getboolean('shared_card_pool', False)
+# Batch engine: workers play games whose decks are all supported cards (see game_engine.batch)
+# BATCH_SIZE at a time as NumPy arrays, and the rest with GameState, one at a time.
+BATCH_ENGINE = sim_config.getboolean('batch_engine', False)
+BATCH_SIZE = sim_config.getint('batch_size', 256)
+# Chunking: games reach the workers as chunks of one matchup's games (see GameChunk), packed
+# into jobs sized so a job takes about CHUNK_TARGET_SECONDS at the observed time per game.
+CHUNK_TARGET_SECONDS = sim_config.getfloat('chunk_target_seconds', 0.05)
+
+# MCTS: calculate_fitness can have the MCTS AI (see game_engine.mcts) pilot the candidate's
+# seat, or both seats, instead of the greedy AI. It is far slower, so evolution always uses
+# the greedy AI and only the final evaluation of the best deck may use MCTS.
+# `time_limit` is in seconds per decision (0 = rollout budget only).
+MCTSSettings = namedtuple('MCTSSettings', ['rollouts', 'time_limit', 'exploration', 'seats'],
+                          defaults=(0, 1.4, 'candidate'))
+mcts_config = config['mcts']
+FINAL_EVALUATION_MCTS = MCTSSettings(
+    rollouts=mcts_config.getint('rollouts', 64),
+    time_limit=mcts_config.getfloat('time_limit', 0),
+    exploration=mcts_config.getfloat('exploration', 1.4),
+    seats=mcts_config.get('seats', 'candidate'),
+) if mcts_config.getboolean('final_evaluation', False) else None
+
+# Statistics about the most recent calculate_fitness_batch call, for per-generation reporting.
+last_batch_report = {}
+
+# Outcome of one simulated game, as returned by the workers.
+GameResult = namedtuple('GameResult', ['candidate_idx', 'meta_deck_name', 'seed', 'candidate_on_play', 'win',
+                                       'turns', 'turns_saved'], defaults=(0, 0))
+# A run of consecutive games of one matchup, as sent to the workers: both decklists (as card
+# indices) cross the process boundary once per chunk, and the worker derives every game's
+# seed and seats from the plan's seed and the game indices, like _build_tasks.
+GameChunk = namedtuple('GameChunk', ['candidate_idx', 'candidate_deck', 'meta_idx', 'meta_deck', 'seed',
+                                     'first_game', 'games', 'common_random_numbers', 'antithetic_pairs', 'mcts'])
+# A chunk's outcome, as returned by the workers: its totals and the candidate's on-the-play
+# split, plus a bitmask of wins (bit i for game first_game + i) and each game's turns and
+# turns saved as unsigned 16-bit arrays, from which game_results rebuilds the per-game GameResults.
+# `seconds` is the chunk's share of its job's playing time.
+ChunkResult = namedtuple('ChunkResult', ['candidate_idx', 'meta_idx', 'first_game', 'games', 'wins', 'win_mask',
+                                         'games_on_play', 'wins_on_play', 'turns', 'turns_saved', 'seconds'])
+
+# Observed seconds per game, with and without the batch engine, for sizing jobs
+game_seconds = {False: None, True: None}
 
 # --- Worker Setup for Multiprocessing ---
 worker_all_cards_map = None
+# Tasks name cards by their index in this table (see game_engine.card.CardTable)
+worker_card_table = None
+# The GameState this worker resets for each of its games (see GameState.reset)
+worker_game = None
 
-def init_worker(all_cards_map_data):
-    """Initializes the worker process with the global card map."""
-    global worker_all_cards_map
+def init_worker(all_cards_map_data, table=None):
+    """Initializes the worker process with the global card map and its card table (by default the map's own)."""
+    global worker_all_cards_map, worker_card_table
     worker_all_cards_map = all_cards_map_data
+    worker_card_table = table if table is not None else card_table(all_cards_map_data)
+
+def init_shared_worker(shared_pool_name):
+    """Initializes the worker process by attaching to a published SharedCardPool (there is no card map)."""
+    global worker_all_cards_map, worker_card_table
+    worker_all_cards_map = None
+    worker_card_table = SharedCardTable(shared_pool_name)
+
+class WorkerPool:
+    """
+    A simulation pool as create_worker_pool returns it: a multiprocessing Pool (whose methods
+    it passes through), its number of worker `processes`, the CardTable (`table`) its workers
+    decode tasks with, and the SharedCardPool its workers attached to, if any.
+
+    The shared block is freed as soon as the workers are gone: by join() after close(), by
+    terminate(), or on leaving a `with` block. Closing a shared pool but never joining it
+    leaves the block to be freed when the pool is garbage collected or at exit.
+    """
+
+    def __init__(self, pool, processes, table, shared_cards=None):
+        self.pool = pool
+        self.processes = processes
+        self.table = table
+        self.shared_cards = shared_cards
+        if shared_cards is not None:
+            weakref.finalize(self, shared_cards.close)
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+    def close(self):
+        self.pool.close()
+
+    def join(self):
+        self.pool.join()
+        self._release()
+
+    def terminate(self):
+        self.pool.terminate()
+        self._release()
+
+    def _release(self):
+        if self.shared_cards is not None:
+            self.shared_cards.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+def create_worker_pool(all_cards_map, processes=None, shared_cards=None, start_method=None, table=None):
+    """
+    Creates a long-lived simulation pool (a WorkerPool) whose workers already hold the cards.
+
+    The pool is meant to be created once per optimizer run and handed to every
+    calculate_fitness call, so the cards reach each worker only once and per-candidate
+    overhead is just task dispatch. The caller owns the pool and must shut it down
+    (close/join, or terminate), e.g. by using it as a context manager.
+
+    `table` is the CardTable whose indices the tasks will carry, by default the map's own
+    (see card_table). The workers decode tasks with it, and it is kept on the pool so
+    callers encode tasks with the same table.
+
+    Without `shared_cards` (default SHARED_CARD_POOL) the card map is pickled to each worker.
+    With it the cards are published once into shared memory that the workers attach to,
+    and the block is freed when the pool is shut down (see WorkerPool).
+    `start_method` picks a multiprocessing start method ('fork', 'spawn', ...) for the pool.
+    """
+    if table is None:
+        table = card_table(all_cards_map)
+    if shared_cards is None:
+        shared_cards = SHARED_CARD_POOL
+    pool_class = multiprocessing.get_context(start_method).Pool if start_method else Pool
+    processes = processes or cpu_count()
+    if shared_cards:
+        shared_pool = SharedCardPool(all_cards_map, table)
+        try:
+            pool = pool_class(processes=processes, initializer=init_shared_worker,
+                              initargs=(shared_pool.name,))
+        except BaseException:
+            shared_pool.close()
+            raise
+        return WorkerPool(pool, processes, table, shared_pool)
+    return WorkerPool(pool_class(processes=processes, initializer=init_worker, initargs=(all_cards_map, table)),
+                      processes, table)
+
+def _task_table(pool, all_cards_map):
+    """The CardTable to encode tasks for `pool` with: the one its workers decode with, if known."""
+    return pool.table if isinstance(pool, WorkerPool) else card_table(all_cards_map)
+
+def worker_memory_report(_=None):
+    """
+    Worker function reporting the worker's pid, resident memory (KiB) and the cards it
+    holds (for a shared pool, the cards it has unpickled so far).
+    """
+    loaded = getattr(worker_card_table, 'loaded', None)
+    return {"pid": os.getpid(), "rss_kib": _rss_kib(),
+            "cards_loaded": loaded if loaded is not None else len(worker_card_table or ())}
+
+def _rss_kib():
+    """This process's current resident set size in KiB, or its peak where /proc isn't available."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _mcts_controllers(mcts, seed):
+    """Builds the (candidate, meta deck) seat controllers for MCTSSettings, seeded from the game's seed."""
+    if mcts is None:
+        return None
+    controllers = [MCTSController(mcts.rollouts, mcts.time_limit, mcts.exploration, seed=derive_seed(seed, "mcts", seat))
+                   for seat in range(2)]
+    if mcts.seats == 'both':
+        return tuple(controllers)
+    if mcts.seats == 'candidate':
+        return (controllers[0], None)
+    raise ValueError(f"Unknown MCTS seats setting: {mcts.seats!r} (expected 'candidate' or 'both')")
+
+def _play_game(candidate_deck_cards, meta_deck_cards, seed, candidate_on_play, mcts=None):
+    """
+    Plays one seeded game in this worker. Returns (win, turns, turns_saved) for the candidate.
+    The worker's GameState is reset for each game rather than built anew, which plays the
+    same game but reuses its players, zones and board characters.
+    """
+    global worker_game
+    first_player_index = 0 if candidate_on_play else 1
+    controllers = _mcts_controllers(mcts, seed)
+    game = worker_game
+    if (game is None or game.all_cards is not worker_all_cards_map or game.adjudicate != ADJUDICATE
+            or game.lethal_search != LETHAL_SEARCH):
+        game = worker_game = GameState(
+            player1_deck=candidate_deck_cards,
+            player2_deck=meta_deck_cards,
+            all_cards=worker_all_cards_map,
+            verbose=False,
+            seed=seed,
+            first_player_index=first_player_index,
+            adjudicate=ADJUDICATE,
+            controllers=controllers,
+            lethal_search=LETHAL_SEARCH
+        )
+    else:
+        game.reset(candidate_deck_cards, meta_deck_cards, seed=seed, first_player_index=first_player_index,
+                   controllers=controllers)
+    game.run_simulation()
+    # The winner is one of the Player objects created inside the GameState instance.
+    return 1 if game.winner == game.player1 else 0, game.current_turn, game.turns_saved
 
 def run_single_game(args):
-    """Worker function for multiprocessing. Runs a single game simulation."""
-    candidate_deck_ids, meta_deck_ids, meta_deck_name = args
-    
-    # Reconstruct card lists from IDs using the worker's global map
-    candidate_deck_cards = [worker_all_cards_map[api_id] for api_id in candidate_deck_ids]
-    meta_deck_cards = [worker_all_cards_map[api_id] for api_id in meta_deck_ids]
+    """
+    Worker function for multiprocessing. Runs a single, seeded game simulation, with the
+    greedy AI in both seats unless the task carries MCTSSettings as a seventh element.
+    """
+    candidate_idx, candidate_deck_indices, meta_deck_indices, meta_deck_name, seed, candidate_on_play = args[:6]
+    mcts = args[6] if len(args) > 6 else None
+
+    # Reconstruct card lists from card indices using the worker's card table
+    candidate_deck_cards = worker_card_table.lookup(candidate_deck_indices)
+    meta_deck_cards = worker_card_table.lookup(meta_deck_indices)
+    win, turns, turns_saved = _play_game(candidate_deck_cards, meta_deck_cards, seed, candidate_on_play, mcts)
+    return GameResult(candidate_idx, meta_deck_name, seed, candidate_on_play, win, turns, turns_saved)
 
-    # GameState constructor expects deck_cards lists, not Player objects, and also the all_cards map.
+def run_game_chunks(job):
+    """
+    Worker function for multiprocessing. Plays a job, a (chunks, use_batch_engine) pair, and
+    returns a ChunkResult per GameChunk, in order. With use_batch_engine, the greedy-AI
+    games between decks of supported cards are played together on the batch engine.
+    """
+    chunks, use_batch_engine = job
+    start = time.perf_counter()
+    seats, outcomes = [], []
+    batched, batch_games = [], []
+    supported = {}  # By decklist; chunks sharing a decklist share the list object
+    for position, chunk in enumerate(chunks):
+        chunk_seats = [_game_seed(chunk.seed, chunk.candidate_idx, chunk.meta_idx, game_idx,
+                                  chunk.common_random_numbers, chunk.antithetic_pairs)
+                       for game_idx in range(chunk.first_game, chunk.first_game + chunk.games)]
+        chunk_outcomes = [None] * chunk.games
+        seats.append(chunk_seats)
+        outcomes.append(chunk_outcomes)
+        if use_batch_engine and chunk.mcts is None:
+            for deck in (chunk.candidate_deck, chunk.meta_deck):
+                if id(deck) not in supported:
+                    supported[id(deck)] = batch_engine.deck_indices_supported(worker_card_table, deck)
+            if supported[id(chunk.candidate_deck)] and supported[id(chunk.meta_deck)]:
+                for offset, (seed, candidate_on_play) in enumerate(chunk_seats):
+                    batched.append((position, offset))
+                    batch_games.append((chunk.candidate_deck, chunk.meta_deck, seed, 0 if candidate_on_play else 1))
+                continue
+        candidate_deck_cards = worker_card_table.lookup(chunk.candidate_deck)
+        meta_deck_cards = worker_card_table.lookup(chunk.meta_deck)
+        for offset, (seed, candidate_on_play) in enumerate(chunk_seats):
+            chunk_outcomes[offset] = _play_game(candidate_deck_cards, meta_deck_cards, seed, candidate_on_play,
+                                                chunk.mcts)
+
+    winners, turns = batch_engine.play_games(batch_games, worker_card_table, LETHAL_SEARCH)
+    for (position, offset), winner, game_turns in zip(batched, winners, turns):
+        outcomes[position][offset] = (1 if winner == 0 else 0, game_turns, 0)
+
+    seconds_per_game = (time.perf_counter() - start) / max(1, sum(chunk.games for chunk in chunks))
+    results = []
+    for chunk, chunk_seats, chunk_outcomes in zip(chunks, seats, outcomes):
+        win_mask = wins_on_play = 0
+        for offset, (win, _, _) in enumerate(chunk_outcomes):
+            win_mask |= win << offset
+            if chunk_seats[offset][1]:
+                wins_on_play += win
+        results.append(ChunkResult(
+            chunk.candidate_idx, chunk.meta_idx, chunk.first_game, chunk.games,
+            sum(outcome[0] for outcome in chunk_outcomes), win_mask,
+            sum(candidate_on_play for _, candidate_on_play in chunk_seats), wins_on_play,
+            array('H', (outcome[1] for outcome in chunk_outcomes)),
+            array('H', (outcome[2] for outcome in chunk_outcomes)),
+            seconds_per_game * chunk.games,
+        ))
+    return results
+
+def replay_game(candidate_deck_cards, meta_deck_cards, seed, candidate_on_play=True, all_cards_map=None, verbose=True,
+                mcts=None):
+    """
+    Re-runs a single game in this process from its recorded seed, verbosely by default.
+    Seeds and seats come from the 'games' list of a detailed fitness report; pass the
+    report's MCTSSettings as `mcts` to replay a game that was played with MCTS.
+    """
     game = GameState(
-        player1_deck=candidate_deck_cards, 
-        player2_deck=meta_deck_cards, 
-        all_cards=worker_all_cards_map, 
-        verbose=False
+        player1_deck=candidate_deck_cards,
+        player2_deck=meta_deck_cards,
+        all_cards=all_cards_map,
+        verbose=verbose,
+        seed=seed,
+        first_player_index=0 if candidate_on_play else 1,
+        controllers=_mcts_controllers(mcts, seed),
+        lethal_search=LETHAL_SEARCH
     )
     game.run_simulation()
+    return game
+
+def _game_seed(seed, candidate_idx, meta_idx, game_idx, common_random_numbers, antithetic_pairs):
+    """Returns the seed of a planned game and whether the candidate is on the play in it (see _build_tasks)."""
+    if antithetic_pairs:
+        seed_idx, candidate_on_play = game_idx // 2, game_idx % 2 == 0
+    else:
+        seed_idx, candidate_on_play = game_idx, True
+    if common_random_numbers:
+        return derive_seed(seed, meta_idx, seed_idx), candidate_on_play
+    return derive_seed(seed, candidate_idx, meta_idx, seed_idx), candidate_on_play
+
+def simulation_settings(antithetic_pairs=None, mcts=None):
+    """
+    The configured options that change game outcomes, for FitnessCache.meta_signature:
+    results played under different ones are not comparable. `antithetic_pairs` (default
+    ANTITHETIC_PAIRS) sets the candidate's seats, and `mcts` is the pilot (None for the
+    greedy AI).
+    """
+    return {
+        "adjudicate": ADJUDICATE,
+        "lethal_search": LETHAL_SEARCH,
+        "antithetic_pairs": ANTITHETIC_PAIRS if antithetic_pairs is None else antithetic_pairs,
+        "mcts": mcts,
+    }
+
+def _matchup_games(antithetic_pairs=False):
+    """GAMES_PER_MATCHUP, rounded up to an even number with antithetic pairs so no game is left unpaired."""
+    return GAMES_PER_MATCHUP + GAMES_PER_MATCHUP % 2 if antithetic_pairs else GAMES_PER_MATCHUP
+
+def _default_plan(candidate_decks, meta_decks, antithetic_pairs=False):
+    """Every candidate plays GAMES_PER_MATCHUP games (see _matchup_games) against every meta deck."""
+    num_games = _matchup_games(antithetic_pairs)
+    return [(candidate_idx, meta_idx, num_games)
+            for candidate_idx in range(len(candidate_decks))
+            for meta_idx in range(len(meta_decks))]
+
+def _build_tasks(candidate_decks, meta_decks, table, seed, plan=None, common_random_numbers=False,
+                 antithetic_pairs=False, mcts=None):
+    """
+    Builds one task per (candidate, meta deck, game), tagged with the candidate's index,
+    for run_single_game. The pool is sent the same games as chunks (see _build_chunks).
+    Decks are sent as their indices in `table`, which must be the one the workers decode with.
+
+    `plan` is an optional list of (candidate_idx, meta_deck_idx, num_games) entries; by
+    default every candidate plays GAMES_PER_MATCHUP games (rounded up to whole pairs with
+    `antithetic_pairs`) against every meta deck. An
+    entry may carry a fourth element, the index of its first game, to continue a matchup
+    that already played some games under the same seed.
+    Each game gets its own seed derived from `seed` and the game's position in the plan.
+    With `common_random_numbers`, the candidate is left out of the derivation, so game N
+    against a meta deck uses the same seed for every candidate. With `antithetic_pairs`,
+    consecutive games share a seed and the candidate is on the play in the first of each
+    pair and on the draw in the second. With `mcts` (MCTSSettings), every game is played
+    with MCTS in the seats it names.
+    """
+    tasks = []
+    for chunk in _build_chunks(candidate_decks, meta_decks, table, seed, plan, common_random_numbers,
+                               antithetic_pairs, mcts):
+        meta_deck_name = meta_decks[chunk.meta_idx].name
+        for game_idx in range(chunk.first_game, chunk.first_game + chunk.games):
+            game_seed, candidate_on_play = _game_seed(seed, chunk.candidate_idx, chunk.meta_idx, game_idx,
+                                                      common_random_numbers, antithetic_pairs)
+            task = (chunk.candidate_idx, chunk.candidate_deck, chunk.meta_deck, meta_deck_name, game_seed,
+                    candidate_on_play)
+            tasks.append(task if mcts is None else task + (mcts,))
+    return tasks
+
+def _build_chunks(candidate_decks, meta_decks, table, seed, plan=None, common_random_numbers=False,
+                  antithetic_pairs=False, mcts=None):
+    """Builds one GameChunk per plan entry (see _build_tasks for the plan and the options)."""
+    if plan is None:
+        plan = _default_plan(candidate_decks, meta_decks, antithetic_pairs)
+
+    # Send cards as their card table indices, the smallest thing to pickle; every chunk of
+    # a deck shares one list, which pickling sends once per job
+    meta_deck_indices = [table.indices(meta_deck.cards) for meta_deck in meta_decks]
+    candidate_deck_indices = {}
+    chunks = []
+    for entry in plan:
+        candidate_idx, meta_idx, num_games = entry[:3]
+        first_game = entry[3] if len(entry) > 3 else 0
+        if candidate_idx not in candidate_deck_indices:
+            candidate_deck_indices[candidate_idx] = table.indices(candidate_decks[candidate_idx])
+        if num_games > 0:
+            chunks.append(GameChunk(candidate_idx, candidate_deck_indices[candidate_idx], meta_idx,
+                                    meta_deck_indices[meta_idx], seed, first_game, num_games, common_random_numbers,
+                                    antithetic_pairs, mcts))
+    return chunks
+
+def _pack_jobs(chunks, workers):
+    """
+    Splits chunks into jobs for run_game_chunks. A job holds about as many games as take
+    CHUNK_TARGET_SECONDS at the observed time per game (or BATCH_SIZE games with the batch
+    engine), but jobs are kept small enough that every worker gets at least two.
+    """
+    total = sum(chunk.games for chunk in chunks)
+    size = math.ceil(total / (2 * workers))
+    seconds = game_seconds[BATCH_ENGINE]
+    if seconds:
+        size = min(size, math.ceil(CHUNK_TARGET_SECONDS / seconds))
+    if BATCH_ENGINE:
+        size = min(size, BATCH_SIZE)
+    size = max(1, size)
+
+    jobs, job, job_games = [], [], 0
+    for chunk in chunks:
+        first_game, remaining = chunk.first_game, chunk.games
+        while remaining:
+            games = min(remaining, size - job_games)
+            job.append(chunk._replace(first_game=first_game, games=games))
+            first_game, remaining, job_games = first_game + games, remaining - games, job_games + games
+            if job_games == size:
+                jobs.append((job, BATCH_ENGINE))
+                job, job_games = [], 0
+    if job:
+        jobs.append((job, BATCH_ENGINE))
+    return jobs
+
+def _run_games(pool, chunks, use_tqdm=False, ordered=True, progress=None):
+    """
+    Dispatches game chunks to the pool and returns (chunk, ChunkResult) pairs, in chunk
+    order unless `ordered` is False (then as they arrive). Jobs are timed to refine the
+    time per game used to size later jobs. `progress` is an optional tqdm bar to advance.
+    Jobs are spread over a WorkerPool's processes (any other pool is taken to have one
+    worker per CPU).
+    """
+    jobs = _pack_jobs(chunks, pool.processes if isinstance(pool, WorkerPool) else cpu_count())
+    if not jobs:
+        return []
+    if use_tqdm and progress is None:
+        progress = tqdm(total=sum(chunk.games for chunk in chunks), desc="  Simulating Final Games", leave=False,
+                        ncols=100)
+        owns_progress = True
+    else:
+        owns_progress = False
+    # With a progress bar or out-of-order results, take jobs as they finish; otherwise map is faster
+    if progress is not None or not ordered:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        job_results = mapper(run_game_chunks, jobs)
+    else:
+        job_results = pool.map(run_game_chunks, jobs)
+
+    by_key = {(chunk.candidate_idx, chunk.meta_idx, chunk.first_game): chunk for job, _ in jobs for chunk in job}
+    pairs = []
+    seconds = games = 0
+    try:
+        for results in job_results:
+            for result in results:
+                pairs.append((by_key[(result.candidate_idx, result.meta_idx, result.first_game)], result))
+                seconds += result.seconds
+                games += result.games
+            if progress is not None:
+                progress.update(sum(result.games for result in results))
+    finally:
+        if owns_progress:
+            progress.close()
+    if games:
+        observed = seconds / games
+        previous = game_seconds[BATCH_ENGINE]
+        game_seconds[BATCH_ENGINE] = observed if previous is None else 0.5 * previous + 0.5 * observed
+    return pairs
+
+def game_results(pairs, meta_decks):
+    """Expands (GameChunk, ChunkResult) pairs into per-game GameResults, in game order within each chunk."""
+    results = []
+    for chunk, result in pairs:
+        meta_deck_name = meta_decks[chunk.meta_idx].name
+        for offset in range(chunk.games):
+            seed, candidate_on_play = _game_seed(chunk.seed, chunk.candidate_idx, chunk.meta_idx,
+                                                 chunk.first_game + offset, chunk.common_random_numbers,
+                                                 chunk.antithetic_pairs)
+            results.append(GameResult(chunk.candidate_idx, meta_deck_name, seed, candidate_on_play,
+                                      result.win_mask >> offset & 1, result.turns[offset],
+                                      result.turns_saved[offset]))
+    return results
+
+def wilson_interval(wins, games, z=1.96):
+    """Returns the (low, high) Wilson score interval for a win rate, or (0.0, 1.0) with no games."""
+    if games == 0:
+        return (0.0, 1.0)
+    p = wins / games
+    denominator = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+def _matchup_decided(wins, games, min_games, z):
+    """A matchup is decided once it has min_games and its Wilson interval excludes 50%."""
+    if games < min_games:
+        return False
+    low, high = wilson_interval(wins, games, z)
+    return low > 0.5 or high < 0.5
+
+def _simulate_sequential(candidate_deck_cards, meta_decks, all_cards_map, pool, seed, use_tqdm=False,
+                         antithetic_pairs=False, min_games=None, z=None, games_budget=None, mcts=None):
+    """
+    Plays one candidate against each meta deck in rounds, stopping matchups that are decided.
+
+    Every matchup draws its games from the same seeded game sequence the fixed-size path
+    would use, up to GAMES_PER_MATCHUP. Each round sends the next `min_games` games of every
+    undecided matchup to the pool as chunks and consumes the results as they arrive
+    (imap_unordered). Stop decisions are only taken at round boundaries, so the games
+    played never depend on arrival order. Decided matchups get no further rounds, which
+    cancels their remaining games. `games_budget` (0 for none) caps the total games across
+    all matchups; when it runs short, the round is filled in turn across matchups.
+
+    Returns the per-game results and the names of matchups that stopped early.
+    """
+    min_games = SEQUENTIAL_MIN_GAMES if min_games is None else min_games
+    z = SEQUENTIAL_CONFIDENCE_Z if z is None else z
+    games_budget = GAMES_BUDGET if games_budget is None else games_budget
+    # Keep seat-swapped pairs together in every round
+    step = 2 if antithetic_pairs else 1
+    round_size = max(step, min_games - min_games % step)
+
+    # One chunk per matchup covering all its games; rounds take consecutive runs off the front
+    table = _task_table(pool, all_cards_map)
+    queues = {meta_decks[chunk.meta_idx].name: chunk for chunk in _build_chunks(
+        [candidate_deck_cards], meta_decks, table, seed, antithetic_pairs=antithetic_pairs, mcts=mcts)}
+    counts = {name: [0, 0] for name in queues}
+    decided_early = []
+    remaining_budget = games_budget if games_budget > 0 else sum(chunk.games for chunk in queues.values())
+    results = []
+
+    temporary_pool = None
+    if pool is None:
+        pool = temporary_pool = create_worker_pool(all_cards_map, table=table)
+    progress = tqdm(total=remaining_budget, desc="  Simulating Final Games", leave=False, ncols=100) if use_tqdm else None
+    try:
+        while remaining_budget > 0:
+            open_matchups = [name for name, chunk in queues.items() if chunk.games]
+            if not open_matchups:
+                break
+
+            # Fill the round a pair (or game) at a time per matchup, so a tight budget is shared evenly
+            quotas = dict.fromkeys(open_matchups, 0)
+            while remaining_budget > 0:
+                added = False
+                for name in open_matchups:
+                    take = min(step, queues[name].games - quotas[name])
+                    if quotas[name] < round_size and take and remaining_budget >= take:
+                        quotas[name] += take
+                        remaining_budget -= take
+                        added = True
+                if not added:
+                    break
+            round_chunks = []
+            for name, quota in quotas.items():
+                if quota:
+                    chunk = queues[name]
+                    round_chunks.append(chunk._replace(games=quota))
+                    queues[name] = chunk._replace(first_game=chunk.first_game + quota, games=chunk.games - quota)
+            if not round_chunks:
+                break
+
+            pairs = _run_games(pool, round_chunks, ordered=False, progress=progress)
+            for chunk, result in pairs:
+                name = meta_decks[chunk.meta_idx].name
+                counts[name][0] += result.wins
+                counts[name][1] += result.games
+            results.extend(game_results(pairs, meta_decks))
+
+            for name in open_matchups:
+                wins, games = counts[name]
+                if queues[name].games and _matchup_decided(wins, games, min_games, z):
+                    queues[name] = queues[name]._replace(games=0)
+                    decided_early.append(name)
+    finally:
+        if progress is not None:
+            progress.close()
+        if temporary_pool is not None:
+            temporary_pool.close()
+            temporary_pool.join()
+
+    # Results arrive out of order; sort them back into a stable order for reporting
+    order = {name: idx for idx, name in enumerate(queues)}
+    results.sort(key=lambda result: (order[result.meta_deck_name], result.seed, not result.candidate_on_play))
+    return results, decided_early
+
+def _simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, use_tqdm=False, plan=None,
+              common_random_numbers=False, antithetic_pairs=False, mcts=None):
+    """Runs every planned game for every candidate as one pool job, using a temporary pool if none is given."""
+    table = _task_table(pool, all_cards_map)
+    chunks = _build_chunks(candidate_decks, meta_decks, table, seed, plan, common_random_numbers, antithetic_pairs,
+                           mcts)
+    if pool is None:
+        with create_worker_pool(all_cards_map, table=table) as temporary_pool:
+            return game_results(_run_games(temporary_pool, chunks, use_tqdm), meta_decks)
+    return game_results(_run_games(pool, chunks, use_tqdm), meta_decks)
+
+def calculate_consistency_score(deck_cards):
+    """Scores how much of the deck is built from multiple copies, from 0.0 to 1.0."""
+    card_counts = Counter(card.name for card in deck_cards)
     
-    # The winner is one of the Player objects created inside the GameState instance.
-    return (meta_deck_name, 1 if game.winner == game.player1 else 0)
+    c4_cards = sum(4 for count in card_counts.values() if count == 4)
+    c3_cards = sum(3 for count in card_counts.values() if count == 3)
+    c2_cards = sum(2 for count in card_counts.values() if count == 2)
+    c1_cards = sum(1 for count in card_counts.values() if count == 1)
+
+    consistency_score = (1.0 * c4_cards + 0.8 * c3_cards + 0.6 * c2_cards + 0.3 * c1_cards) / 60.0
+    return max(0.0, min(consistency_score, 1.0))
 
-def calculate_fitness(candidate_deck_cards, meta_decks, all_cards_map, detailed_report=False):
+def calculate_fitness(candidate_deck_cards, meta_decks, all_cards_map, detailed_report=False, pool=None, seed=None,
+                      antithetic_pairs=None, sequential=None, games_budget=None, mcts=None):
     """
     Calculates the fitness of a candidate deck by simulating games against a meta in parallel.
     The fitness score is the overall win percentage, adjusted for deck consistency.
@@ -57,71 +670,352 @@ def calculate_fitness(candidate_deck_cards, meta_decks, all_cards_map, detailed_
         all_cards_map (dict): A map of all card API IDs to Card objects.
         detailed_report (bool): If True, returns a dictionary with detailed stats. 
                                 Otherwise, returns a single float fitness score.
+        pool (WorkerPool, optional): A warm pool from create_worker_pool. If omitted,
+                                a temporary pool is created and torn down for this call.
+        seed (int, optional): Seed from which every game's seed is derived. A fresh one is
+                                drawn if omitted; either way it is recorded in the report.
+        antithetic_pairs (bool, optional): Play seat-swapped pairs of games on identical
+                                shuffles. Defaults to the configured ANTITHETIC_PAIRS.
+        sequential (bool, optional): Stop each matchup early once its result is clear.
+                                Defaults to the configured SEQUENTIAL_STOPPING.
+        games_budget (int, optional): With sequential stopping, the most games to play in
+                                total (0 for no cap). Defaults to the configured GAMES_BUDGET.
+        mcts (MCTSSettings, optional): Pilot the candidate (or both seats) with the MCTS AI
+                                instead of the greedy one, e.g. FINAL_EVALUATION_MCTS for a
+                                high-fidelity final evaluation. Each game's search is seeded
+                                from its game seed; the rollouts of a game run in the worker
+                                playing it, so the pool parallelises across games.
 
     Returns:
         float or dict: The fitness score or a dictionary with detailed results.
     """
-    # Convert card objects to simple IDs for serialization
-    candidate_deck_ids = [card.api_id for card in candidate_deck_cards]
-    
-    # Prepare arguments for multiprocessing
-    tasks = []
-    for meta_deck in meta_decks:
-        meta_deck_ids = [card.api_id for card in meta_deck.cards]
-        for _ in range(GAMES_PER_MATCHUP):
-            tasks.append((candidate_deck_ids, meta_deck_ids, meta_deck.name))
+    if seed is None:
+        seed = new_run_seed()
+    if antithetic_pairs is None:
+        antithetic_pairs = ANTITHETIC_PAIRS
+    if sequential is None:
+        sequential = SEQUENTIAL_STOPPING
 
-    # Run simulations in parallel
-    results = []
-    # Disable tqdm for non-detailed reports to speed up GA runs, and use the faster pool.map
-    use_tqdm = detailed_report 
-    with Pool(processes=cpu_count(), initializer=init_worker, initargs=(all_cards_map,)) as pool:
-        if use_tqdm:
-            results = list(tqdm(pool.imap(run_single_game, tasks), total=len(tasks), desc="  Simulating Final Games", leave=False, ncols=100))
-        else:
-            # Using map is faster when we don't need a progress bar
-            results = pool.map(run_single_game, tasks)
+    if sequential:
+        results, decided_early = _simulate_sequential(candidate_deck_cards, meta_decks, all_cards_map, pool, seed,
+                                                      use_tqdm=detailed_report, antithetic_pairs=antithetic_pairs,
+                                                      games_budget=games_budget, mcts=mcts)
+    else:
+        # Disable tqdm for non-detailed reports to speed up GA runs, and use the faster pool.map
+        results = _simulate([candidate_deck_cards], meta_decks, all_cards_map, pool, seed, use_tqdm=detailed_report,
+                            antithetic_pairs=antithetic_pairs, mcts=mcts)
+        decided_early = []
 
-    total_wins = sum(win for _, win in results)
-    total_games = len(results)
+    win_counts = Counter()
+    games_played = Counter()
+    for result in results:
+        games_played[result.meta_deck_name] += 1
+        if result.win:
+            win_counts[result.meta_deck_name] += 1
 
-    raw_win_rate = (total_wins / total_games) if total_games > 0 else 0
+    # Each meta deck counts equally, even when sequential stopping gave them different game counts
+    win_rates_by_meta_deck = {
+        name: (win_counts[name] / games_played[name]) if games_played[name] > 0 else 0
+        for name in games_played
+    }
+    raw_win_rate = mean_win_rate((win_counts[name], games_played[name]) for name in games_played)
     
     # --- Consistency Score Calculation ---
-    card_counts = Counter(card.name for card in candidate_deck_cards)
-    
-    c4_cards = sum(4 for count in card_counts.values() if count == 4)
-    c3_cards = sum(3 for count in card_counts.values() if count == 3)
-    c2_cards = sum(2 for count in card_counts.values() if count == 2)
-    c1_cards = sum(1 for count in card_counts.values() if count == 1)
-
-    consistency_score = (1.0 * c4_cards + 0.8 * c3_cards + 0.6 * c2_cards + 0.3 * c1_cards) / 60.0
-    consistency_score = max(0.0, min(consistency_score, 1.0))
+    consistency_score = calculate_consistency_score(candidate_deck_cards)
 
     final_fitness = raw_win_rate * consistency_score
     
     if detailed_report:
-        win_counts = Counter()
-        games_played = Counter()
-        for meta_deck_name, win in results:
-            games_played[meta_deck_name] += 1
-            if win:
-                win_counts[meta_deck_name] += 1
-
-        win_rates_by_meta_deck = {
-            name: (win_counts[name] / games_played[name]) if games_played[name] > 0 else 0
-            for name in games_played
+        z = SEQUENTIAL_CONFIDENCE_Z
+        win_rate_intervals_by_meta_deck = {
+            name: wilson_interval(win_counts[name], games_played[name], z) for name in games_played
         }
+
+        # First-player split: the combined estimate weights both seats equally
+        on_play = [result.win for result in results if result.candidate_on_play]
+        on_draw = [result.win for result in results if not result.candidate_on_play]
+        win_rate_on_play = (sum(on_play) / len(on_play)) if on_play else None
+        win_rate_on_draw = (sum(on_draw) / len(on_draw)) if on_draw else None
+        if on_play and on_draw:
+            combined_win_rate = (win_rate_on_play + win_rate_on_draw) / 2
+        else:
+            combined_win_rate = raw_win_rate
         
         return {
             "final_fitness": final_fitness,
             "raw_win_rate": raw_win_rate,
             "consistency_score": consistency_score,
-            "win_rates_by_meta_deck": win_rates_by_meta_deck
+            "win_rates_by_meta_deck": win_rates_by_meta_deck,
+            "win_rate_intervals_by_meta_deck": win_rate_intervals_by_meta_deck,
+            "games_by_meta_deck": dict(games_played),
+            "decided_early": decided_early,
+            "games_saved": len(meta_decks) * _matchup_games(antithetic_pairs) - len(results),
+            "turns_saved": sum(result.turns_saved for result in results),
+            "win_rate_on_play": win_rate_on_play,
+            "win_rate_on_draw": win_rate_on_draw,
+            "combined_win_rate": combined_win_rate,
+            "antithetic_variance_ratio": antithetic_variance_ratio(results) if antithetic_pairs else None,
+            "seed": seed,
+            "mcts": mcts,
+            # Per-game seeds and seats, so any single game can be re-run verbosely with replay_game
+            "games": [
+                {"meta_deck": result.meta_deck_name, "seed": result.seed,
+                 "candidate_on_play": result.candidate_on_play, "win": result.win}
+                for result in results
+            ]
         }
     
     return final_fitness
 
+def antithetic_variance_ratio(results):
+    """
+    Compares the variance of seat-swapped pair averages with what two independent games give.
+
+    Returns var(pair mean) / (var(game outcome) / 2) over all complete pairs, so values
+    below 1.0 mean the antithetic pairs estimate the win rate with less variance per game
+    played. Returns None if there are fewer than two pairs or the outcomes never vary.
+    """
+    pairs = {}
+    for result in results:
+        pairs.setdefault((result.candidate_idx, result.meta_deck_name, result.seed), {})[result.candidate_on_play] = result.win
+    complete_pairs = [seats for seats in pairs.values() if len(seats) == 2]
+    if len(complete_pairs) < 2:
+        return None
+
+    outcomes = [win for seats in complete_pairs for win in seats.values()]
+    independent_variance = statistics.variance(outcomes) / 2
+    if independent_variance == 0:
+        return None
+    pair_means = [(seats[True] + seats[False]) / 2 for seats in complete_pairs]
+    return statistics.variance(pair_means) / independent_variance
+
+def paired_variance_reduction(results):
+    """
+    Measures how much pairing games by seed reduced the noise in candidate comparisons.
+
+    For every pair of candidates that played games under the same seeds, the variance of
+    their per-game outcome differences (paired) is compared with the sum of their outcome
+    variances (what independent games would give). Returns the pooled fractional reduction,
+    e.g. 0.4 for 40% less variance, or None if no pair shared at least two seeds.
+    """
+    outcomes_by_candidate = {}
+    for result in results:
+        outcomes_by_candidate.setdefault(result.candidate_idx, {})[(result.seed, result.candidate_on_play)] = result.win
+
+    paired_variance = 0.0
+    unpaired_variance = 0.0
+    candidates = sorted(outcomes_by_candidate)
+    for position, candidate_a in enumerate(candidates):
+        outcomes_a = outcomes_by_candidate[candidate_a]
+        for candidate_b in candidates[position + 1:]:
+            outcomes_b = outcomes_by_candidate[candidate_b]
+            shared_seeds = sorted(outcomes_a.keys() & outcomes_b.keys())
+            if len(shared_seeds) < 2:
+                continue
+            wins_a = [outcomes_a[s] for s in shared_seeds]
+            wins_b = [outcomes_b[s] for s in shared_seeds]
+            paired_variance += statistics.variance([a - b for a, b in zip(wins_a, wins_b)])
+            unpaired_variance += statistics.variance(wins_a) + statistics.variance(wins_b)
+
+    if unpaired_variance == 0:
+        return None
+    return 1 - paired_variance / unpaired_variance
+
+def parent_probabilities(records, parents, rng, samples=None):
+    """
+    Estimates each candidate's chance of ranking among the top `parents` by fitness.
+
+    `records` maps a candidate to (wins, games, consistency_score). Win rates are drawn
+    from a Beta(1 + wins, 1 + losses) posterior, scaled by the consistency score like the
+    fitness itself, and the top `parents` of each Monte Carlo draw are counted.
+    """
+    samples = RACING_SAMPLES if samples is None else samples
+    candidates = list(records)
+    in_parents = Counter()
+    for _ in range(samples):
+        draws = []
+        for candidate in candidates:
+            wins, games, consistency_score = records[candidate]
+            draws.append((rng.betavariate(1 + wins, 1 + games - wins) * consistency_score, candidate))
+        draws.sort(reverse=True)
+        for _, candidate in draws[:parents]:
+            in_parents[candidate] += 1
+    return {candidate: in_parents[candidate] / samples for candidate in candidates}
+
+def _race(candidate_decks, meta_decks, all_cards_map, pool, seed, allowance, prior_counts, parents,
+          common_random_numbers=False, antithetic_pairs=False):
+    """
+    Spends a batch's games on the candidates whose place in the parent set is still open.
+
+    `allowance` maps (candidate_idx, meta_idx) to the most games that matchup may play and
+    `prior_counts` maps every candidate to the (wins, games) already known for it (e.g.
+    from the cache). Every candidate first plays RACING_INITIAL_GAMES per matchup; after
+    each round, only candidates whose parent probability is still uncertain play the next
+    round. Each round is one pool job, and later rounds continue each matchup's seed
+    sequence, so the games played are a prefix of what the fixed-size plan would play.
+
+    Returns the per-game results and the number of rounds played.
+    """
+    step = max(1, RACING_INITIAL_GAMES)
+    if antithetic_pairs:
+        step += step % 2
+    rng = random.Random(derive_seed(seed, "racing"))
+    consistency = {candidate: calculate_consistency_score(candidate_decks[candidate]) for candidate in prior_counts}
+    played = Counter()
+    new_counts = {candidate: [0, 0] for candidate in prior_counts}
+    contested = set(prior_counts)
+    results = []
+    rounds = 0
+    while contested:
+        plan = []
+        for (candidate_idx, meta_idx), num_games in allowance.items():
+            remaining = num_games - played[(candidate_idx, meta_idx)]
+            if candidate_idx in contested and remaining > 0:
+                plan.append((candidate_idx, meta_idx, min(step, remaining), played[(candidate_idx, meta_idx)]))
+        if not plan:
+            break
+        for candidate_idx, meta_idx, num_games, _ in plan:
+            played[(candidate_idx, meta_idx)] += num_games
+
+        round_results = _simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, plan=plan,
+                                  common_random_numbers=common_random_numbers, antithetic_pairs=antithetic_pairs)
+        results.extend(round_results)
+        rounds += 1
+        for result in round_results:
+            new_counts[result.candidate_idx][0] += result.win
+            new_counts[result.candidate_idx][1] += 1
+
+        records = {
+            candidate: (prior_counts[candidate][0] + new_counts[candidate][0],
+                        prior_counts[candidate][1] + new_counts[candidate][1],
+                        consistency[candidate])
+            for candidate in prior_counts
+        }
+        probabilities = parent_probabilities(records, parents, rng)
+        contested = {candidate for candidate, probability in probabilities.items()
+                     if RACING_CONFIDENCE < probability < 1 - RACING_CONFIDENCE}
+    return results, rounds
+
+def calculate_fitness_batch(candidate_decks, meta_decks, all_cards_map, pool=None, cache=None, seed=None,
+                            common_random_numbers=None, antithetic_pairs=None, racing=None, parents=None):
+    """
+    Calculates the fitness of several candidate decks at once.
+
+    All (candidate x meta deck x game) tasks are submitted to the pool as a single job, so
+    there is no barrier between candidates and every core stays busy until the whole
+    batch is done. Results are reduced back to one fitness score per candidate, in order.
+
+    Args:
+        candidate_decks (list): A list of candidate decks, each a list of Card objects.
+        meta_decks (list): A list of Deck objects representing the meta.
+        all_cards_map (dict): A map of all card API IDs to Card objects.
+        pool (WorkerPool, optional): A warm pool from create_worker_pool.
+        cache (FitnessCache, optional): If given, decks already in the cache are not
+                                re-simulated (beyond any extra games the cache asks for),
+                                and new results are merged into it.
+        seed (int, optional): Seed from which every game's seed is derived. Use a different
+                                seed per call so repeat evaluations play new games.
+        common_random_numbers (bool, optional): Play every candidate under the same game
+                                seeds. Defaults to the configured COMMON_RANDOM_NUMBERS.
+        antithetic_pairs (bool, optional): Play seat-swapped pairs of games on identical
+                                shuffles. Defaults to the configured ANTITHETIC_PAIRS.
+        racing (bool, optional): Stop giving games to candidates that are clearly in or
+                                out of the parent set. Defaults to the configured RACING.
+        parents (int, optional): How many of the batch's candidates become parents. Racing
+                                needs it and is skipped without it.
+
+    Returns:
+        list: One fitness score per candidate deck. Batch statistics (games played, games
+              saved by racing, turns played and saved by adjudication and, with common
+              random numbers, the paired variance reduction) are left in last_batch_report.
+    """
+    global last_batch_report
+    last_batch_report = {"games": 0, "games_saved": 0, "racing_rounds": 0, "turns_played": 0, "turns_saved": 0,
+                         "paired_variance_reduction": None}
+    if not candidate_decks:
+        return []
+    if seed is None:
+        seed = new_run_seed()
+    if common_random_numbers is None:
+        common_random_numbers = COMMON_RANDOM_NUMBERS
+    if antithetic_pairs is None:
+        antithetic_pairs = ANTITHETIC_PAIRS
+    if racing is None:
+        racing = RACING
+
+    # allowance: (candidate_idx, meta_idx) -> games to play; prior_counts: the (wins, games)
+    # already known for each candidate that is simulated
+    allowance = {}
+    prior_counts = {}
+    games_per_evaluation = _matchup_games(antithetic_pairs)
+    if cache is None:
+        deck_keys = list(range(len(candidate_decks)))
+        for candidate_idx in range(len(candidate_decks)):
+            prior_counts[candidate_idx] = (0, 0)
+            for meta_idx in range(len(meta_decks)):
+                allowance[(candidate_idx, meta_idx)] = games_per_evaluation
+    else:
+        # Identical decklists (in any gene order) share one key and are simulated once.
+        deck_keys = [FitnessCache.deck_key(deck_cards) for deck_cards in candidate_decks]
+        scheduled_keys = set()
+        for candidate_idx, deck_key in enumerate(deck_keys):
+            if deck_key in scheduled_keys:
+                continue
+            scheduled_keys.add(deck_key)
+            entry = cache.lookup(deck_key)
+            counts = entry.values() if entry else []
+            prior_counts[candidate_idx] = (sum(c[0] for c in counts), sum(c[1] for c in counts))
+            for meta_idx, meta_deck in enumerate(meta_decks):
+                num_games = cache.games_needed(deck_key, meta_deck.name, games_per_evaluation)
+                if num_games > 0:
+                    allowance[(candidate_idx, meta_idx)] = num_games
+
+    if racing and parents and parents < len(prior_counts):
+        if pool is None:
+            with create_worker_pool(all_cards_map) as temporary_pool:
+                results, last_batch_report["racing_rounds"] = _race(
+                    candidate_decks, meta_decks, all_cards_map, temporary_pool, seed, allowance, prior_counts, parents,
+                    common_random_numbers=common_random_numbers, antithetic_pairs=antithetic_pairs)
+        else:
+            results, last_batch_report["racing_rounds"] = _race(
+                candidate_decks, meta_decks, all_cards_map, pool, seed, allowance, prior_counts, parents,
+                common_random_numbers=common_random_numbers, antithetic_pairs=antithetic_pairs)
+    else:
+        plan = [(candidate_idx, meta_idx, num_games) for (candidate_idx, meta_idx), num_games in allowance.items()]
+        results = _simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, plan=plan,
+                            common_random_numbers=common_random_numbers, antithetic_pairs=antithetic_pairs)
+    last_batch_report["games"] = len(results)
+    last_batch_report["games_saved"] = sum(allowance.values()) - len(results)
+    last_batch_report["turns_played"] = sum(result.turns for result in results)
+    last_batch_report["turns_saved"] = sum(result.turns_saved for result in results)
+    if common_random_numbers:
+        last_batch_report["paired_variance_reduction"] = paired_variance_reduction(results)
+
+    matchup_counts = {}
+    for result in results:
+        deck_key = deck_keys[result.candidate_idx]
+        counts = matchup_counts.setdefault((deck_key, result.meta_deck_name), [0, 0])
+        counts[0] += result.win
+        counts[1] += 1
+
+    if cache is not None:
+        for (deck_key, meta_deck_name), (wins, games) in matchup_counts.items():
+            cache.record(deck_key, meta_deck_name, wins, games)
+
+    # Like calculate_fitness, every meta deck counts equally in a deck's win rate
+    counts_by_key = {}
+    for (deck_key, _), counts in matchup_counts.items():
+        counts_by_key.setdefault(deck_key, []).append(counts)
+    fitnesses = []
+    for candidate_idx, deck_cards in enumerate(candidate_decks):
+        deck_key = deck_keys[candidate_idx]
+        if cache is not None:
+            raw_win_rate = cache.win_rate(deck_key)
+        else:
+            raw_win_rate = mean_win_rate(counts_by_key.get(deck_key, ()))
+        fitnesses.append(raw_win_rate * calculate_consistency_score(deck_cards))
+    return fitnesses
+
 if __name__ == '__main__':
     # Example of how to use the fitness calculator
     from optimizer.deck_generator import generate_population
@@ -147,6 +1041,7 @@ if __name__ == '__main__':
         print(f"  - Consistency Score: {fitness_details['consistency_score']:.2%}")
         print("  - Win Rates vs Meta:")
         for deck, rate in fitness_details['win_rates_by_meta_deck'].items():
-            print(f"    - {deck}: {rate:.2%}")
+            low, high = fitness_details['win_rate_intervals_by_meta_deck'][deck]
+            print(f"    - {deck}: {rate:.2%} ({low:.0%}-{high:.0%})")
     else:
         print("Could not load cards or meta decks. Fitness calculation aborted.")
@@ -0,0 +1,152 @@
+"""
+This module defines the FitnessCache, which remembers simulated results for decklists the
+GA has already evaluated. Decks are keyed by their card counts rather than gene order, so
+the same 60 cards in any order share one entry.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+from collections import Counter, OrderedDict
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.database_setup import create_fitness_cache_table
+
+
+def mean_win_rate(counts):
+    """
+    Returns the mean of the per-meta-deck win rates for (wins, games) pairs, one per meta
+    deck. Each meta deck counts equally, however many games it got; those with none are
+    left out.
+    """
+    rates = [wins / games for wins, games in counts if games > 0]
+    return (sum(rates) / len(rates)) if rates else 0
+
+
+class FitnessCache:
+    """An LRU-bounded store of per-meta-deck win/game counts keyed by canonical decklist."""
+    def __init__(self, max_entries=5000, max_games_per_matchup=None):
+        self.max_entries = max_entries
+        # When set, a cached deck keeps receiving extra games on re-evaluation until each
+        # matchup has this many, so repeat evaluations sharpen the estimate.
+        self.max_games_per_matchup = max_games_per_matchup
+        self.entries = OrderedDict()  # deck_key -> {meta_deck_name: [wins, games]}
+        self.hits = 0
+        self.misses = 0
+        self.accumulated_games = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def deck_key(deck_cards):
+        """Returns an order-independent hash of a decklist based on its card counts."""
+        counts = Counter(str(card.api_id) for card in deck_cards)
+        canonical = ";".join(f"{api_id}x{count}" for api_id, count in sorted(counts.items()))
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def meta_signature(meta_decks, settings=None):
+        """
+        Returns a hash identifying a meta and the simulation `settings` (a dict of the options
+        that change game outcomes) its games were played under, so persisted results are only
+        reused for the same experiment.
+        """
+        parts = sorted(f"{deck.name}:{FitnessCache.deck_key(deck.cards)}" for deck in meta_decks)
+        if settings:
+            parts.append(repr(sorted(settings.items())))
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, deck_key):
+        """Returns the cached matchup counts for a deck (or None) and records a hit or miss."""
+        entry = self.entries.get(deck_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(deck_key)
+        return entry
+
+    def games_needed(self, deck_key, meta_deck_name, games_per_evaluation):
+        """Returns how many new games a matchup should get on this evaluation."""
+        entry = self.entries.get(deck_key)
+        if entry is None or meta_deck_name not in entry:
+            return games_per_evaluation
+        if self.max_games_per_matchup is None:
+            return 0
+        played = entry[meta_deck_name][1]
+        return max(0, min(games_per_evaluation, self.max_games_per_matchup - played))
+
+    def record(self, deck_key, meta_deck_name, wins, games):
+        """Merges newly simulated games into a deck's entry, evicting the oldest if full."""
+        entry = self.entries.get(deck_key)
+        if entry is None:
+            entry = self.entries[deck_key] = {}
+        elif meta_deck_name in entry:
+            self.accumulated_games += games
+        counts = entry.setdefault(meta_deck_name, [0, 0])
+        counts[0] += wins
+        counts[1] += games
+        self.entries.move_to_end(deck_key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def win_rate(self, deck_key):
+        """Returns a deck's mean win rate over its cached matchups, as calculate_fitness averages them."""
+        entry = self.entries.get(deck_key)
+        if not entry:
+            return 0
+        return mean_win_rate(entry.values())
+
+    def pop_generation_stats(self):
+        """Returns the hit/miss counters since the last call and resets them."""
+        stats = {"hits": self.hits, "misses": self.misses, "accumulated_games": self.accumulated_games, "entries": len(self.entries)}
+        self.hits = 0
+        self.misses = 0
+        self.accumulated_games = 0
+        return stats
+
+    # --- Persistence ---
+
+    def load(self, db_path, meta_signature):
+        """Loads previously persisted results for the given meta from the database."""
+        conn = None
+        try:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            create_fitness_cache_table(cursor)
+            cursor.execute(
+                "SELECT deck_key, meta_deck_name, wins, games FROM Fitness_Cache WHERE meta_signature = ?",
+                (meta_signature,)
+            )
+            for deck_key, meta_deck_name, wins, games in cursor.fetchall():
+                self.entries.setdefault(deck_key, {})[meta_deck_name] = [wins, games]
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        except sqlite3.Error as e:
+            print(f"Database error while loading the fitness cache: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def save(self, db_path, meta_signature):
+        """Persists the cached results for the given meta to the database."""
+        conn = None
+        try:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            create_fitness_cache_table(cursor)
+            rows = [
+                (deck_key, meta_signature, meta_deck_name, counts[0], counts[1])
+                for deck_key, entry in self.entries.items()
+                for meta_deck_name, counts in entry.items()
+            ]
+            cursor.executemany("INSERT OR REPLACE INTO Fitness_Cache VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Database error while saving the fitness cache: {e}")
+        finally:
+            if conn:
+                conn.close()
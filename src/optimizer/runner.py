@@ -5,21 +5,34 @@ import numpy as np
 from collections import Counter
 import configparser
 
-from ..game_engine.card import Card
+from ..game_engine.card import Card, card_table as build_card_table
 from ..game_engine.deck import Deck, load_meta_decks
+from ..game_engine.rng import derive_seed, new_run_seed
 from . import fitness as fitness_calculator
 from .deck_generator import generate_population, INK_COLORS
+from .fitness_cache import FitnessCache
 
 # --- Global Variables for GA --- 
 all_cards_map = None
 meta_decks = None
-api_id_to_idx = {}
-idx_to_api_id = {}
+# The pool's CardTable: genes are card indices into it
+card_table = None
+worker_pool = None
+fitness_cache = None
+# All GA randomness flows through ga_rng, reseeded from the run seed by run_ga.
+ga_rng = random.Random()
+run_seed = None
+fitness_call_count = 0
+# How many of each fitness batch's candidates become parents, used by racing (None: no racing)
+parents_per_batch = None
+# Reports from calculate_fitness_batch since the last generation callback
+pending_batch_reports = []
 
 def get_deck_inks(deck_cards):
     """Identifies the two primary ink colors in a deck."""
     inks = {card.color for card in deck_cards if card.color is not None}
-    return list(inks)
+    # Sorted so the result (and any random choice made from it) doesn't depend on set order
+    return sorted(inks)
 
 def is_deck_valid(deck_cards):
     """Checks if a deck is valid (60 cards, <= 2 inks)."""
@@ -31,19 +44,45 @@ def is_deck_valid(deck_cards):
     return True
 
 def fitness_func(ga_instance, solution, solution_idx):
-    """Fitness function wrapper for PyGAD."""
-    candidate_deck_cards = [all_cards_map[idx_to_api_id[idx]] for idx in solution]
-    
-    # Failsafe: if the solution is invalid, return a very low fitness
-    if not is_deck_valid(candidate_deck_cards):
-        return -999
+    """
+    Fitness function wrapper for PyGAD.
+
+    With `fitness_batch_size` set, PyGAD passes a whole batch of solutions (a 2D array)
+    and their indices; every valid candidate in the batch is then simulated as one pool
+    job. A single 1D solution is also accepted and scored on its own.
+    """
+    global fitness_call_count
+    is_batch = np.ndim(solution) == 2
+    solutions = solution if is_batch else [solution]
 
     # Use a lower number of games for faster iteration during evolution
     fitness_calculator.GAMES_PER_MATCHUP = 5 
-    
-    # Pass the global all_cards_map to the fitness function for worker initialization
-    fitness = fitness_calculator.calculate_fitness(candidate_deck_cards, meta_decks, all_cards_map)
-    return fitness
+
+    fitnesses = []
+    valid_positions = []
+    valid_decks = []
+    for position, genes in enumerate(solutions):
+        candidate_deck_cards = card_table.lookup(genes)
+        # Failsafe: if the solution is invalid, return a very low fitness
+        if not is_deck_valid(candidate_deck_cards):
+            fitnesses.append(-999)
+            continue
+        fitnesses.append(None)
+        valid_positions.append(position)
+        valid_decks.append(candidate_deck_cards)
+
+    # Every call gets its own seed, so re-evaluated decks play new games rather than replays
+    fitness_call_count += 1
+    batch_seed = derive_seed(run_seed, "fitness", fitness_call_count)
+    batch_fitness = fitness_calculator.calculate_fitness_batch(
+        valid_decks, meta_decks, all_cards_map, pool=worker_pool, cache=fitness_cache, seed=batch_seed,
+        parents=parents_per_batch
+    )
+    pending_batch_reports.append(dict(fitness_calculator.last_batch_report))
+    for position, fitness in zip(valid_positions, batch_fitness):
+        fitnesses[position] = fitness
+
+    return fitnesses if is_batch else fitnesses[0]
 
 def on_crossover(parents, offspring_size, ga_instance):
     """    Performs crossover, creating a blend of two parents. 
@@ -56,15 +95,15 @@ def on_crossover(parents, offspring_size, ga_instance):
         parent2_solution = parents[(idx + 1) % len(parents)]
         idx += 1
 
-        parent1_cards = [all_cards_map[idx_to_api_id[gene]] for gene in parent1_solution]
-        parent2_cards = [all_cards_map[idx_to_api_id[gene]] for gene in parent2_solution]
+        parent1_cards = card_table.lookup(parent1_solution)
+        parent2_cards = card_table.lookup(parent2_solution)
 
         offspring_inks = get_deck_inks(parent1_cards)
-        if len(offspring_inks) > 2: offspring_inks = random.sample(offspring_inks, 2)
-        if not offspring_inks: offspring_inks = random.sample(INK_COLORS, 2)
+        if len(offspring_inks) > 2: offspring_inks = ga_rng.sample(offspring_inks, 2)
+        if not offspring_inks: offspring_inks = ga_rng.sample(INK_COLORS, 2)
 
         combined_pool = [card for card in parent1_cards + parent2_cards if card.color in offspring_inks or card.color is None]
-        random.shuffle(combined_pool)
+        ga_rng.shuffle(combined_pool)
         
         offspring_deck = []
         card_counts = Counter()
@@ -77,16 +116,16 @@ def on_crossover(parents, offspring_size, ga_instance):
         # Backfill and trim to ensure exactly 60 cards
         valid_fill_pool = [c for c in all_cards_map.values() if c.color in offspring_inks or c.color is None]
         while len(offspring_deck) < 60:
-            candidate = random.choice(valid_fill_pool)
+            candidate = ga_rng.choice(valid_fill_pool)
             if card_counts[candidate.name] < 4:
                 offspring_deck.append(candidate)
                 card_counts[candidate.name] += 1
         while len(offspring_deck) > 60:
-            offspring_deck.pop(random.randrange(len(offspring_deck)))
+            offspring_deck.pop(ga_rng.randrange(len(offspring_deck)))
 
         # CRITICAL VALIDATION STEP
         if is_deck_valid(offspring_deck):
-            new_solution = [api_id_to_idx[c.api_id] for c in offspring_deck]
+            new_solution = card_table.indices(offspring_deck)
             offspring.append(new_solution)
         # If not valid, the loop continues and a new offspring is generated from the next parents.
 
@@ -95,7 +134,7 @@ def on_crossover(parents, offspring_size, ga_instance):
 def get_valid_card_pool(deck_cards):
     """Helper function to get a pool of cards with the same ink colors as the deck."""
     inks = get_deck_inks(deck_cards)
-    if not inks: inks = random.sample(INK_COLORS, 2)
+    if not inks: inks = ga_rng.sample(INK_COLORS, 2)
     return [card for card in all_cards_map.values() if card.color in inks or card.color is None]
 
 def on_mutation(offspring, ga_instance):
@@ -104,7 +143,7 @@ def on_mutation(offspring, ga_instance):
     """
     mutated_offspring = []
     for solution in offspring:
-        original_deck_cards = [all_cards_map[idx_to_api_id[gene]] for gene in solution]
+        original_deck_cards = card_table.lookup(solution)
         
         # If the deck is somehow invalid before mutation, don't touch it
         if not is_deck_valid(original_deck_cards):
@@ -116,36 +155,36 @@ def on_mutation(offspring, ga_instance):
         unique_valid_pool = list({c.name: c for c in valid_pool}.values())
         card_counts = Counter(c.name for c in deck_cards)
 
-        mutation_type = random.choices(['swap_playset', 'consolidate_slot', 'tech_swap'], weights=[0.4, 0.4, 0.2], k=1)[0]
+        mutation_type = ga_rng.choices(['swap_playset', 'consolidate_slot', 'tech_swap'], weights=[0.4, 0.4, 0.2], k=1)[0]
 
         if mutation_type == 'swap_playset':
             playsets = [name for name, count in card_counts.items() if count == 4]
             if playsets:
-                name_to_swap = random.choice(playsets)
+                name_to_swap = ga_rng.choice(playsets)
                 possible_new = [c for c in unique_valid_pool if c.name not in card_counts]
                 if possible_new:
-                    new_card = random.choice(possible_new)
+                    new_card = ga_rng.choice(possible_new)
                     deck_cards = [c for c in deck_cards if c.name != name_to_swap]
                     deck_cards.extend([new_card] * 4)
 
         elif mutation_type == 'consolidate_slot':
             two_ofs = [name for name, count in card_counts.items() if count == 2]
             if len(two_ofs) >= 2:
-                names_to_remove = random.sample(two_ofs, 2)
+                names_to_remove = ga_rng.sample(two_ofs, 2)
                 possible_new = [c for c in unique_valid_pool if c.name not in card_counts]
                 if possible_new:
-                    new_card = random.choice(possible_new)
+                    new_card = ga_rng.choice(possible_new)
                     deck_cards = [c for c in deck_cards if c.name not in names_to_remove]
                     deck_cards.extend([new_card] * 4)
 
         elif mutation_type == 'tech_swap':
             tech_cards = [name for name, count in card_counts.items() if count in [1, 2]]
             if tech_cards:
-                name_to_swap = random.choice(tech_cards)
+                name_to_swap = ga_rng.choice(tech_cards)
                 card_to_swap = next(c for c in deck_cards if c.name == name_to_swap)
                 possible_new = [c for c in unique_valid_pool if c.name != name_to_swap]
                 if possible_new:
-                    new_card = random.choice(possible_new)
+                    new_card = ga_rng.choice(possible_new)
                     deck_cards.remove(card_to_swap)
                     deck_cards.append(new_card)
 
@@ -153,20 +192,51 @@ def on_mutation(offspring, ga_instance):
         if not is_deck_valid(deck_cards):
             deck_cards = original_deck_cards
 
-        mutated_offspring.append([api_id_to_idx[card.api_id] for card in deck_cards])
+        mutated_offspring.append(card_table.indices(deck_cards))
 
     return np.array(mutated_offspring)
 
 
-def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None):
-    """Runs the genetic algorithm to optimize a deck."""
-    global all_cards_map, meta_decks, api_id_to_idx, idx_to_api_id
+def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None, pool=None, seed=None):
+    """
+    Runs the genetic algorithm to optimize a deck.
+
+    A single warm simulation pool is used for every fitness evaluation and the final
+    report. Pass `pool` to reuse one owned by the caller (e.g. the UI); otherwise one is
+    created here and shut down before returning. `seed` overrides the configured run seed.
+    """
+    global all_cards_map, meta_decks, card_table, worker_pool
     all_cards_map = all_cards
+    card_table = build_card_table(all_cards)
     meta_decks = meta_decks_tuple
 
-    card_api_ids = list(all_cards_map.keys())
-    api_id_to_idx = {api_id: i for i, api_id in enumerate(card_api_ids)}
-    idx_to_api_id = {i: api_id for i, api_id in enumerate(card_api_ids)}
+    owns_pool = pool is None
+    worker_pool = pool if pool is not None else fitness_calculator.create_worker_pool(all_cards_map, table=card_table)
+    try:
+        return _run_ga_with_pool(num_generations, progress_queue, seed)
+    finally:
+        if owns_pool:
+            worker_pool.close()
+            worker_pool.join()
+        worker_pool = None
+
+def racing_parents(num_parents_mating, fitness_batch_size, population_size):
+    """
+    Returns the parent count racing ranks each fitness batch against, or None to turn racing
+    off. Racing only sees one batch, so it needs the batch to be the whole population:
+    otherwise a deck could be dropped from its race while a stronger deck in another batch
+    decides selection.
+    """
+    if fitness_batch_size < population_size:
+        if fitness_calculator.RACING:
+            print(f"Racing needs fitness_batch_size ({fitness_batch_size}) to equal population_size "
+                  f"({population_size}); racing is off for this run.")
+        return None
+    return num_parents_mating
+
+def _run_ga_with_pool(num_generations, progress_queue, seed=None):
+    """Body of run_ga; expects the module globals (cards, meta decks, pool) to be set."""
+    global fitness_cache, run_seed, fitness_call_count, parents_per_batch
 
     config = configparser.ConfigParser()
     config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config.ini'))
@@ -174,9 +244,40 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
 
     ga_config = config['genetic_algorithm']
     population_size = ga_config.getint('population_size', 20)
-
-    initial_population_decks = generate_population(size=population_size, all_cards_map=all_cards_map)
-    initial_population = [[api_id_to_idx[card.api_id] for card in deck] for deck in initial_population_decks]
+    # Score a whole generation per fitness call by default so its games form one pool job
+    fitness_batch_size = min(ga_config.getint('fitness_batch_size', population_size), population_size)
+    num_parents_mating = ga_config.getint('num_parents_mating', 5)
+    parents_per_batch = racing_parents(num_parents_mating, fitness_batch_size, population_size)
+
+    # --- Seeding: one run seed drives deck generation, GA operators and every simulated game ---
+    configured_seed = ga_config.get('seed', '').strip()
+    if seed is not None:
+        run_seed = seed
+    else:
+        run_seed = int(configured_seed) if configured_seed else new_run_seed()
+    ga_rng.seed(run_seed)
+    fitness_call_count = 0
+    pending_batch_reports.clear()
+    generation_reports = []
+    print(f"GA run seed: {run_seed}")
+
+    # --- Fitness cache setup ---
+    fitness_cache = None
+    cache_db_path = None
+    meta_signature = None
+    if config.getboolean('fitness_cache', 'enabled', fallback=True):
+        fitness_cache = FitnessCache(
+            max_entries=config.getint('fitness_cache', 'max_entries', fallback=5000),
+            max_games_per_matchup=config.getint('fitness_cache', 'max_games_per_matchup', fallback=20)
+        )
+        if config.getboolean('fitness_cache', 'persist', fallback=False):
+            cache_db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'lorcana.db'))
+            # Evolution plays greedy-AI games under the configured settings
+            meta_signature = FitnessCache.meta_signature(meta_decks, fitness_calculator.simulation_settings())
+            fitness_cache.load(cache_db_path, meta_signature)
+
+    initial_population_decks = generate_population(size=population_size, all_cards_map=all_cards_map, rng=ga_rng)
+    initial_population = [card_table.indices(deck) for deck in initial_population_decks]
 
     # --- State and callback setup ---
     early_stopping_patience = ga_config.getint('early_stopping_patience', 10)
@@ -194,12 +295,39 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
         else:
             generations_without_improvement += 1
 
+        cache_stats = fitness_cache.pop_generation_stats() if fitness_cache else None
+        if cache_stats:
+            print(f"Generation {ga_instance.generations_completed}: fitness cache {cache_stats['hits']} hits, "
+                  f"{cache_stats['misses']} misses, {cache_stats['accumulated_games']} games accumulated "
+                  f"({cache_stats['entries']} decks cached)")
+
+        reductions = [r["paired_variance_reduction"] for r in pending_batch_reports if r["paired_variance_reduction"] is not None]
+        generation_report = {
+            "generation": ga_instance.generations_completed,
+            "games": sum(r["games"] for r in pending_batch_reports),
+            "games_saved": sum(r["games_saved"] for r in pending_batch_reports),
+            "turns_saved": sum(r["turns_saved"] for r in pending_batch_reports),
+            "paired_variance_reduction": (sum(reductions) / len(reductions)) if reductions else None,
+            "cache_stats": cache_stats
+        }
+        pending_batch_reports.clear()
+        generation_reports.append(generation_report)
+        if generation_report["games_saved"]:
+            print(f"Generation {ga_instance.generations_completed}: racing saved {generation_report['games_saved']} games")
+        if generation_report["turns_saved"]:
+            print(f"Generation {ga_instance.generations_completed}: adjudication saved up to {generation_report['turns_saved']} turns")
+        if generation_report["paired_variance_reduction"] is not None:
+            print(f"Generation {ga_instance.generations_completed}: {generation_report['games']} games, "
+                  f"paired variance reduction {generation_report['paired_variance_reduction']:.1%}")
+
         if progress_queue:
             progress_queue.put({
                 "type": "progress",
                 "current": ga_instance.generations_completed,
                 "total": num_generations,
-                "best_fitness": best_fitness_so_far
+                "best_fitness": best_fitness_so_far,
+                "cache_stats": cache_stats,
+                "paired_variance_reduction": generation_report["paired_variance_reduction"]
             })
 
         if generations_without_improvement >= early_stopping_patience:
@@ -208,15 +336,18 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
 
     ga_instance = pygad.GA(
         num_generations=num_generations,
-        num_parents_mating=ga_config.getint('num_parents_mating', 5),
+        num_parents_mating=num_parents_mating,
         initial_population=initial_population,
         fitness_func=fitness_func,
+        fitness_batch_size=fitness_batch_size,
         on_generation=on_generation_callback,
         crossover_type=on_crossover,
         mutation_type=on_mutation,
         mutation_percent_genes=ga_config.getint('mutation_percent_genes', 5),
-        gene_space=range(len(all_cards_map)),
-        allow_duplicate_genes=True
+        gene_space=range(len(card_table)),
+        gene_type=int,
+        allow_duplicate_genes=True,
+        random_seed=run_seed % (2 ** 32)
     )
 
     try:
@@ -224,10 +355,11 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
     except KeyboardInterrupt:
         print("\nGA interrupted by user. Returning best solution found so far.")
     finally:
-        pass
+        if fitness_cache is not None and cache_db_path:
+            fitness_cache.save(cache_db_path, meta_signature)
 
     solution, solution_fitness, solution_idx = ga_instance.best_solution(pop_fitness=ga_instance.last_generation_fitness)
-    best_deck_cards = [all_cards_map[idx_to_api_id[gene]] for gene in solution]
+    best_deck_cards = card_table.lookup(solution)
     best_deck = Deck(name="Optimized Deck", cards=best_deck_cards)
 
     # --- Final, more accurate fitness calculation for the best deck ---
@@ -242,7 +374,10 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
         best_deck_cards, 
         meta_decks, 
         all_cards_map, 
-        detailed_report=True
+        detailed_report=True,
+        pool=worker_pool,
+        seed=derive_seed(run_seed, "final"),
+        mcts=fitness_calculator.FINAL_EVALUATION_MCTS
     )
     
     # Reset to a lower value for any subsequent runs within the same session
@@ -250,5 +385,7 @@ def run_ga(all_cards, meta_decks_tuple, num_generations=10, progress_queue=None)
 
     return {
         "best_deck": best_deck,
-        "results": detailed_results
+        "results": detailed_results,
+        "run_seed": run_seed,
+        "generation_reports": generation_reports
     }
@@ -164,11 +164,16 @@ class MainApp(ctk.CTk):
         win_rate_frame.pack(pady=10, padx=10, fill="x")
         ctk.CTkLabel(win_rate_frame, text="Win Rates vs. Meta Decks", font=ctk.CTkFont(weight="bold")).pack(pady=5)
 
+        intervals = results_data.get('win_rate_intervals_by_meta_deck', {})
         for deck_name, rate in sorted(results_data['win_rates_by_meta_deck'].items()):
             deck_frame = ctk.CTkFrame(win_rate_frame, fg_color="transparent")
             deck_frame.pack(fill="x", padx=10)
             ctk.CTkLabel(deck_frame, text=f"{deck_name}:").pack(side="left")
-            ctk.CTkLabel(deck_frame, text=f"{rate:.2%}").pack(side="right")
+            rate_text = f"{rate:.2%}"
+            if deck_name in intervals:
+                low, high = intervals[deck_name]
+                rate_text += f" ({low:.0%}-{high:.0%})"
+            ctk.CTkLabel(deck_frame, text=rate_text).pack(side="right")
 
         decklist_frame = ctk.CTkFrame(results_window)
         decklist_frame.pack(pady=10, padx=10, fill="both", expand=True)
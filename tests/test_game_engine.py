@@ -174,7 +174,7 @@ class TestGameEngine(unittest.TestCase):
         # Player 1 plays a Bodyguard
         bodyguard_card = MockCard("Hercules", cost=1, strength=1, willpower=3, keywords={'bodyguard': True})
         self.player1.hand.append(bodyguard_card)
-        self.player1.inkwell_ready.append(MockCard("Ink")) # Give player ink
+        self.player1.ink_ready += 1 # Give player ink
 
         self.player1.play_character(bodyguard_card)
 
@@ -241,6 +241,20 @@ class TestGameEngine(unittest.TestCase):
         self.assertNotIn(defender, self.player2.characters_in_play)
         self.assertEqual(challenger.remaining_willpower, 1)
 
+    def test_challenger_keyword_string_boosts_challenges(self):
+        """Test that 'Challenger +N' as loaded from the database (a keyword string) adds N when challenging."""
+        attacker = BoardCharacter(MockCard("Challenger", strength=1, willpower=4, keywords={'challenger +2'}),
+                                  self.player1)
+        attacker.is_newly_played = False
+        self.player1.characters_in_play.append(attacker)
+        defender = BoardCharacter(MockCard("Defender", strength=1, willpower=3), self.player2)
+        defender.is_exerted = True
+        self.player2.characters_in_play.append(defender)
+
+        self.player1.challenge(attacker, defender)
+        self.assertEqual(defender.damage, 3)
+        self.assertEqual(attacker.damage, 1)
+
     def test_shift_mechanic(self):
         """Test that a character can be played for its Shift cost on top of another character."""
         # Player 1 has a character on the board
@@ -255,7 +269,7 @@ class TestGameEngine(unittest.TestCase):
         self.player1.hand.append(shift_character_card)
 
         # Player 1 has enough ink for the shift cost, but not the full cost
-        self.player1.inkwell_ready = [MockCard("Ink")] * 3
+        self.player1.ink_ready = 3
 
         # Player should choose to play the shift character
         self.player1.play_character(shift_character_card, shift_target=base_character)
@@ -286,19 +300,19 @@ class TestGameEngine(unittest.TestCase):
 
         # This action should fail because the card is not inkable
         self.player1.play_to_inkwell(uninkable_card)
-        self.assertEqual(len(self.player1.inkwell_ready), 0)
+        self.assertEqual(self.player1.ink_ready, 0)
         self.assertIn(uninkable_card, self.player1.hand)
 
         # Ink the inkable card
         self.player1.play_to_inkwell(inkable_card)
-        self.assertEqual(len(self.player1.inkwell_ready), 1)
+        self.assertEqual(self.player1.ink_ready, 1)
         self.assertNotIn(inkable_card, self.player1.hand)
 
     def test_player_play_card(self):
         """Test that a player can play a character by spending the correct amount of ink."""
         character_card = MockCard("Playable Character", cost=3)
         self.player1.hand = [character_card]
-        self.player1.inkwell_ready = [MockCard(cost=1, inkable=True)] * 4  # Replaced with MockCard
+        self.player1.ink_ready = 4
 
         self.player1.play_character(character_card)
 
@@ -329,7 +343,7 @@ class TestGameEngine(unittest.TestCase):
         # Player 2 has an action card that deals damage
         damage_action_card = MockCard("Fire The Cannons!", type="Action", cost=1, parsed_abilities=[{'effect': 'DealDamage', 'value': 2, 'target': 'ChosenCharacter'}])
         self.player2.hand.append(damage_action_card)
-        self.player2.inkwell_ready = [MockCard("Ink")] * 1
+        self.player2.ink_ready = 1
 
         # Player 2 attempts to play the action targeting the Ward character
         self.player2.play_action(damage_action_card, ability_target=ward_character)
@@ -426,6 +440,475 @@ class TestGameEngine(unittest.TestCase):
         self.assertEqual(self.player1.lore, initial_lore, "Player's lore should not change when questing with a no-lore character.")
         self.assertTrue(no_lore_char.is_exerted, "Character should be exerted after attempting to quest.")
 
+    def test_seeded_games_are_reproducible(self):
+        """Test that two games built from the same seed shuffle and play out identically."""
+        deck1 = [MockCard(f"P1 Card {i}", cost=(i % 4) + 1, strength=2, willpower=3, lore=1) for i in range(60)]
+        deck2 = [MockCard(f"P2 Card {i}", cost=(i % 5) + 1, strength=3, willpower=2, lore=2) for i in range(60)]
+
+        game_a = GameState(deck1, deck2, {}, verbose=False, seed=42)
+        game_b = GameState(deck1, deck2, {}, verbose=False, seed=42)
+        self.assertEqual([c.name for c in game_a.player1.deck], [c.name for c in game_b.player1.deck])
+        self.assertEqual([c.name for c in game_a.player2.deck], [c.name for c in game_b.player2.deck])
+
+        game_a.run_simulation()
+        game_b.run_simulation()
+        self.assertEqual(game_a.current_turn, game_b.current_turn)
+        self.assertEqual((game_a.player1.lore, game_a.player2.lore), (game_b.player1.lore, game_b.player2.lore))
+
+        # Each seat has its own stream, so the two decks are shuffled independently.
+        game_c = GameState(deck1, deck2, {}, verbose=False, seed=43)
+        self.assertNotEqual([c.name for c in game_a.player1.deck], [c.name for c in game_c.player1.deck])
+
+    def test_first_player_index_swaps_seats(self):
+        """Test that the second seat can be put on the play without changing the shuffles."""
+        deck1 = [MockCard(f"P1 Card {i}", cost=(i % 4) + 1, strength=2, willpower=3, lore=1) for i in range(60)]
+        deck2 = [MockCard(f"P2 Card {i}", cost=(i % 5) + 1, strength=3, willpower=2, lore=2) for i in range(60)]
+
+        on_play = GameState(deck1, deck2, {}, verbose=False, seed=42)
+        on_draw = GameState(deck1, deck2, {}, verbose=False, seed=42, first_player_index=1)
+        self.assertEqual([c.name for c in on_play.player1.deck], [c.name for c in on_draw.player1.deck])
+        self.assertIs(on_draw.active_player, on_draw.player2)
+
+        on_draw.start_game()
+        on_draw.next_turn()
+        self.assertIs(on_draw.active_player, on_draw.player1)
+        self.assertEqual(on_draw.current_turn, 1)
+        on_draw.next_turn()
+        self.assertEqual(on_draw.current_turn, 2)
+
+    def test_adjudication_matches_played_out_games(self):
+        """Test that adjudicated games end early with the winner the full game would have had."""
+        strong = [MockCard(f"Strong {i}", cost=(i % 3) + 1, strength=3, willpower=4, lore=2) for i in range(60)]
+        weak = [MockCard(f"Weak {i}", cost=6, strength=1, willpower=1, lore=0) for i in range(12)]
+        adjudicated_games = 0
+        for seed in range(20):
+            full = GameState(strong, weak, {}, verbose=False, seed=seed, first_player_index=seed % 2)
+            full.run_simulation()
+            quick = GameState(strong, weak, {}, verbose=False, seed=seed, first_player_index=seed % 2, adjudicate=True)
+            quick.run_simulation()
+            self.assertEqual(full.players.index(full.winner), quick.players.index(quick.winner))
+            self.assertLessEqual(quick.current_turn, full.current_turn)
+            if quick.adjudicated:
+                adjudicated_games += 1
+                self.assertGreater(quick.turns_saved, 0)
+        self.assertGreater(adjudicated_games, 0)
+
+    def test_adjudication_skips_games_with_card_draw(self):
+        """Test that a trailing player who can draw extra cards is never written off."""
+        game = GameState([], [], {}, verbose=False, adjudicate=True)
+        game.current_turn = 10
+        game.player1.lore = 19
+        game.player1.deck = deque([MockCard("Filler")] * 20)
+        self.assertTrue(game.adjudicate_game())
+
+        draw_card = MockCard("Draw", parsed_abilities=[{'trigger': 'OnPlay', 'effect': 'DrawCard', 'value': '2'}])
+        game = GameState([], [draw_card], {}, verbose=False, adjudicate=True)
+        game.current_turn = 10
+        game.player1.lore = 19
+        game.player1.deck = deque([MockCard("Filler")] * 20)
+        self.assertFalse(game.adjudicate_game())
+
+    def test_keyword_values_are_precomputed(self):
+        """Test that keyword strings and keyword dicts parse into the same typed attributes."""
+        from src.game_engine.card import precompute_keywords
+        from_strings = MockCard("Strings", keywords={'resist +2', 'singer 5', 'challenger +3', 'shift 4', 'rush', 'ward'})
+        from_dict = MockCard("Dict", keywords={'resist +2': True, 'singer 5': True, 'challenger': 3, 'shift': 4,
+                                               'rush': True, 'ward': True})
+        for card in (from_strings, from_dict):
+            self.assertEqual((card.resist, card.singer, card.challenger, card.shift_cost), (2, 5, 3, 4))
+            self.assertTrue(card.has_rush and card.has_ward)
+            self.assertFalse(card.has_evasive or card.has_bodyguard or card.has_reckless or card.has_support)
+
+        plain = MockCard("Plain", keywords={'resist'})
+        self.assertEqual((plain.resist, plain.shift_cost), (0, None))
+        plain.keywords.add('evasive')
+        precompute_keywords(plain)
+        self.assertTrue(plain.has_evasive)
+
+    def test_abilities_are_compiled_and_indexed_by_trigger(self):
+        """Test that ability rows compile to typed abilities grouped by trigger, and dispatch by effect."""
+        from unittest.mock import patch
+        from src.game_engine import ability_resolver
+        card = MockCard("Library", type="Location", parsed_abilities=[
+            {'trigger': 'OnBanishmentAtLocation', 'effect': 'DrawCard', 'target': 'Player', 'value': '1'},
+            {'trigger': 'OnPlay', 'effect': 'Heal', 'target': 'Self', 'value': '2'},
+        ])
+        self.assertEqual(card.abilities_by_trigger['OnBanishmentAtLocation'][0].value, 1)
+        self.assertEqual([a.effect for a in card.abilities_by_trigger['OnPlay']], ['Heal'])
+        self.assertNotIn('OnQuest', card.abilities_by_trigger)
+
+        # Unknown effects are ignored until a handler is registered for them
+        heal = card.abilities_by_trigger['OnPlay'][0]
+        ability_resolver.AbilityResolver.resolve_ability(heal, card, self.player1)
+        calls = []
+        with patch.dict(ability_resolver.EFFECT_HANDLERS, {'Heal': lambda *args: calls.append(args)}):
+            ability_resolver.AbilityResolver.resolve_ability(heal, card, self.player1)
+        self.assertEqual(calls, [(heal, self.player1, None, None)])
+
+    def test_board_indexes_follow_direct_changes(self):
+        """Test that the board's ready/exerted views, threat, location occupants and banish queue stay current."""
+        from src.game_engine.board_location import BoardLocation
+        location = BoardLocation(MockCard("Inn", type="Location", willpower=6, lore=2, move_cost=1), self.player1)
+        self.player1.locations_in_play.append(location)
+        first = BoardCharacter(MockCard("First", strength=2, willpower=2, lore=1), self.player1)
+        second = BoardCharacter(MockCard("Second", strength=3, willpower=4, lore=2), self.player1)
+        second.location = location
+        self.player1.characters_in_play.append(first)
+        self.player1.characters_in_play.append(second)
+        self.assertEqual(self.player1.characters_in_play.threat, 8)
+        self.assertEqual(location.occupants, 1)
+
+        first.is_exerted = True
+        self.assertEqual(self.player1.get_ready_characters(), [second])
+        self.assertEqual(self.player1.get_exerted_characters(), [first])
+        second.location = None
+        self.player1.ready_turn()
+        self.assertEqual(self.player1.lore, 0, "No character was left at the location.")
+        self.assertEqual(self.player1.get_ready_characters(), [first, second])
+
+        first.damage += 2
+        self.game.check_and_banish_characters()
+        self.assertEqual(list(self.player1.characters_in_play), [second])
+        self.assertEqual(self.player1.characters_in_play.threat, 5)
+        self.assertEqual(self.player1.characters_in_play.take_banished(), [])
+
+    def test_action_scores_are_cached_until_their_inputs_change(self):
+        """Test that a song is scored once for all its singers and re-scored when the opposing board changes."""
+        song = MockCard("Zap", type="Action - Song", cost=2, parsed_abilities=[
+            {'trigger': 'OnPlay', 'effect': 'DealDamage', 'target': 'Character', 'value': '2'}])
+        self.player1.hand = [song]
+        for name in ("Singer A", "Singer B"):
+            singer = BoardCharacter(MockCard(name, keywords={'singer 5'}, lore=1), self.player1)
+            singer.is_newly_played = False
+            self.player1.characters_in_play.append(singer)
+        target = BoardCharacter(MockCard("Target", strength=2, willpower=2, lore=2), self.player2)
+        self.player2.characters_in_play.append(target)
+
+        ranked = self.player1.rank_plays(self.player2)
+        self.assertEqual([play[3].card.name for play in ranked], ["Singer A", "Singer B"])
+        self.assertIs(ranked[0][2], target)
+        self.assertEqual(self.player1.score_evaluations, 1)
+
+        self.player1.rank_plays(self.player2)
+        self.assertEqual(self.player1.score_evaluations, 1)
+        target.damage = 1
+        self.player1.rank_plays(self.player2)
+        self.assertEqual(self.player1.score_evaluations, 2)
+
+        self.player1.hand = []
+        self.player1.ai_play_turn(self.player2)
+        self.assertEqual(self.player1.score_evaluations, 0)  # The count starts over every turn
+
+    def test_event_sinks_log_games(self):
+        """Test that silent games build no log, and a JSONL log replays into the verbose text output."""
+        import io
+        from contextlib import redirect_stdout
+        from src.benchmark import build_card_pool, build_decks
+        from src.game_engine import events
+        self.assertIsNone(self.game.log)
+        self.assertIsNone(GameState([], [], {}, verbose=True, event_sink=events.NullSink()).player1.log)
+
+        all_cards = build_card_pool(seed=2)
+        deck1, deck2 = build_decks(all_cards, 2, seed=2)
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            GameState(deck1.cards, deck2.cards, all_cards, verbose=True, seed=9).run_simulation()
+        jsonl = io.StringIO()
+        GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=9, event_sink=events.JsonlSink(jsonl)).run_simulation()
+
+        replayed = events.read_jsonl(jsonl.getvalue().splitlines())
+        self.assertIsInstance(replayed[0], events.GameStarted)
+        self.assertIsInstance(replayed[-2], events.GameOver)
+        self.assertTrue(any(isinstance(event, events.Quested) for event in replayed))
+        self.assertEqual("".join(event.text() + "\n" for event in replayed), printed.getvalue())
+
+    def test_snapshot_restore_and_clone_for_lookahead(self):
+        """Test that legal moves all apply, snapshots undo them, and clones play out independently."""
+        import random
+        from src.benchmark import build_card_pool, build_decks
+
+        def signature(game):
+            return (game.current_turn, game.active_player_index, game.game_over,
+                    [(p.lore, [c.name for c in p.hand], len(p.deck), len(p.discard_pile), p.ink_ready, p.ink_exerted,
+                      [(c.card.name, c.damage, c.is_exerted, c.location is not None) for c in p.characters_in_play])
+                     for p in (game.player1, game.player2)])
+
+        all_cards = build_card_pool(seed=3)
+        deck1, deck2 = build_decks(all_cards, 2, seed=3)
+        game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=4)
+        game.start_game()
+        chooser = random.Random(0)
+        while not game.game_over and game.current_turn <= 12:
+            before, saved = signature(game), game.snapshot()
+            moves = list(game.legal_moves())
+            self.assertEqual(moves[-1].kind, 'end_turn')
+            for move in moves[:-1]:
+                self.assertTrue(game.apply_move(move), move)
+                game.restore(saved)
+                self.assertEqual(signature(game), before)
+            self.assertTrue(game.apply_move(chooser.choice(moves)))
+
+        clone = game.clone()
+        self.assertEqual(signature(clone), signature(game))
+        self.assertIsNot(clone.player1.characters_in_play, game.player1.characters_in_play)
+        snapshot = game.snapshot()
+        original = game.run_simulation()
+        after = signature(game)
+        game.restore(snapshot)
+        cloned = clone.run_simulation()
+        self.assertEqual(signature(clone), after)
+        self.assertEqual(cloned and cloned.name, original and original.name)
+
+    def test_mcts_controller_pilots_a_seat_reproducibly(self):
+        """Test that an MCTS-controlled seat plays a whole game and replays it from its seed."""
+        from src.benchmark import build_card_pool, build_decks
+        from src.game_engine import events
+        from src.game_engine.mcts import MCTSController
+        all_cards = build_card_pool(seed=6)
+        deck1, deck2 = build_decks(all_cards, 2, seed=6)
+
+        logs = []
+        for _ in range(2):
+            controller = MCTSController(rollouts=6, seed=11)
+            sink = events.ListSink()
+            game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=2, event_sink=sink,
+                             controllers=(None, controller))
+            game.run_simulation()
+            self.assertTrue(game.game_over)
+            self.assertIsNone(game.player1.controller)
+            self.assertGreater(controller.total_rollouts, 0)
+            logs.append([event.text() for event in sink.events])
+        self.assertEqual(logs[0], logs[1])
+        decisions = [text for text in logs[0] if "MCTS AI" in text]
+        self.assertTrue(decisions)
+        self.assertFalse(any("Player 1's MCTS" in text for text in decisions))
+        with self.assertRaises(ValueError):
+            MCTSController(rollouts=0)
+
+    def test_reset_replays_games_reusing_players_and_characters(self):
+        """Test that a reset GameState plays each seed like a new one, reusing its zones and board characters."""
+        from src.benchmark import build_card_pool, build_decks
+        all_cards = build_card_pool(seed=8)
+        decks = build_decks(all_cards, 3, seed=8)
+
+        def outcome(game):
+            return (game.players.index(game.winner) if game.winner else None, game.current_turn,
+                    game.player1.lore, game.player2.lore, [c.name for c in game.player2.discard_pile])
+
+        game = GameState(decks[0].cards, decks[1].cards, all_cards, verbose=False, seed=0, adjudicate=True)
+        game.run_simulation()
+        player1, hand, board = game.player1, game.player1.hand, game.player1.characters_in_play
+        pooled = list(player1.character_pool)
+        self.assertEqual(len(pooled), player1.characters_created)
+
+        for seed in range(1, 6):
+            deck1, deck2 = decks[seed % 3].cards, decks[(seed + 1) % 3].cards
+            game.reset(deck1, deck2, seed=seed, first_player_index=seed % 2)
+            self.assertEqual((game.current_turn, game.player1.lore, len(game.player1.hand)), (0, 0, 0))
+            self.assertEqual(len(game.player1.deck), 60)
+            game.run_simulation()
+            fresh = GameState(deck1, deck2, all_cards, verbose=False, seed=seed, first_player_index=seed % 2,
+                              adjudicate=True)
+            fresh.run_simulation()
+            self.assertEqual(outcome(game), outcome(fresh))
+
+        self.assertIs(game.player1, player1)
+        self.assertIs(player1.hand, hand)
+        self.assertIs(player1.characters_in_play, board)
+        self.assertEqual(player1.character_pool[:len(pooled)], pooled)
+        self.assertTrue(all(c.owner is player1 for c in player1.character_pool))
+
+    def test_zobrist_hash_identifies_transpositions(self):
+        """Test that the running hash ignores move order, tracks every change, and survives restore."""
+        from src.game_engine import zobrist
+        ink_card = MockCard(name="Ink Fodder", api_id="ink", inkable=True)
+        character = MockCard(name="Hero", api_id="hero", cost=1, strength=2, willpower=3, lore=1)
+        self.player1.hand = [ink_card, character]
+        self.player1.hand_hash = ink_card.zobrist + character.zobrist
+        self.player1.ink_ready = 1
+        start, saved = self.game.zobrist_hash(), self.game.snapshot()
+
+        self.player1.play_to_inkwell(ink_card)
+        self.player1.play_character(character)
+        ink_first = self.game.zobrist_hash()
+        self.assertEqual(ink_first, zobrist.full_hash(self.game))
+        self.game.restore(saved)
+        self.assertEqual(self.game.zobrist_hash(), start)
+
+        self.player1.play_character(character)
+        self.player1.play_to_inkwell(ink_card)
+        self.assertEqual(self.game.zobrist_hash(), ink_first)
+
+        self.player1.characters_in_play[0].damage = 1
+        self.assertNotEqual(self.game.zobrist_hash(), ink_first)
+        self.assertEqual(self.game.zobrist_hash(), zobrist.full_hash(self.game))
+
+    def test_transposition_table_replacement_and_stats(self):
+        """Test that the table keeps deeper entries within a search and reports its usage."""
+        from src.game_engine.zobrist import TranspositionTable
+        table = TranspositionTable(max_entries=4)
+        self.assertTrue(table.store(1, "deep", depth=5))
+        self.assertFalse(table.store(5, "shallow", depth=1))  # Same slot, shallower, same search
+        self.assertEqual(table.lookup(1), "deep")
+        self.assertIsNone(table.lookup(5))
+        table.new_search()
+        self.assertTrue(table.store(5, "new", depth=1))  # Entries from earlier searches give way
+        self.assertIsNone(table.lookup(1))
+
+        stats = table.stats()
+        self.assertEqual((stats["entries"], stats["probes"], stats["hits"]), (1, 3, 1))
+        self.assertEqual((stats["replacements"], stats["rejections"]), (1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+        self.assertGreater(stats["memory_bytes"], 0)
+
+    def test_turn_solver_finds_lethal_and_clearing_lines(self):
+        """Test that the solver finds lethal and board-clearing lines, and solves exported positions the same."""
+        import json
+        from src.game_engine import solver
+        questers = [MockCard(f"Quester {i}", api_id=f"q{i}", strength=1, willpower=2, lore=1) for i in range(2)]
+        attacker_card = MockCard("Attacker", api_id="attacker", strength=3, willpower=4, lore=1)
+        threat_card = MockCard("Threat", api_id="threat", strength=1, willpower=2, lore=2)
+        for card in questers + [attacker_card]:
+            character = BoardCharacter(card, self.player1)
+            character.is_newly_played = False
+            self.player1.characters_in_play.append(character)
+        threat = BoardCharacter(threat_card, self.player2)
+        threat.is_exerted = True
+        self.player2.characters_in_play.append(threat)
+
+        self.player1.lore = 17
+        lethal = solver.solve_turn(self.game)
+        self.assertTrue(lethal.lethal)
+        self.assertEqual((lethal.value, lethal.lore, len(lethal.line)), ((True, 20), 20, 3))
+        self.assertTrue(all(move.startswith("quest") for move in lethal.line))
+        self.assertTrue(lethal.complete)
+        self.assertGreater(lethal.nodes_per_second, 0)
+        self.assertEqual(self.player1.lore, 17)  # The game itself is left as it was
+
+        self.player1.lore = 10  # Not lethal, so clearing the quester comes first
+        cleared = solver.solve_turn(self.game, 'clear')
+        self.assertEqual(cleared.opponent_lore, 0)
+        self.assertIn("challenge with Attacker targeting Threat", cleared.line)
+        self.assertEqual(cleared.lore, 12)  # The other characters still quest
+
+        all_cards = {card.api_id: card for card in questers + [attacker_card, threat_card]}
+        position = json.loads(json.dumps(solver.export_position(self.game)))
+        self.assertEqual(solver.solve_turn(position, 'clear', all_cards=all_cards).value, cleared.value)
+        with self.assertRaises(ValueError):
+            solver.solve_turn(self.game, 'mill')
+
+        self.player1.lore = 16
+        self.assertIsNone(solver.find_lethal(self.game))  # Three lore can't reach 20
+        self.player1.lore = 17
+        self.game.lethal_search = True
+        self.player1.ai_play_turn(self.player2)  # Lore >= 14: the AI checks for lethal first
+        self.assertTrue(self.game.game_over)
+        self.assertIs(self.game.winner, self.player1)
+
+    def test_lethal_search_is_opt_in_and_ignores_unseen_draws(self):
+        """Test that the AI only looks for lethal when the game asks, reusing one table, and never counts on its draws."""
+        from unittest.mock import patch
+        from src.game_engine import solver
+        draw = MockCard("Draw", api_id="draw", type='Action', cost=1,
+                        parsed_abilities=[{'trigger': 'OnPlay', 'effect': 'DrawCard', 'value': '1'}])
+        gain = MockCard("Gain", api_id="gain", type='Action', cost=1,
+                        parsed_abilities=[{'trigger': 'OnPlay', 'effect': 'GainLore', 'value': '2'}])
+        self.player1.hand = [draw]
+        self.player1.hand_hash = draw.zobrist
+        self.player1.deck.clear()
+        self.player1.deck.extend([gain, gain])
+        self.player1.ink_ready = 2
+        self.player1.lore = 18
+
+        # Drawing Gain and playing it wins, but only if the deck's order is known
+        self.assertTrue(solver.solve_turn(self.game, target=20).lethal)
+        self.assertTrue(solver.find_lethal(self.game, known_draws=True).lethal)
+        self.assertIsNone(solver.find_lethal(self.game))
+
+        with patch.object(solver, 'find_lethal', wraps=solver.find_lethal) as find_lethal:
+            self.player1.ai_play_turn(self.player2)
+            find_lethal.assert_not_called()
+            self.game.lethal_search = True
+            for _ in range(2):
+                self.player1.ai_play_turn(self.player2)
+            self.assertEqual(find_lethal.call_count, 2)
+        tables = {id(call.kwargs['table']) for call in find_lethal.call_args_list}
+        self.assertEqual(tables, {id(self.player1.lethal_table)})
+
+    def test_benchmark_fixture_decks_play_reproducibly(self):
+        """Test that the database-free benchmark pool builds legal decks that replay from a seed."""
+        from src.benchmark import build_card_pool, build_decks
+        all_cards = build_card_pool(seed=1)
+        deck1, deck2 = build_decks(all_cards, 2, seed=1)
+        for deck in (deck1, deck2):
+            self.assertEqual(len(deck.cards), 60)
+            self.assertLessEqual(len({card.color for card in deck.cards}), 2)
+
+        winners = []
+        for _ in range(2):
+            game = GameState(deck1.cards, deck2.cards, all_cards, verbose=False, seed=5)
+            winner = game.run_simulation()
+            winners.append((winner.name if winner else None, game.current_turn))
+        self.assertEqual(winners[0], winners[1])
+
+    def test_batch_engine_plays_the_same_games_as_game_state(self):
+        """Test that batched games have the winners and lengths GameState gives for the same seeds."""
+        from src.benchmark import build_card_pool, build_decks
+        from src.game_engine import batch
+        all_cards = build_card_pool(seed=2, vanilla=True)
+        decks = build_decks(all_cards, 3, seed=2)
+        games = [(decks[i % 3].cards, decks[(i + 1) % 3].cards, 100 + i, i % 2) for i in range(12)]
+
+        expected = []
+        for deck1, deck2, seed, first_player_index in games:
+            game = GameState(deck1, deck2, all_cards, verbose=False, seed=seed, first_player_index=first_player_index)
+            game.run_simulation()
+            expected.append((game.players.index(game.winner) if game.winner else None, game.current_turn))
+        winners, turns = batch.play_games(games)
+        self.assertEqual(list(zip(winners, turns)), expected)
+        expected = []
+        for deck1, deck2, seed, first_player_index in games:
+            game = GameState(deck1, deck2, all_cards, verbose=False, seed=seed, first_player_index=first_player_index,
+                             lethal_search=True)
+            game.run_simulation()
+            expected.append((game.players.index(game.winner) if game.winner else None, game.current_turn))
+        winners, turns = batch.play_games(games, lethal_search=True)
+        self.assertEqual(list(zip(winners, turns)), expected)
+
+        full_pool = build_card_pool(seed=2)
+        self.assertFalse(all(batch.is_supported(card) for card in full_pool.values()))
+        draw_card = MockCard("Draw", lore=1, parsed_abilities=[{'trigger': 'OnPlay', 'effect': 'DrawCard', 'value': '1'}])
+        self.assertFalse(batch.is_supported(draw_card))
+        self.assertTrue(batch.is_supported(MockCard("Vanilla", lore=1, keywords={'evasive'})))
+        with self.assertRaises(ValueError):
+            batch.BatchGames([(list(full_pool.values())[:60], decks[0].cards, 1, 0)])
+
+    def test_shared_card_pool_attaches_lazily_and_plays_the_same_games(self):
+        """Test that a worker's view of a published card pool gives the same cards and batched games."""
+        from src.benchmark import build_card_pool, build_decks
+        from src.game_engine import batch
+        from src.game_engine.shared_cards import SharedCardPool, SharedCardTable
+        all_cards = build_card_pool(seed=2, vanilla=True)
+        decks = [all_cards.table.indices(deck.cards) for deck in build_decks(all_cards, 2, seed=2)]
+        games = [(decks[0], decks[1], seed, seed % 2) for seed in range(6)]
+
+        shared = SharedCardPool(all_cards)
+        table = SharedCardTable(shared.name)
+        try:
+            self.assertEqual(len(table), len(all_cards))
+            self.assertEqual(table.loaded, 0)
+            cards = table.lookup(decks[0])
+            self.assertEqual([(card.name, card.api_id) for card in cards],
+                             [(card.name, card.api_id) for card in all_cards.table.lookup(decks[0])])
+            self.assertEqual(table.loaded, len(set(decks[0])))
+            self.assertIs(table[decks[0][0]], cards[0])
+            with self.assertRaises(ValueError):
+                table.batch_columns['cost'][0] = 99  # Read-only
+            self.assertEqual(batch.play_games(games, table), batch.play_games(games, all_cards.table))
+        finally:
+            table.close()
+            shared.close()
+
 
 if __name__ == '__main__':
     unittest.main()
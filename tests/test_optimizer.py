@@ -1,5 +1,6 @@
 import pytest
 import random
+import numpy as np
 import os
 import sys
 from collections import Counter
@@ -8,7 +9,8 @@ from collections import Counter
 
 from src.optimizer.runner import run_ga, on_crossover, on_mutation, is_deck_valid, get_deck_inks
 from tests.test_utils import MockCard, MockDeck
-from src.game_engine.card import Card
+from src.game_engine.card import Card, CardPool, CardTable
+from src.game_engine.shared_cards import SharedCardPool
 from unittest.mock import patch, MagicMock
 
 # --- Test Fixtures and Mock Data ---
@@ -24,7 +26,7 @@ def all_cards_map():
     # Add some inkless cards
     for i in range(200, 210):
         cards.append(MockCard(api_id=f"test_{i}", name=f"Test Card {i} Inkless", color=None, cost=random.randint(1, 8), inkable=False))
-    return {card.api_id: card for card in cards}
+    return CardPool({card.api_id: card for card in cards})
 
 @pytest.fixture
 def mock_ga_instance(all_cards_map):
@@ -37,8 +39,7 @@ def mock_ga_instance(all_cards_map):
     # that rely on global state. A better long-term solution would be to refactor them into a class.
     from src.optimizer import runner
     runner.all_cards_map = all_cards_map
-    runner.api_id_to_idx = {api_id: i for i, api_id in enumerate(all_cards_map.keys())}
-    runner.idx_to_api_id = {i: api_id for i, api_id in enumerate(all_cards_map.keys())}
+    runner.card_table = all_cards_map.table
     return MockGA()
 
 def create_mock_deck_solution(all_cards_map, inks, size=60):
@@ -51,9 +52,8 @@ def create_mock_deck_solution(all_cards_map, inks, size=60):
         if card_counts[card.api_id] < 4:
             deck_cards.append(card)
             card_counts[card.api_id] += 1
-    
-    api_id_to_idx = {api_id: i for i, api_id in enumerate(all_cards_map.keys())}
-    return [api_id_to_idx[c.api_id] for c in deck_cards]
+
+    return all_cards_map.table.indices(deck_cards)
 
 # --- Optimizer Tests ---
 
@@ -86,8 +86,7 @@ def test_on_crossover(mock_ga_instance, all_cards_map):
     assert len(offspring_solution) == 60
 
     # Convert solution back to cards to validate
-    idx_to_api_id = {i: api_id for i, api_id in enumerate(all_cards_map.keys())}
-    offspring_cards = [all_cards_map[idx_to_api_id[gene]] for gene in offspring_solution]
+    offspring_cards = all_cards_map.table.lookup(offspring_solution)
 
     assert is_deck_valid(offspring_cards) == True
     card_counts = Counter(c.name for c in offspring_cards)
@@ -105,51 +104,521 @@ def test_on_mutation(mock_ga_instance, all_cards_map):
     assert len(mutated_solution) == 60
 
     # Convert solution back to cards to validate
-    idx_to_api_id = {i: api_id for i, api_id in enumerate(all_cards_map.keys())}
-    mutated_cards = [all_cards_map[idx_to_api_id[gene]] for gene in mutated_solution]
+    mutated_cards = all_cards_map.table.lookup(mutated_solution)
 
     assert is_deck_valid(mutated_cards) == True
     card_counts = Counter(c.name for c in mutated_cards)
     assert all(count <= 4 for count in card_counts.values())
 
 
-@patch('src.optimizer.runner.calculate_fitness')
-@patch('src.optimizer.runner.generate_population')
-def test_run_ga_with_early_stopping_and_progress(mock_generate_population, mock_calculate_fitness, all_cards_map):
-    """Tests the full run_ga loop with progress bar, early stopping, and interruption."""
-    # Setup for mocking
-    card_api_ids = list(all_cards_map.keys())
-    idx_to_api_id = {i: api_id for i, api_id in enumerate(card_api_ids)}
+def test_run_ga_with_early_stopping_and_progress(all_cards_map):
+    """Tests the full run_ga loop with progress reports, early stopping, and interruption."""
+    import queue
+    from src.optimizer import runner
+    fitness = runner.fitness_calculator
+    mock_deck_of_cards = all_cards_map.table.lookup(create_mock_deck_solution(all_cards_map, ['Amber', 'Amethyst']))
+    mock_meta_decks = [MockDeck(name=f"Meta Deck {i}", cards=[]) for i in range(3)]
+    batch_sizes = []
 
-    # Mock what generate_population returns: a list of decks (list of lists of Card objects)
-    mock_solution = create_mock_deck_solution(all_cards_map, ['Amber', 'Amethyst'])
-    mock_deck_of_cards = [all_cards_map[idx_to_api_id[gene]] for gene in mock_solution]
-    mock_generate_population.return_value = [mock_deck_of_cards] * 15 # population_size
+    def fake_batch(decks, meta_decks, all_cards_map, **kwargs):
+        # The initial population scores best; nothing after it improves
+        batch_sizes.append(len(decks))
+        return [0.8 if len(batch_sizes) == 1 else 0.7] * len(decks)
 
-    # Mock fitness to control the outcome for early stopping, accounting for elitism (1 parent saved).
-    # 15 for initial pop + 14 for each of the 11 generations in the run loop.
-    mock_calculate_fitness.side_effect = [0.8] * 15 + [0.7] * (14 * 11)
+    with patch.object(fitness, 'Pool'), \
+         patch.object(fitness, 'calculate_fitness_batch', side_effect=fake_batch), \
+         patch.object(fitness, 'calculate_fitness', return_value={}) as mock_final, \
+         patch.object(fitness, 'last_batch_report', {"games": 0, "games_saved": 0, "turns_saved": 0,
+                                                     "paired_variance_reduction": None}), \
+         patch.object(fitness, 'GAMES_PER_MATCHUP', fitness.GAMES_PER_MATCHUP), \
+         patch.object(runner, 'generate_population', side_effect=lambda size, **kwargs: [mock_deck_of_cards] * size):
+        # 1. Test Early Stopping: patience 10 stops after generation 11 (the first sets the best)
+        progress = queue.Queue()
+        result = run_ga(all_cards_map, mock_meta_decks, num_generations=50, progress_queue=progress, seed=1)
 
-    mock_meta_decks = [MockDeck(name=f"Meta Deck {i}", cards=[]) for i in range(3)]
+        assert len(result["best_deck"].cards) == 60
+        assert len(result["generation_reports"]) == 11
+        # One batch call per generation: the initial population (15), then each new one
+        # without the elite, whose fitness is kept (14)
+        assert batch_sizes == [15] + [14] * 11
+        mock_final.assert_called_once()
+        updates = [progress.get() for _ in range(progress.qsize())]
+        assert [update["current"] for update in updates if update["type"] == "progress"] == list(range(1, 12))
+        assert updates[-1]["type"] == "status"
+
+        # 2. Test Keyboard Interrupt
+        batch_sizes.clear()
+        with patch('pygad.GA.run', side_effect=KeyboardInterrupt) as mock_run:
+            result = run_ga(all_cards_map, mock_meta_decks, num_generations=20, seed=1)
+            assert len(result["best_deck"].cards) == 60
+            mock_run.assert_called_once()
+        # The best solution is picked from the initial population, scored in one batch
+        assert batch_sizes == [15]
+
+def test_fitness_func_scores_whole_batch_in_one_call(mock_ga_instance, all_cards_map):
+    """Ensures a batch of solutions is evaluated with a single batch fitness call."""
+    from src.optimizer import runner
+    valid_solution = create_mock_deck_solution(all_cards_map, ["Amber", "Amethyst"])
+    # Mixing two differently-inked halves gives a four-ink (invalid) deck
+    invalid_solution = valid_solution[:30] + create_mock_deck_solution(all_cards_map, ["Ruby", "Steel"], size=30)
+    batch = np.array([valid_solution, invalid_solution, valid_solution])
+
+    with patch.object(runner.fitness_calculator, 'calculate_fitness_batch', return_value=[0.5, 0.25]) as mock_batch:
+        fitnesses = runner.fitness_func(mock_ga_instance, batch, [0, 1, 2])
+
+    mock_batch.assert_called_once()
+    assert len(mock_batch.call_args[0][0]) == 2  # Only the valid decks are simulated
+    assert fitnesses == [0.5, -999, 0.25]
+
+def test_run_ga_reuses_one_pool_and_only_shuts_down_its_own(all_cards_map):
+    """run_ga scores every generation and the final report on one pool, closing it only if it made it."""
+    from src.optimizer import runner
+    fitness = runner.fitness_calculator
+    deck = all_cards_map.table.lookup(create_mock_deck_solution(all_cards_map, ["Amber", "Amethyst"]))
+    meta_decks = [MockDeck(name="Meta A", cards=[])]
+    pools_used = []
+
+    def fake_batch(decks, meta_decks, all_cards_map, pool=None, **kwargs):
+        pools_used.append(pool)
+        return [0.5] * len(decks)
+
+    def fake_final(deck_cards, meta_decks, all_cards_map, pool=None, **kwargs):
+        pools_used.append(pool)
+        return {}
+
+    with patch.object(fitness, 'Pool') as mock_pool, \
+         patch.object(fitness, 'calculate_fitness_batch', side_effect=fake_batch), \
+         patch.object(fitness, 'calculate_fitness', side_effect=fake_final), \
+         patch.object(fitness, 'last_batch_report', {"games": 0, "games_saved": 0, "turns_saved": 0,
+                                                     "paired_variance_reduction": None}), \
+         patch.object(fitness, 'GAMES_PER_MATCHUP', fitness.GAMES_PER_MATCHUP), \
+         patch.object(runner, 'generate_population', side_effect=lambda size, **kwargs: [deck] * size):
+        run_ga(all_cards_map, meta_decks, num_generations=2, seed=1)
+        mock_pool.assert_called_once()
+        created = mock_pool.return_value
+        assert len(pools_used) >= 3
+        assert all(isinstance(pool, fitness.WorkerPool) and pool.pool is created for pool in pools_used)
+        created.close.assert_called_once()
+        created.join.assert_called_once()
+
+        callers_pool = MagicMock()
+        pools_used.clear()
+        run_ga(all_cards_map, meta_decks, num_generations=2, seed=1, pool=callers_pool)
+        mock_pool.assert_called_once()
+        assert pools_used and all(pool is callers_pool for pool in pools_used)
+        callers_pool.close.assert_not_called()
+        callers_pool.join.assert_not_called()
+        callers_pool.terminate.assert_not_called()
+
+# --- Fitness Cache Tests ---
+
+def test_fitness_cache_key_ignores_card_order(all_cards_map):
+    """The cache key depends only on card counts, not on the order of the genes."""
+    from src.optimizer.fitness_cache import FitnessCache
+    cards = list(all_cards_map.values())[:15] * 4
+    shuffled = cards[:]
+    random.shuffle(shuffled)
+    assert FitnessCache.deck_key(cards) == FitnessCache.deck_key(shuffled)
+    assert FitnessCache.deck_key(cards) != FitnessCache.deck_key(cards[:-1] + [cards[0]])
+
+def test_fitness_cache_accumulates_games_and_evicts_lru():
+    """Repeat evaluations add games until the cap, and the least recently used entry is evicted."""
+    from src.optimizer.fitness_cache import FitnessCache
+    cache = FitnessCache(max_entries=2, max_games_per_matchup=8)
+
+    assert cache.lookup("deck_a") is None
+    assert cache.games_needed("deck_a", "Meta", 5) == 5
+    cache.record("deck_a", "Meta", 5, 5)
+    assert cache.games_needed("deck_a", "Meta", 5) == 3
+    cache.record("deck_a", "Meta", 0, 3)
+    assert cache.games_needed("deck_a", "Meta", 5) == 0
+    assert cache.win_rate("deck_a") == 5 / 8
+
+    cache.record("deck_b", "Meta", 1, 5)
+    cache.lookup("deck_a")  # Touch deck_a so deck_b becomes the oldest entry
+    cache.record("deck_c", "Meta", 1, 5)
+    assert cache.lookup("deck_b") is None
+    assert cache.lookup("deck_a") is not None
+
+    stats = cache.pop_generation_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["accumulated_games"] == 3
+    assert cache.pop_generation_stats()["hits"] == 0
+
+def test_fitness_cache_persistence_round_trip(tmp_path):
+    """Cached results persist to the database and are only reloaded for the same meta."""
+    from src.optimizer.fitness_cache import FitnessCache
+    db_path = str(tmp_path / "cache.db")
+    cache = FitnessCache()
+    cache.record("deck_a", "Meta", 3, 4)
+    cache.save(db_path, "meta_1")
+
+    reloaded = FitnessCache()
+    reloaded.load(db_path, "meta_1")
+    assert reloaded.win_rate("deck_a") == 0.75
+
+    other_meta = FitnessCache()
+    other_meta.load(db_path, "meta_2")
+    assert len(other_meta) == 0
+
+def test_fitness_cache_signature_covers_outcome_settings():
+    """Results played with different outcome-changing settings get different signatures."""
+    from src.optimizer import fitness
+    from src.optimizer.fitness_cache import FitnessCache
+    meta_decks = [MockDeck(name="Meta", cards=[MockCard("A", api_id="a")] * 60)]
+    signature = FitnessCache.meta_signature(meta_decks, fitness.simulation_settings())
+    assert FitnessCache.meta_signature(meta_decks, fitness.simulation_settings()) == signature
+    with patch.object(fitness, 'LETHAL_SEARCH', not fitness.LETHAL_SEARCH):
+        assert FitnessCache.meta_signature(meta_decks, fitness.simulation_settings()) != signature
+    with patch.object(fitness, 'ADJUDICATE', not fitness.ADJUDICATE):
+        assert FitnessCache.meta_signature(meta_decks, fitness.simulation_settings()) != signature
+    flipped = fitness.simulation_settings(antithetic_pairs=not fitness.ANTITHETIC_PAIRS)
+    assert FitnessCache.meta_signature(meta_decks, flipped) != signature
+    piloted = fitness.simulation_settings(mcts=fitness.MCTSSettings(rollouts=8))
+    assert FitnessCache.meta_signature(meta_decks, piloted) != signature
+
+def test_fitness_cache_counts_duplicates_once_and_averages_meta_decks(all_cards_map):
+    """Repeated decklists in a batch are looked up once, and win rates weigh each meta deck equally."""
+    from src.optimizer import fitness
+    from src.optimizer.fitness_cache import FitnessCache
+    cards = list(all_cards_map.values())
+    deck_a, deck_b = cards[:60], cards[60:120]
+    meta_decks = [MockDeck(name="Meta A", cards=cards[120:180]), MockDeck(name="Meta B", cards=cards[:60])]
+    cache = FitnessCache()
+    # Unequal game counts: pooled this would be 1/4, but each meta deck counts the same
+    cache.record(FitnessCache.deck_key(deck_b), "Meta A", 1, 1)
+    cache.record(FitnessCache.deck_key(deck_b), "Meta B", 0, 3)
+    assert cache.win_rate(FitnessCache.deck_key(deck_b)) == 0.5
+
+    def fake_simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, plan=None, **kwargs):
+        tasks = fitness._build_tasks(candidate_decks, meta_decks, all_cards_map.table, seed, plan)
+        return [fitness.GameResult(task[0], task[3], task[4], task[5], 1 if task[3] == "Meta A" else 0)
+                for task in tasks]
+
+    with patch.object(fitness, '_simulate', side_effect=fake_simulate), patch.object(fitness, 'GAMES_PER_MATCHUP', 4):
+        fitnesses = fitness.calculate_fitness_batch([deck_a, deck_a[::-1], deck_b], meta_decks, all_cards_map,
+                                                    pool=MagicMock(), cache=cache, seed=1, racing=False)
+    stats = cache.pop_generation_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert fitness.last_batch_report["games"] == 8  # Deck A once; deck B is already cached
+    consistency = fitness.calculate_consistency_score(deck_a)
+    assert fitnesses[0] == fitnesses[1] == 0.5 * consistency
+    assert fitnesses[2] == 0.5 * fitness.calculate_consistency_score(deck_b)
+
+# --- Evaluation Mode Tests ---
+
+def test_common_random_numbers_share_game_seeds_across_candidates(all_cards_map):
+    """With common random numbers, every candidate faces a meta deck under the same seeds."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    candidates = [cards[:60], cards[60:120]]
+    meta_decks = [MockDeck(name="Meta A", cards=cards[120:180]), MockDeck(name="Meta B", cards=cards[:60])]
+
+    def seeds_by_candidate(common_random_numbers):
+        tasks = fitness._build_tasks(candidates, meta_decks, all_cards_map.table, seed=7, common_random_numbers=common_random_numbers)
+        seeds = {}
+        for candidate_idx, _, _, meta_deck_name, game_seed, _ in tasks:
+            seeds.setdefault(candidate_idx, []).append((meta_deck_name, game_seed))
+        return seeds
+
+    paired = seeds_by_candidate(True)
+    assert paired[0] == paired[1]
+    independent = seeds_by_candidate(False)
+    assert not set(independent[0]) & set(independent[1])
+
+def test_mcts_settings_ride_along_with_tasks(all_cards_map):
+    """MCTS settings reach every task, and pick the seats the workers hand to the MCTS AI."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    meta_decks = [MockDeck(name="Meta A", cards=cards[120:180])]
+    settings = fitness.MCTSSettings(rollouts=4)
+    tasks = fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, seed=7, plan=[(0, 0, 2)], mcts=settings)
+    assert [task[6] for task in tasks] == [settings, settings]
+    assert len(fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, seed=7, plan=[(0, 0, 2)])[0]) == 6
+
+    assert fitness._mcts_controllers(None, 1) is None
+    candidate, meta = fitness._mcts_controllers(settings, 1)
+    assert candidate.rollouts == 4 and meta is None
+    assert all(fitness._mcts_controllers(settings._replace(seats='both'), 1))
+    with pytest.raises(ValueError):
+        fitness._mcts_controllers(settings._replace(seats='meta'), 1)
+
+def test_batch_worker_falls_back_to_the_object_engine(all_cards_map):
+    """Batched games between supported decks match run_single_game, and other chunks fall back to it."""
+    from src.benchmark import build_card_pool, build_decks
+    from src.optimizer import fitness
+    cards = build_card_pool(seed=4)
+    supported = {api_id: card for api_id, card in cards.items() if fitness.batch_engine.is_supported(card)}
+    vanilla_decks = build_decks(supported, 2, seed=3)
+    full_deck = build_decks(cards, 1, seed=4)[0]
+    assert not fitness.batch_engine.deck_is_supported(full_deck.cards)
+    arguments = ([vanilla_decks[0].cards, full_deck.cards], [vanilla_decks[1]], cards.table, 9, [(0, 0, 4), (1, 0, 2)], False,
+                 True)
+    chunks = fitness._build_chunks(*arguments)
+
+    with patch.object(fitness, 'worker_all_cards_map', cards), patch.object(fitness, 'worker_card_table', cards.table), \
+         patch.object(fitness, 'ADJUDICATE', False):
+        expected = [fitness.run_single_game(task) for task in fitness._build_tasks(*arguments)]
+        for use_batch_engine in (False, True):
+            results = fitness.run_game_chunks((chunks, use_batch_engine))
+            assert fitness.game_results(zip(chunks, results), [vanilla_decks[1]]) == expected
+
+def test_chunks_return_aggregates_and_adapt_to_game_time(all_cards_map):
+    """Workers return one aggregate record per chunk, and jobs shrink as games get slower."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    meta_decks = [MockDeck(name="Meta A", cards=cards[60:120])]
+    chunks = fitness._build_chunks([cards[:60]], meta_decks, all_cards_map.table, seed=7, plan=[(0, 0, 6)], antithetic_pairs=True)
+    assert len(chunks) == 1 and chunks[0].games == 6
+
+    def fake_game(candidate_deck_cards, meta_deck_cards, seed, on_play, mcts=None):
+        return int(on_play), 300, 1  # More turns than a byte holds
+
+    with patch.object(fitness, '_play_game', side_effect=fake_game), \
+         patch.object(fitness, 'worker_card_table', all_cards_map.table):
+        [result] = fitness.run_game_chunks((chunks, False))
+    assert (result.games, result.wins, result.games_on_play, result.wins_on_play) == (6, 3, 3, 3)
+    assert result.win_mask == 0b010101 and list(result.turns) == [300] * 6
+    games = fitness.game_results([(chunks[0], result)], meta_decks)
+    assert [game.win for game in games] == [1, 0] * 3 and {game.turns for game in games} == {300}
+    assert [(game.seed, game.candidate_on_play) for game in games] == \
+        [task[4:6] for task in fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, 7, [(0, 0, 6)], antithetic_pairs=True)]
+
+    many = fitness._build_chunks([cards[:60]], meta_decks, all_cards_map.table, seed=7, plan=[(0, 0, 400)])
+    with patch.dict(fitness.game_seconds, {False: 0.001}), patch.object(fitness, 'BATCH_ENGINE', False):
+        fast = fitness._pack_jobs(many, workers=2)
+        fitness.game_seconds[False] = 0.01
+        slow = fitness._pack_jobs(many, workers=2)
+    assert len(fast) < len(slow)
+    for jobs in (fast, slow):
+        assert sum(chunk.games for job, _ in jobs for chunk in job) == 400
+        assert len(jobs) >= 4
+
+    # Jobs are spread over a WorkerPool's processes; a bare pool is taken to have one per CPU
+    bare_pool = MagicMock()
+    with patch.object(fitness, '_pack_jobs', return_value=[]) as mock_pack:
+        fitness._run_games(fitness.WorkerPool(bare_pool, 3, all_cards_map.table), many)
+        fitness._run_games(bare_pool, many)
+    assert [call.args[1] for call in mock_pack.call_args_list] == [3, fitness.cpu_count()]
+
+def test_card_table_indexes_cards_by_sorted_api_id():
+    """Card indices follow sorted api_ids, so tables built in different processes agree."""
+    cards = {api_id: MockCard(api_id=api_id, name=api_id) for api_id in ("b", "c", "a")}
+    table = CardTable(cards)
+    assert [card.api_id for card in table.cards] == ["a", "b", "c"]
+    assert table.indices([cards[api_id] for api_id in ("a", "b", "c")]) == [0, 1, 2]
+    assert table.lookup(np.array([2, 0])) == [cards["c"], cards["a"]]
+    # A table over a subset numbers the cards its own way, and leaves the first table alone
+    assert CardTable({"b": cards["b"]}).indices([cards["b"]]) == [0]
+    assert table.indices([cards["b"]]) == [1]
+    with pytest.raises(TypeError):
+        table.cards[0] = cards["b"]
+    assert CardPool(cards).table.cards == table.cards
+
+def test_tasks_carry_card_indices(all_cards_map):
+    """Worker tasks name cards by table index, and workers turn them back into the same cards."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    tasks = fitness._build_tasks([cards[:60]], [MockDeck(name="Meta A", cards=cards[60:120])], all_cards_map.table, seed=7, plan=[(0, 0, 1)])
+    assert tasks[0][1] == all_cards_map.table.indices(cards[:60])
+    fitness.init_worker(all_cards_map)
+    assert fitness.worker_card_table.lookup(tasks[0][2]) == cards[60:120]
+
+def test_tasks_are_encoded_with_the_worker_pool_table(all_cards_map):
+    """Tasks for a pool use the table create_worker_pool handed its workers."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    subset = {card.api_id: card for card in cards[100:]}
+    table = CardTable(subset)
+    with patch.object(fitness, 'Pool') as mock_pool:
+        pool = fitness.create_worker_pool(subset, processes=1, shared_cards=False, table=table)
+    assert mock_pool.call_args.kwargs["initargs"] == (subset, table)
+    assert pool.table is table and fitness._task_table(pool, all_cards_map) is table
+
+    meta_decks = [MockDeck(name="Meta A", cards=cards[160:200])]
+    with patch.object(fitness, '_run_games', return_value=[]) as mock_run:
+        fitness._simulate([cards[100:160]], meta_decks, all_cards_map, pool, seed=1, plan=[(0, 0, 1)])
+    [chunk] = mock_run.call_args.args[1]
+    assert table.lookup(chunk.candidate_deck) == cards[100:160]
+    assert table.lookup(chunk.meta_deck) == cards[160:200]
+
+def test_shutting_down_a_worker_pool_frees_its_shared_cards(all_cards_map):
+    """The shared card block lives exactly as long as the pool's workers."""
+    from src.optimizer import fitness
+    with patch.object(fitness, 'Pool') as mock_pool:
+        pool = fitness.create_worker_pool(all_cards_map, processes=1, shared_cards=True)
+        shared = pool.shared_cards
+        pool.close()
+        assert shared.block is not None
+        pool.join()
+        assert shared.block is None
+        mock_pool.return_value.join.assert_called_once()
+
+        with fitness.create_worker_pool(all_cards_map, processes=1, shared_cards=True) as pool:
+            shared = pool.shared_cards
+        assert shared.block is None
+        mock_pool.return_value.terminate.assert_called_once()
+
+        published = []
+
+        def publish(*args):
+            published.append(SharedCardPool(*args))
+            return published[-1]
+
+        mock_pool.side_effect = OSError
+        with patch.object(fitness, 'SharedCardPool', publish):
+            with pytest.raises(OSError):
+                fitness.create_worker_pool(all_cards_map, processes=1, shared_cards=True)
+        assert published[0].block is None
+
+def test_shared_worker_plays_the_same_games():
+    """A worker attached to the shared card pool decodes tasks to the same cards and results."""
+    from src.benchmark import build_card_pool, build_decks
+    from src.optimizer import fitness
+    all_cards = build_card_pool(seed=5)
+    deck1, deck2 = build_decks(all_cards, 2, seed=5)
+    tasks = fitness._build_tasks([deck1.cards], [deck2], all_cards.table, seed=2, plan=[(0, 0, 2)])
+    with patch.object(fitness, 'ADJUDICATE', False):
+        fitness.init_worker(all_cards)
+        expected = [fitness.run_single_game(task) for task in tasks]
+        shared = fitness.SharedCardPool(all_cards)
+        try:
+            fitness.init_shared_worker(shared.name)
+            assert fitness.worker_all_cards_map is None
+            assert [fitness.run_single_game(task) for task in tasks] == expected
+            report = fitness.worker_memory_report()
+            assert 0 < report["cards_loaded"] < len(all_cards) and report["rss_kib"] > 0
+        finally:
+            fitness.worker_card_table.close()
+            fitness.init_worker(all_cards)
+            shared.close()
+
+def test_paired_variance_reduction():
+    """Perfectly correlated outcomes remove all variance; unpaired candidates report None."""
+    from src.optimizer.fitness import GameResult, paired_variance_reduction
+    correlated = [GameResult(candidate, "Meta", seed, True, seed % 2) for candidate in (0, 1) for seed in range(6)]
+    assert paired_variance_reduction(correlated) == 1.0
+
+    disjoint = [GameResult(candidate, "Meta", candidate * 10 + seed, True, seed % 2) for candidate in (0, 1) for seed in range(6)]
+    assert paired_variance_reduction(disjoint) is None
+
+def test_antithetic_pairs_swap_seats_on_the_same_seed(all_cards_map):
+    """Antithetic tasks come in pairs that share a seed but put the candidate on opposite seats."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    meta_decks = [MockDeck(name="Meta A", cards=cards[120:180])]
+    tasks = fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, seed=7, plan=[(0, 0, 4)], antithetic_pairs=True)
+
+    seats = [(game_seed, on_play) for _, _, _, _, game_seed, on_play in tasks]
+    assert seats[0][0] == seats[1][0] and seats[2][0] == seats[3][0]
+    assert seats[0][0] != seats[2][0]
+    assert [on_play for _, on_play in seats] == [True, False, True, False]
+
+    # An odd game count is rounded up to whole pairs, in single and batch evaluations alike
+    def fake_simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, plan=None, **kwargs):
+        tasks = fitness._build_tasks(candidate_decks, meta_decks, all_cards_map.table, seed, plan, antithetic_pairs=True)
+        return [fitness.GameResult(task[0], task[3], task[4], task[5], 1) for task in tasks]
+
+    with patch.object(fitness, 'GAMES_PER_MATCHUP', 3):
+        tasks = fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, seed=7, antithetic_pairs=True)
+        assert len(tasks) == 4 and Counter(task[4] for task in tasks) == {tasks[0][4]: 2, tasks[2][4]: 2}
+        assert len(fitness._build_tasks([cards[:60]], meta_decks, all_cards_map.table, seed=7)) == 3
+        with patch.object(fitness, '_simulate', side_effect=fake_simulate):
+            fitness.calculate_fitness_batch([cards[:60]], meta_decks, all_cards_map, pool=MagicMock(), seed=1,
+                                            antithetic_pairs=True, racing=False)
+        assert fitness.last_batch_report["games"] == 4 and fitness.last_batch_report["games_saved"] == 0
+
+def test_antithetic_variance_ratio():
+    """Pairs whose two seats always split the result carry no variance at all."""
+    from src.optimizer.fitness import GameResult, antithetic_variance_ratio
+    split = [GameResult(0, "Meta", seed, on_play, on_play) for seed in range(4) for on_play in (True, False)]
+    assert antithetic_variance_ratio(split) == 0.0
+    assert antithetic_variance_ratio(split[:2]) is None
+
+def test_wilson_interval():
+    """The Wilson interval is bounded, contains the point estimate and narrows with more games."""
+    from src.optimizer.fitness import wilson_interval
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(0, 8)
+    assert low == 0.0 and high < 0.5
+    narrow = wilson_interval(40, 80)
+    wide = wilson_interval(4, 8)
+    assert narrow[0] < 0.5 < narrow[1]
+    assert narrow[1] - narrow[0] < wide[1] - wide[0]
+
+def test_sequential_stopping_cuts_off_decided_matchups(all_cards_map):
+    """A lopsided matchup stops after the minimum games; a close one plays its full allowance."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    meta_decks = [MockDeck(name="Lopsided", cards=cards[:60]), MockDeck(name="Close", cards=cards[60:120])]
+
+    def fake_game(candidate_deck_cards, meta_deck_cards, seed, on_play, mcts=None):
+        win = 1 if meta_deck_cards == cards[:60] else seed % 2
+        return win, 10, 0
+
+    class InlinePool:
+        def imap_unordered(self, func, jobs):
+            return map(func, jobs)
+
+    with patch.object(fitness, 'GAMES_PER_MATCHUP', 20), patch.object(fitness, '_play_game', side_effect=fake_game), \
+         patch.object(fitness, 'worker_card_table', all_cards_map.table):
+        results, decided_early = fitness._simulate_sequential(
+            cards[120:180], meta_decks, all_cards_map, InlinePool(), seed=3, min_games=8, games_budget=0)
+        games = Counter(result.meta_deck_name for result in results)
+        assert decided_early == ["Lopsided"]
+        assert games == {"Lopsided": 8, "Close": 20}
+
+        results, _ = fitness._simulate_sequential(
+            cards[120:180], meta_decks, all_cards_map, InlinePool(), seed=3, min_games=8, games_budget=12)
+        assert Counter(result.meta_deck_name for result in results) == {"Lopsided": 6, "Close": 6}
+
+        # The shipped stopping rule cuts a lopsided matchup short once there are games to save
+        results, decided_early = fitness._simulate_sequential(
+            cards[120:180], meta_decks, all_cards_map, InlinePool(), seed=3, games_budget=0)
+        assert decided_early == ["Lopsided"]
+        assert Counter(result.meta_deck_name for result in results)["Lopsided"] < 20
+
+    # Shipped on, the rule must be able to fire within a matchup's games
+    if fitness.SEQUENTIAL_STOPPING:
+        assert fitness.GAMES_PER_MATCHUP > fitness.SEQUENTIAL_MIN_GAMES
+
+def test_parent_probabilities_separate_clear_winners_and_losers():
+    """Well-sampled strong and weak candidates are settled; an unplayed one stays open."""
+    from src.optimizer.fitness import parent_probabilities
+    records = {0: (95, 100, 1.0), 1: (5, 100, 1.0), 2: (0, 0, 1.0)}
+    probabilities = parent_probabilities(records, parents=1, rng=random.Random(0), samples=400)
+    assert probabilities[0] > 0.9
+    assert probabilities[1] == 0.0
+    assert 0.0 < probabilities[2] < 0.2
+
+def test_racing_stops_playing_settled_candidates(all_cards_map):
+    """Racing gives every candidate its first round, then drops the ones that are settled."""
+    from src.optimizer import fitness
+    cards = list(all_cards_map.values())
+    candidates = [cards[:60], cards[60:120], cards[120:180]]
+    meta_decks = [MockDeck(name="Meta A", cards=cards[:60])]
+
+    def fake_simulate(candidate_decks, meta_decks, all_cards_map, pool, seed, plan=None, **kwargs):
+        # Candidate 0 always wins, the others always lose
+        tasks = fitness._build_tasks(candidate_decks, meta_decks, all_cards_map.table, seed, plan)
+        return [fitness.GameResult(task[0], task[3], task[4], task[5], 1 if task[0] == 0 else 0) for task in tasks]
+
+    with patch.object(fitness, '_simulate', side_effect=fake_simulate), \
+         patch.object(fitness, 'GAMES_PER_MATCHUP', 20), patch.object(fitness, 'RACING_INITIAL_GAMES', 4):
+        fitnesses = fitness.calculate_fitness_batch(candidates, meta_decks, all_cards_map, pool=MagicMock(),
+                                                    seed=1, racing=True, parents=1)
+
+    report = fitness.last_batch_report
+    assert report["racing_rounds"] >= 1
+    assert report["games_saved"] > 0
+    assert report["games"] + report["games_saved"] == 60
+    assert fitnesses[0] > fitnesses[1] and fitnesses[0] > fitnesses[2]
 
-    # 1. Test Early Stopping
-    best_deck = run_ga(all_cards_map, mock_meta_decks, num_generations=50)
-
-    assert best_deck is not None
-    assert len(best_deck.cards) == 60
-    # GA runs for 1 (initial) + 11 (loop) = 12 generations.
-    # Due to elitism=1 (default), calls are 15 (initial) + 14 * 11 (loop) = 169
-    assert mock_calculate_fitness.call_count == 169
-
-    # 2. Test Keyboard Interrupt
-    mock_calculate_fitness.reset_mock()
-    mock_generate_population.reset_mock()
-    mock_generate_population.return_value = [mock_deck_of_cards] * 15
-    mock_calculate_fitness.side_effect = None
-    mock_calculate_fitness.return_value = 0.6  # Constant fitness
-
-    with patch('pygad.GA.run', side_effect=KeyboardInterrupt) as mock_run:
-        best_deck_interrupted = run_ga(all_cards_map, mock_meta_decks, num_generations=20)
-        assert best_deck_interrupted is not None
-        assert len(best_deck_interrupted.cards) == 60
-        mock_run.assert_called_once()
+def test_racing_only_runs_when_a_batch_is_the_whole_population(capsys):
+    """Racing ranks one batch at a time, so smaller batches turn it off with a warning."""
+    from src.optimizer import fitness
+    from src.optimizer.runner import racing_parents
+    with patch.object(fitness, 'RACING', True):
+        assert racing_parents(5, 15, 15) == 5
+        assert capsys.readouterr().out == ""
+        assert racing_parents(5, 5, 15) is None
+        assert "racing is off" in capsys.readouterr().out
@@ -1,3 +1,6 @@
+from src.game_engine.card import compile_abilities, precompute_keywords
+from src.game_engine.zobrist import card_key
+
 class MockDeck:
     """A simplified Deck object for testing purposes."""
     def __init__(self, name, cards):
@@ -27,6 +30,9 @@ class MockCard:
         self.threat_score = kwargs.get('threat_score', 3)
         self.parsed_abilities = kwargs.get('parsed_abilities', [])
         self.keywords = kwargs.get('keywords', set())
+        self.zobrist = card_key(self)
+        compile_abilities(self)
+        precompute_keywords(self)
 
     @property
     def base_name(self):